@@ -0,0 +1,43 @@
+"""Add compressed storage for itinerary responses
+
+Revision ID: add_compressed_response
+Revises: add_itinerary_status
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_compressed_response'
+down_revision = 'add_itinerary_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'itinerary_queries',
+        sa.Column('itinerary_response_compressed', sa.LargeBinary(),
+                  nullable=True),
+    )
+    # Values are already compressed; skip TOAST's own pglz pass
+    op.execute(
+        "ALTER TABLE itinerary_queries "
+        "ALTER COLUMN itinerary_response_compressed SET STORAGE EXTERNAL"
+    )
+
+
+def downgrade() -> None:
+    remaining = op.get_bind().execute(
+        sa.text(
+            "SELECT count(*) FROM itinerary_queries "
+            "WHERE itinerary_response_compressed IS NOT NULL"
+        )
+    ).scalar()
+    if remaining:
+        raise RuntimeError(
+            f"{remaining} itinerary responses are still compressed; run "
+            "`python -m scripts.compress_responses decompress` first"
+        )
+    op.drop_column('itinerary_queries', 'itinerary_response_compressed')
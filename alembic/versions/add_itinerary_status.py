@@ -0,0 +1,37 @@
+"""Add generation status to itinerary queries
+
+Revision ID: add_itinerary_status
+Revises: initial_migration
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_itinerary_status'
+down_revision = 'initial_migration'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'itinerary_queries',
+        sa.Column('status', sa.String(length=16),
+                  server_default='queued', nullable=False),
+    )
+    op.add_column(
+        'itinerary_queries',
+        sa.Column('error_message', sa.String(), nullable=True),
+    )
+    # Rows written before jobs existed were generated synchronously
+    op.execute(
+        "UPDATE itinerary_queries SET status = CASE "
+        "WHEN itinerary_response IS NULL THEN 'failed' ELSE 'done' END"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('itinerary_queries', 'error_message')
+    op.drop_column('itinerary_queries', 'status')
@@ -0,0 +1,46 @@
+"""Add query hash and prompt version for cross-node result sharing
+
+Revision ID: add_query_hash
+Revises: add_compressed_response
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_query_hash'
+down_revision = 'add_compressed_response'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'itinerary_queries',
+        sa.Column('query_hash', sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        'itinerary_queries',
+        sa.Column('prompt_version', sa.String(length=64), nullable=True),
+    )
+    # Existing rows keep NULL hashes; they are simply never matched.
+    # Build the index without blocking writes to the table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_itinerary_queries_query_hash',
+            'itinerary_queries',
+            ['query_hash', 'prompt_version', 'created_at'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_itinerary_queries_query_hash',
+            table_name='itinerary_queries',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('itinerary_queries', 'prompt_version')
+    op.drop_column('itinerary_queries', 'query_hash')
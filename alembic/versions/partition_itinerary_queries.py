@@ -0,0 +1,135 @@
+"""Partition itinerary queries by month of created_at
+
+Revision ID: partition_itinerary_queries
+Revises: add_query_hash
+Create Date: 2026-10-18
+
+On Postgres the existing table becomes the first partition,
+itinerary_queries_legacy, covering everything before a boundary (the start
+of a coming month, chosen when the upgrade runs), so no rows are copied.
+Monthly partitions follow it; the app creates more ahead of time and
+scripts/partitions.py archives old ones.
+The primary key becomes (id, created_at), as a partitioned table requires.
+
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'partition_itinerary_queries'
+down_revision = 'add_query_hash'
+branch_labels = None
+depends_on = None
+
+TABLE = 'itinerary_queries'
+LEGACY = 'itinerary_queries_legacy'
+MONTHS_AHEAD = 3
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def _boundary() -> date:
+    # Rows written while the migration runs must still fall before the
+    # boundary, so it is never less than a day away
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    return _add_months(date(tomorrow.year, tomorrow.month, 1), 1)
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        op.create_index('ix_itinerary_queries_created_at', TABLE, ['created_at'])
+        return
+
+    boundary = _boundary()
+    # Build what the legacy partition needs without blocking writes: indexes
+    # matching the partitioned table's, and a validated constraint that lets
+    # ATTACH PARTITION skip scanning the table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_itinerary_queries_legacy_created_at',
+            TABLE,
+            ['created_at'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'itinerary_queries_legacy_pkey',
+            TABLE,
+            ['id', 'created_at'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT itinerary_queries_legacy_bound"
+            f" CHECK (created_at < {_bound(boundary)}) NOT VALID"
+        )
+        op.execute(
+            f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT itinerary_queries_legacy_bound"
+        )
+
+    # Swap in the partitioned table; every statement here only touches the
+    # catalog
+    op.rename_table(TABLE, LEGACY)
+    op.drop_constraint('itinerary_queries_pkey', LEGACY, type_='primary')
+    op.execute(
+        f"ALTER TABLE {LEGACY} ADD CONSTRAINT itinerary_queries_legacy_pkey"
+        " PRIMARY KEY USING INDEX itinerary_queries_legacy_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_itinerary_queries_query_hash"
+        " RENAME TO ix_itinerary_queries_legacy_query_hash"
+    )
+    op.execute(
+        f"CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS"
+        " INCLUDING STORAGE INCLUDING COMPRESSION) PARTITION BY RANGE (created_at)"
+    )
+    op.create_primary_key('itinerary_queries_pkey', TABLE, ['id', 'created_at'])
+    op.create_index('ix_itinerary_queries_created_at', TABLE, ['created_at'])
+    op.create_index(
+        'ix_itinerary_queries_query_hash',
+        TABLE,
+        ['query_hash', 'prompt_version', 'created_at'],
+    )
+    op.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY}"
+        f" FOR VALUES FROM (MINVALUE) TO ({_bound(boundary)})"
+    )
+    op.drop_constraint('itinerary_queries_legacy_bound', LEGACY, type_='check')
+
+    start = boundary
+    for _ in range(MONTHS_AHEAD):
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE {TABLE}_p{start:%Y%m} PARTITION OF {TABLE}"
+            f" FOR VALUES FROM ({_bound(start)}) TO ({_bound(end)})"
+        )
+        start = end
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index('ix_itinerary_queries_created_at', table_name=TABLE)
+        return
+
+    # Copies back the rows still attached; archived partitions are not
+    # restored
+    op.execute(
+        f"CREATE TABLE {TABLE}_unpartitioned (LIKE {TABLE} INCLUDING DEFAULTS"
+        " INCLUDING STORAGE INCLUDING COMPRESSION)"
+    )
+    op.execute(f"INSERT INTO {TABLE}_unpartitioned SELECT * FROM {TABLE}")
+    op.drop_table(TABLE)
+    op.rename_table(f'{TABLE}_unpartitioned', TABLE)
+    op.create_primary_key('itinerary_queries_pkey', TABLE, ['id'])
+    op.create_index(
+        'ix_itinerary_queries_query_hash',
+        TABLE,
+        ['query_hash', 'prompt_version', 'created_at'],
+    )
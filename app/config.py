@@ -1,6 +1,7 @@
 """Configuration management for the application."""
 
-from typing import Any, Dict
+import functools
+from typing import Any, Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,14 +14,159 @@ class Settings(BaseSettings):
     postgres_password: str = ""
     postgres_db: str = ""
     database_url: str = ""
+    # Read replicas; reads are spread over healthy ones and fall back to the
+    # primary, e.g. DATABASE_REPLICA_URLS='["postgresql://...replica-1/db"]'
+    database_replica_urls: List[str] = []
+    replica_health_check_interval_seconds: float = 5.0
+    # Replicas lagging further behind are taken out of rotation
+    replica_max_lag_seconds: float = 30.0
 
     # LLM settings
     gemini_api_key: str = ""  # Default empty string to avoid None
+    # Registered provider used when LLM_ROUTES is empty
+    llm_provider: str = "gemini"
+    # Use the SDK's native async API; otherwise a dedicated thread pool
+    gemini_use_async: bool = True
+    llm_executor_max_workers: int = 32
+    # Seconds a single LLM request may take (0 disables)
+    llm_request_timeout_seconds: float = 90.0
+
+    # Create missing tables at startup. Alembic owns the schema, so this is
+    # only for throwaway databases (e.g. benchmarks)
+    db_create_all: bool = False
 
     # Logging settings
     log_level: str = "INFO"
     sql_echo: bool = False
 
+    # Prometheus metrics at GET /metrics
+    metrics_enabled: bool = True
+
+    # Diagnostics: event-loop lag sampling, blocked-loop stack capture and
+    # GET /debug/profile. Exposes stack traces, so keep it off in production.
+    diagnostics_enabled: bool = False
+    loop_lag_interval_seconds: float = 0.5
+    # Log the loop thread's stack when a callback blocks the loop this long
+    loop_stall_threshold_seconds: float = 0.1
+    profile_max_seconds: float = 30.0
+
+    # Merge identical concurrent LLM calls into one
+    llm_coalesce_requests: bool = True
+
+    # Multi-provider routing, e.g. LLM_ROUTES='{"gemini": 3, "gemini-eu": 1}'.
+    # Empty uses the single provider the service was created with.
+    llm_routes: Dict[str, float] = {}
+    # Hedge a call once it runs past this latency percentile of its provider
+    llm_hedge_percentile: float = 0.95
+    llm_max_hedges: int = 1
+    # Hedge delay used until a provider has enough latency samples
+    llm_hedge_default_delay_seconds: float = 10.0
+
+    # Per-provider adaptive concurrency limit and circuit breaker
+    llm_guard_enabled: bool = True
+    llm_initial_concurrency: int = 16
+    llm_min_concurrency: int = 1
+    llm_max_concurrency: int = 256
+    # Calls slower than this multiple of the baseline latency shrink the limit
+    llm_latency_tolerance: float = 2.0
+    llm_max_waiting: int = 1000
+    llm_breaker_failure_rate: float = 0.5
+    llm_breaker_window: int = 20
+    llm_breaker_min_calls: int = 10
+    llm_breaker_reset_seconds: float = 30.0
+    llm_breaker_half_open_probes: int = 1
+
+    # Local LLM quota (0 disables a limit); usage is smoothed over
+    # llm_quota_burst_seconds instead of being spent at the start of a minute
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    llm_quota_burst_seconds: float = 10.0
+    # Initial output size guess, refined from observed responses
+    llm_output_tokens_estimate: int = 1024
+    # Retries of throttled or transient LLM errors, within the deadline
+    llm_max_retries: int = 3
+    llm_retry_base_delay_seconds: float = 1.0
+    llm_retry_max_delay_seconds: float = 30.0
+    # Default deadlines for interactive and batch/background generations
+    llm_interactive_deadline_seconds: float = 120.0
+    llm_background_deadline_seconds: float = 900.0
+
+    # Seconds between partial-response saves while streaming (0 disables)
+    stream_checkpoint_interval_seconds: float = 0.0
+
+    # Response storage: "none" keeps plain text, "zlib"/"zstd" compress new
+    # responses into a bytea column (zstd falls back to zlib if unavailable)
+    response_compression: str = "none"
+    response_compression_level: Optional[int] = None
+    response_compression_dictionary: str = ""
+    # Retired zstd dictionaries still needed to decode older rows
+    response_compression_dictionaries: List[str] = []
+
+    # Background job settings
+    job_concurrency: int = 4
+    job_queue_max_size: int = 100
+    job_max_wait_seconds: float = 30.0
+    job_poll_interval_seconds: float = 0.5
+
+    # Batch settings
+    batch_max_size: int = 200
+    batch_concurrency: int = 8
+
+    # Completed-itinerary read cache and HTTP caching
+    read_cache_max_size: int = 10000
+    read_cache_ttl_seconds: float = 3600.0
+    itinerary_http_max_age: int = 3600
+
+    # Listing and export settings
+    list_page_max_size: int = 100
+    export_batch_size: int = 1000
+
+    # Response cache settings
+    itinerary_cache_enabled: bool = True
+    itinerary_cache_max_size: int = 1024
+    itinerary_cache_ttl_seconds: float = 3600.0
+
+    # Near-duplicate query cache: a query whose hashed word vector is at least
+    # this cosine-similar to a cached one reuses its response (needs numpy)
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_max_size: int = 10000
+    semantic_cache_ttl_seconds: float = 86400.0
+    semantic_cache_dimensions: int = 1024
+    # Loaded on startup and saved on shutdown when set
+    semantic_cache_path: str = ""
+
+    # Cross-node result sharing: reuse the response of a completed row for
+    # the same normalized query, prompts and model if younger than max age.
+    # One node generates a request at a time; the others poll its row, for
+    # at most the lease in case that node died
+    shared_results_enabled: bool = True
+    shared_results_max_age_seconds: float = 3600.0
+    shared_results_lease_seconds: float = 120.0
+    shared_results_poll_interval_seconds: float = 0.5
+
+    # Monthly partitions of itinerary_queries (Postgres, see app.partitions):
+    # how many future months to keep created, how often to check while the
+    # app runs (0 disables), and how many past months scripts.partitions
+    # archive keeps attached
+    partition_months_ahead: int = 3
+    partition_maintenance_interval_seconds: float = 6 * 3600.0
+    partition_retention_months: int = 12
+
+    # Write-behind batching of itinerary inserts and updates: writes wait up
+    # to the interval, or until max batch rows are pending, and are then
+    # committed together (see app.write_buffer)
+    write_buffer_enabled: bool = False
+    write_buffer_max_batch: int = 200
+    write_buffer_interval_seconds: float = 0.005
+
+    # Trips of at least this many days are planned day by day: one call
+    # outlines the days, which are then generated in parallel. Costs one
+    # more LLM call per day, so it is off by default (0 disables)
+    itinerary_parallel_min_days: int = 0
+    itinerary_parallel_max_days: int = 30
+    itinerary_parallel_concurrency: int = 8
+
     # Prompt templates
     prompts: Dict[str, str] = {
         "itinerary": (
@@ -28,7 +174,20 @@ class Settings(BaseSettings):
             "Format the response in a clear, day-by-day structure with "
             "specific times.\n"
             "Request: {query}"
-        )
+        ),
+        "itinerary_plan": (
+            "Plan a {days}-day trip based on the following request.\n"
+            "Reply with exactly one line per day in the form "
+            "'Day N: <short outline of the day>' and nothing else.\n"
+            "Request: {query}"
+        ),
+        "itinerary_day": (
+            "Create a detailed itinerary for day {day} of the trip below.\n"
+            "Trip outline:\n{outline}\n"
+            "Cover only day {day} ({summary}) with specific times, starting "
+            "with the heading 'Day {day}'.\n"
+            "Request: {query}"
+        ),
     }
 
     model_config = SettingsConfigDict(
@@ -54,4 +213,10 @@ class Settings(BaseSettings):
             )
 
 
-settings = Settings()
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings (environment and ``.env``) once."""
+    return Settings()
+
+
+settings = get_settings()
@@ -5,10 +5,13 @@ and connection pooling for both read and write operations.
 """
 
 import contextlib
-import os
-from typing import AsyncIterator, Literal
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Sequence
 
-from dotenv import load_dotenv
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncEngine,
@@ -17,16 +20,27 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import declarative_base
-
-# Load environment variables once
-load_dotenv()
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from .config import get_settings
+from .metrics import db_checkout_wait, db_pool_connections, db_query_duration
+from .replicas import (
+    PRIMARY_LSN_QUERY,
+    PRIMARY_TOKEN,
+    Replica,
+    ReplicaSet,
+    is_disconnect,
+    parse_lsn,
+)
 
 Base = declarative_base()
 
+# Consistency token of the latest write committed by the current task
+_write_token: ContextVar[Optional[str]] = ContextVar("write_token", default=None)
+
 # Common database configuration
 COMMON_ENGINE_CONFIG = {
     "pool_pre_ping": True,
-    "echo": bool(os.getenv("SQL_ECHO", False)),
 }
 
 READ_CONFIG = {
@@ -44,10 +58,19 @@ WRITE_CONFIG = {
     "pool_timeout": 30,
 }
 
-# Convert the URL to async format
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "").replace(
-    "postgresql://", "postgresql+asyncpg://"
-)
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+def database_url() -> str:
+    """Configured database URL, converted to the async driver."""
+    return _async_url(get_settings().database_url)
+
+
+def replica_urls() -> List[str]:
+    """Configured read replica URLs, converted to the async driver."""
+    return [_async_url(url) for url in get_settings().database_replica_urls]
 
 
 class DatabaseError(Exception):
@@ -56,23 +79,119 @@ class DatabaseError(Exception):
     pass
 
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection.
+
+    The pool's logging name ("read" or "write") labels the measurement.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_checkout_wait.labels(pool=self._orig_logging_name or "").observe(
+                time.perf_counter() - start
+            )
+
+
+def _instrument(engine: AsyncEngine, pool: str) -> None:
+    """Record statement execution time for an engine."""
+    query_duration = db_query_duration.labels(pool=pool)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start(conn: Any, cursor: Any, statement: Any, *args: Any) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _stop(conn: Any, cursor: Any, statement: Any, *args: Any) -> None:
+        start = conn.info.pop("query_start", None)
+        if start is not None:
+            query_duration.observe(time.perf_counter() - start)
+
+
 class DatabaseSessionManager:
     """Manages database sessions and connections."""
 
-    def __init__(self) -> None:
-        """Initialize session manager with empty engine and sessionmaker instances."""
+    def __init__(
+        self,
+        url: Optional[Callable[[], str]] = None,
+        replica_urls: Optional[Callable[[], List[str]]] = None,
+    ) -> None:
+        """Initialize session manager with empty engine and sessionmaker instances.
+
+        Args:
+            url: Returns the database URL; if given, engines are created from
+                it on first use instead of by an explicit ``init``.
+            replica_urls: Returns the read replica URLs for that first use.
+        """
+        self._url = url
+        self._replica_urls = replica_urls
+        self._engines: Dict[str, AsyncEngine] = {}
+        self.replicas = ReplicaSet([])
         self._write_engine: AsyncEngine | None = None
         self._read_engine: AsyncEngine | None = None
         self._write_sessionmaker: async_sessionmaker | None = None
         self._read_sessionmaker: async_sessionmaker | None = None
 
-    def init(self, host: str) -> None:
-        """Initialize database engines and session factories."""
+    def init(self, host: str, replica_hosts: Sequence[str] = ()) -> None:
+        """Initialize database engines and session factories.
+
+        Read sessions use ``replica_hosts`` when they are healthy and fall
+        back to a read pool on the primary ``host``.
+        """
         if not host:
             raise DatabaseError("Database URL not provided")
 
-        self._write_engine = create_async_engine(host, **WRITE_CONFIG)
-        self._read_engine = create_async_engine(host, **READ_CONFIG)
+        echo = get_settings().sql_echo
+        read_config: Dict[str, Any] = {**READ_CONFIG, "echo": echo}
+        if make_url(host).get_backend_name() == "sqlite":
+            # SQLite stand-in (e.g. for benchmarks) has no READ COMMITTED
+            read_config.pop("execution_options")
+
+        self._write_engine = create_async_engine(
+            host,
+            poolclass=TimedQueuePool,
+            pool_logging_name="write",
+            echo=echo,
+            **WRITE_CONFIG,
+        )
+        self._read_engine = create_async_engine(
+            host, poolclass=TimedQueuePool, pool_logging_name="read", **read_config
+        )
+        self._engines = {"write": self._write_engine, "read": self._read_engine}
+        replicas = []
+        for i, replica_host in enumerate(replica_hosts):
+            name = f"replica-{i}"
+            engine = create_async_engine(
+                replica_host,
+                poolclass=TimedQueuePool,
+                pool_logging_name=name,
+                **read_config,
+            )
+            self._engines[name] = engine
+            replicas.append(
+                Replica(
+                    name,
+                    engine,
+                    async_sessionmaker(
+                        autocommit=False, bind=engine, expire_on_commit=False
+                    ),
+                )
+            )
+        settings = get_settings()
+        self.replicas = ReplicaSet(
+            replicas,
+            max_lag=settings.replica_max_lag_seconds,
+            check_timeout=settings.replica_health_check_interval_seconds,
+        )
+
+        for name, engine in self._engines.items():
+            _instrument(engine, name)
+            for state in ("checked_out", "idle", "overflow"):
+                db_pool_connections.labels(pool=name, state=state).set_function(
+                    functools.partial(self._pool_count, name, state)
+                )
 
         self._write_sessionmaker = async_sessionmaker(
             autocommit=False, bind=self._write_engine, expire_on_commit=False
@@ -82,17 +201,94 @@ class DatabaseSessionManager:
             autocommit=False, bind=self._read_engine, expire_on_commit=False
         )
 
+    def _ensure_initialized(self) -> None:
+        if self._write_engine is None and self._url is not None:
+            self.init(self._url(), self._replica_urls() if self._replica_urls else ())
+
+    def start_replica_checks(self, interval: float) -> None:
+        """Health-check read replicas every interval seconds until closed."""
+        self._ensure_initialized()
+        self.replicas.start(interval)
+
+    def consistency_token(self) -> Optional[str]:
+        """Position of the primary after the caller's committed writes.
+
+        Passing it as ``read_after`` to a later read session guarantees the
+        read sees those writes. Write sessions read the position on their own
+        connection after committing, and the token is that of the latest write
+        made by the current task (or handed to it with ``track_write``).
+        ``PRIMARY_TOKEN`` when the position could not be read, so reads go to
+        the primary. None when there are no replicas to route to, or without
+        such a write.
+        """
+        if not self.replicas.replicas:
+            return None
+        return _write_token.get()
+
+    def track_write(self, token: Optional[str]) -> None:
+        """Adopt token as the current task's consistency token.
+
+        For writes another task committed on the caller's behalf, e.g. the
+        write buffer's flush.
+        """
+        if token is not None:
+            _write_token.set(token)
+
+    async def _record_write_position(self, connection: AsyncConnection) -> None:
+        """Set the consistency token after a commit on connection."""
+        try:
+            lsn = str((await connection.execute(PRIMARY_LSN_QUERY)).scalar())
+            parse_lsn(lsn)
+        except Exception:
+            # Only the primary is sure to have the write
+            lsn = PRIMARY_TOKEN
+        _write_token.set(lsn)
+
+    async def _choose_replica(self, read_after: Optional[str]) -> Optional[Replica]:
+        """Replica to serve a read session, or None for the primary."""
+        if not self.replicas.replicas or read_after == PRIMARY_TOKEN:
+            return None
+        try:
+            min_lsn = parse_lsn(read_after) if read_after else None
+        except ValueError:
+            # Unknown token: only the primary is sure to have the write
+            return None
+        return await self.replicas.choose(min_lsn)
+
+    def _replica_failed(self, replica: Optional[Replica], error: Exception) -> None:
+        if replica is not None and is_disconnect(error):
+            self.replicas.mark_down(replica, error)
+
     async def close(self) -> None:
         """Close all database connections."""
-        if self._write_engine:
-            await self._write_engine.dispose()
-        if self._read_engine:
-            await self._read_engine.dispose()
+        await self.replicas.stop()
+        for engine in self._engines.values():
+            await engine.dispose()
+        self._engines = {}
+        self.replicas = ReplicaSet([])
         self._write_engine = None
         self._read_engine = None
         self._write_sessionmaker = None
         self._read_sessionmaker = None
 
+    def pool_status(self, mode: str) -> Dict[str, int]:
+        """Connection counts of a pool: checked out, idle and overflow.
+
+        ``mode`` is "read", "write" or a replica name such as "replica-0".
+        """
+        engine = self._engines.get(mode)
+        pool = engine.pool if engine is not None else None
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            return {"checked_out": 0, "idle": 0, "overflow": 0}
+        return {
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        }
+
+    def _pool_count(self, mode: str, state: str) -> float:
+        return self.pool_status(mode)[state]
+
     async def _handle_transaction_error(
         self, error: Exception, connection: AsyncConnection | None = None
     ) -> None:
@@ -103,13 +299,24 @@ class DatabaseSessionManager:
 
     @contextlib.asynccontextmanager
     async def connect(
-        self, mode: Literal["read", "write"] = "write"
+        self, mode: Literal["read", "write"] = "write", autocommit: bool = False
     ) -> AsyncIterator[AsyncConnection]:
-        """Get a database connection with automatic error handling."""
+        """Get a database connection with automatic error handling.
+
+        With ``autocommit`` each statement commits on its own, as statements
+        that cannot run in a transaction (e.g. ``... CONCURRENTLY``) need.
+        """
+        self._ensure_initialized()
         engine = self._write_engine if mode == "write" else self._read_engine
         if engine is None:
             raise DatabaseError("DatabaseSessionManager is not initialized")
 
+        if autocommit:
+            async with engine.connect() as connection:
+                await connection.execution_options(isolation_level="AUTOCOMMIT")
+                yield connection
+            return
+
         async with engine.begin() as connection:
             try:
                 yield connection
@@ -118,23 +325,64 @@ class DatabaseSessionManager:
 
     @contextlib.asynccontextmanager
     async def session(
-        self, mode: Literal["read", "write"] = "write"
+        self,
+        mode: Literal["read", "write"] = "write",
+        read_after: Optional[str] = None,
+        replica: bool = True,
     ) -> AsyncIterator[AsyncSession]:
-        """Get a database session with automatic error handling."""
+        """Get a database session with automatic error handling.
+
+        Read sessions go to a healthy read replica when there is one, unless
+        ``replica`` is False. With ``read_after``, a token from
+        ``consistency_token``, only replicas that have caught up with it are
+        used, so the session sees the writes made before the token was taken.
+        """
+        self._ensure_initialized()
         sessionmaker = (
             self._write_sessionmaker if mode == "write" else self._read_sessionmaker
         )
         if sessionmaker is None:
             raise DatabaseError("DatabaseSessionManager is not initialized")
 
-        session = sessionmaker()
-        try:
-            yield session
-        except Exception as e:
-            await session.rollback()
-            await self._handle_transaction_error(e)
-        finally:
-            await session.close()
+        target = None
+        if mode == "read" and replica:
+            target = await self._choose_replica(read_after)
+            if target is not None:
+                sessionmaker = target.sessionmaker
+
+        async with contextlib.AsyncExitStack() as stack:
+            committed: List[bool] = []
+            connection = None
+            if mode == "write" and self.replicas.replicas and self._write_engine:
+                # Keep the connection after the commit to read the primary's
+                # position on it, for consistency tokens
+                connection = await stack.enter_async_context(
+                    self._write_engine.connect()
+                )
+            session = (
+                sessionmaker() if connection is None else sessionmaker(bind=connection)
+            )
+            if connection is not None:
+                event.listen(
+                    session.sync_session,
+                    "after_commit",
+                    lambda _: committed.append(True),
+                )
+            try:
+                yield session
+            except SQLAlchemyError as e:
+                await session.rollback()
+                self._replica_failed(target, e)
+                await self._handle_transaction_error(e)
+            except Exception as e:
+                # Errors raised by the caller (e.g. HTTP errors) pass through
+                await session.rollback()
+                self._replica_failed(target, e)
+                raise
+            finally:
+                await session.close()
+            if connection is not None and committed:
+                await self._record_write_position(connection)
 
     async def create_all(self, connection: AsyncConnection) -> None:
         """Create all database tables."""
@@ -145,9 +393,8 @@ class DatabaseSessionManager:
         await connection.run_sync(Base.metadata.drop_all)
 
 
-# Initialize session manager
-sessionmanager = DatabaseSessionManager()
-sessionmanager.init(SQLALCHEMY_DATABASE_URL)
+# Engines are created on first use, from the configured URLs
+sessionmanager = DatabaseSessionManager(database_url, replica_urls)
 
 
 async def get_write_db() -> AsyncIterator[AsyncSession]:
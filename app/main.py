@@ -1,17 +1,41 @@
 """Main FastAPI application module."""
 
+import asyncio
+import json
+import logging
+import threading
+import time
 from contextlib import asynccontextmanager
-from typing import Annotated, AsyncIterator
+from dataclasses import asdict
+from typing import Annotated, Any, AsyncIterator, Coroutine, Dict
+from uuid import UUID
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.routing import APIRouter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models, schemas
-from .database import get_read_db, get_write_db, sessionmanager
+from .config import settings
+from .database import sessionmanager
+from .metrics import MetricsMiddleware, event_loop_lag, event_loop_stalls
+from .partitions import PartitionMaintainer
 from .services import ItineraryService
+from .services.cache import EncodedItinerary, completed_itineraries
 from .services.itinerary import ItineraryServiceError
+from .services.jobs import ItineraryJob, ItineraryJobQueue, JobQueueFullError
+from .services.scheduler import is_deadline_exceeded
+from .services.shared_results import Claim, SharedResults
+from .utils import fast_json
+from .utils.cancellation import ClientDisconnectedError, cancel_on_disconnect, remaining
+from .utils.http import http_date, is_not_modified, make_etag
+from .utils.loop_monitor import LoopMonitor
+from .utils.metrics import CONTENT_TYPE, registry
+from .utils.profiler import render_collapsed, sample_stacks
+from .write_buffer import WriteBuffer
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -19,26 +43,226 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Handle startup and shutdown events."""
     try:
         # Startup: Initialize services
-        async with sessionmanager.connect(mode="write") as connection:
-            await sessionmanager.create_all(connection)
+        if settings.diagnostics_enabled:
+            loop_monitor.start()
+        if settings.database_replica_urls:
+            sessionmanager.start_replica_checks(
+                settings.replica_health_check_interval_seconds
+            )
+        if settings.db_create_all:
+            async with sessionmanager.connect(mode="write") as connection:
+                await sessionmanager.create_all(connection)
+        if settings.partition_maintenance_interval_seconds > 0:
+            partition_maintainer.start(settings.partition_maintenance_interval_seconds)
         await itinerary_service.initialize()
+        await job_queue.start()
         yield
     finally:
         # Shutdown: Cleanup services
+        await job_queue.stop()
+        await partition_maintainer.stop()
+        # Commit the writes still buffered before the pool goes away
+        await write_buffer.close()
+        await itinerary_service.close()
         await sessionmanager.close()
+        loop_monitor.stop()
 
 
 # Initialize services
-itinerary_service = ItineraryService()
+itinerary_service = ItineraryService(settings.llm_provider)
+write_buffer = WriteBuffer(
+    sessionmanager,
+    enabled=settings.write_buffer_enabled,
+    max_batch=settings.write_buffer_max_batch,
+    interval=settings.write_buffer_interval_seconds,
+)
+shared_results = SharedResults(
+    itinerary_service,
+    sessionmanager,
+    writes=write_buffer,
+    enabled=settings.shared_results_enabled,
+    max_age=settings.shared_results_max_age_seconds,
+    lease=settings.shared_results_lease_seconds,
+    poll_interval=settings.shared_results_poll_interval_seconds,
+)
+job_queue = ItineraryJobQueue(
+    itinerary_service,
+    sessionmanager,
+    concurrency=settings.job_concurrency,
+    max_queue_size=settings.job_queue_max_size,
+    shared=shared_results,
+    writes=write_buffer,
+)
+partition_maintainer = PartitionMaintainer(
+    lambda: sessionmanager.connect(mode="write"), settings.partition_months_ahead
+)
+loop_monitor = LoopMonitor(
+    interval=settings.loop_lag_interval_seconds,
+    stall_threshold=settings.loop_stall_threshold_seconds,
+    on_lag=event_loop_lag.observe,
+    on_stall=lambda stall: event_loop_stalls.inc(),
+)
+_profile_lock = asyncio.Lock()
+
+# Read-your-writes token returned by writes and accepted by reads
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+
+async def get_consistent_read_db(
+    x_consistency_token: Annotated[str | None, Header()] = None,
+) -> AsyncIterator[AsyncSession]:
+    """Get a read session that sees the writes behind a consistency token."""
+    async with sessionmanager.session(
+        mode="read", read_after=x_consistency_token
+    ) as session:
+        yield session
+
+
+# Seconds the client is willing to wait, capped at the interactive default
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+
+def get_request_deadline(
+    x_request_timeout: Annotated[float | None, Header(gt=0)] = None,
+) -> float:
+    """Get the ``time.monotonic()`` deadline of the current request."""
+    timeout = settings.llm_interactive_deadline_seconds
+    if x_request_timeout is not None:
+        timeout = min(timeout, x_request_timeout)
+    return time.monotonic() + timeout
+
 
 # Type annotations for dependencies
-DBSession = Annotated[AsyncSession, Depends(get_write_db)]
-ReadDBSession = Annotated[AsyncSession, Depends(get_read_db)]
+ReadDBSession = Annotated[AsyncSession, Depends(get_consistent_read_db)]
+RequestDeadline = Annotated[float, Depends(get_request_deadline)]
 
 # Create router with typed routes
 router = APIRouter()
 
 
+async def _insert_query(
+    query: str, status: models.ItineraryStatus
+) -> models.ItineraryQuery:
+    """Insert a new itinerary row, committed before returning."""
+    return await write_buffer.insert(
+        {
+            "query": query,
+            "status": status.value,
+            **shared_results.fingerprint_values(query),
+        }
+    )
+
+
+async def _claim_query(
+    query: str, status: models.ItineraryStatus, reuse: bool, deadline: float
+) -> Claim:
+    """Insert a new itinerary row, claiming its request across nodes.
+
+    Raises:
+        TimeoutError: If the claim does not finish by ``deadline``.
+    """
+    async with asyncio.timeout(remaining(deadline)):
+        return await shared_results.claim(query, status, reuse=reuse)
+
+
+async def _save_response(
+    query_id: UUID,
+    response: str,
+    status: models.ItineraryStatus = models.ItineraryStatus.DONE,
+    durable: bool = True,
+) -> models.ItineraryQuery | None:
+    """Store a (possibly partial) response.
+
+    Without ``durable`` this returns None before the write is committed.
+    """
+    updated = await write_buffer.set_response(query_id, response, status, durable)
+    completed_itineraries.invalidate(query_id)
+    return updated
+
+
+def _set_consistency_token(response: Response) -> None:
+    """Attach a token that lets later reads be served by caught-up replicas."""
+    token = sessionmanager.consistency_token()
+    if token is not None:
+        response.headers[CONSISTENCY_TOKEN_HEADER] = token
+
+
+async def _save_failure(
+    query_id: UUID,
+    error_message: str,
+    status: models.ItineraryStatus = models.ItineraryStatus.FAILED,
+) -> None:
+    """Mark a generation as failed.
+
+    The error is reported to the client either way, so the write is not
+    waited for.
+    """
+    await write_buffer.set_status(query_id, status, error_message, durable=False)
+    completed_itineraries.invalidate(query_id)
+
+
+async def _save_pending_failure(
+    query_id: UUID | None,
+    error_message: str,
+    status: models.ItineraryStatus = models.ItineraryStatus.FAILED,
+) -> None:
+    """Mark a generation as failed if a row was claimed for it.
+
+    Errors are logged rather than raised, so they do not hide the original
+    failure.
+    """
+    if query_id is None:
+        return
+    try:
+        await _save_failure(query_id, error_message, status)
+    except Exception:
+        logger.exception("Could not record the failure of itinerary %s", query_id)
+
+
+def _failure_status(error: Exception) -> models.ItineraryStatus:
+    """Row status recording why a generation did not complete."""
+    if is_deadline_exceeded(error):
+        return models.ItineraryStatus.TIMED_OUT
+    return models.ItineraryStatus.FAILED
+
+
+# Outcome writes that must finish even though their request was cancelled
+_outcome_writes: set["asyncio.Task[None]"] = set()
+
+
+def _detach(write: Coroutine[Any, Any, None]) -> None:
+    """Run an outcome write outside a request task that is being cancelled."""
+    task = asyncio.create_task(write)
+    _outcome_writes.add(task)
+    task.add_done_callback(_outcome_writes.discard)
+
+
+def _save_failure_detached(
+    query_id: UUID, error_message: str, status: models.ItineraryStatus
+) -> None:
+    """Record a failure from a request task that is being cancelled."""
+    _detach(_save_failure(query_id, error_message, status))
+
+
+async def _fail_pending(query_ids: list[UUID], error_message: str) -> None:
+    """Mark the rows among query_ids that are still running as failed.
+
+    Errors are logged rather than raised, so they do not hide the original
+    failure.
+    """
+    if not query_ids:
+        return
+    try:
+        async with sessionmanager.session(mode="write") as db:
+            await models.ItineraryQuery.fail_pending(db, query_ids, error_message)
+    except Exception:
+        logger.exception(
+            "Could not record the failure of %d itineraries", len(query_ids)
+        )
+    for query_id in query_ids:
+        completed_itineraries.invalidate(query_id)
+
+
 # mypy: disable-error-code="misc"
 @router.post(
     "/itinerary/",
@@ -49,40 +273,564 @@ router = APIRouter()
     },
 )
 async def create_itinerary(
-    query: schemas.ItineraryQueryCreate, db: DBSession
+    query: schemas.ItineraryQueryCreate,
+    request: Request,
+    response: Response,
+    deadline: RequestDeadline,
+    bypass_cache: bool = False,
 ) -> models.ItineraryQuery:
-    """Create a new itinerary."""
+    """Create a new itinerary.
+
+    Set ``bypass_cache`` to force a fresh generation for a repeated query;
+    otherwise a recent result for the same query is reused, or awaited if
+    another node is generating it. No database connection is held while the
+    LLM is generating. Send the returned ``X-Consistency-Token`` with reads
+    to be sure to see the result when they are served by read replicas.
+
+    The itinerary must be ready within ``X-Request-Timeout`` seconds (capped
+    at ``LLM_INTERACTIVE_DEADLINE_SECONDS``), and generation stops if the
+    client disconnects; the row is then marked ``timed_out`` or
+    ``cancelled``.
+    """
+    # Id of the row this request must finish, once it has claimed one
+    pending_id: UUID | None = None
     try:
-        # Create initial record
-        db_query = await models.ItineraryQuery.create(db, query=query.query)
+        # Create initial record, done already if an earlier result is reused
+        claim = await _claim_query(
+            query.query, models.ItineraryStatus.RUNNING, not bypass_cache, deadline
+        )
+        if claim.response is not None:
+            _set_consistency_token(response)
+            return claim.row
+        pending_id = claim.row.id
 
-        # Generate itinerary using configured LLM
-        itinerary = await itinerary_service.generate_itinerary(query.query)
+        # Generate itinerary using configured LLM, unless the client leaves
+        itinerary = await cancel_on_disconnect(
+            request.receive,
+            shared_results.resolve(
+                claim,
+                lambda: itinerary_service.generate_itinerary(
+                    query.query, use_cache=not bypass_cache, deadline=deadline
+                ),
+                deadline,
+            ),
+        )
 
         # Update the record with the response
-        return await db_query.update_response(db, itinerary)
+        updated = await _save_response(claim.row.id, itinerary)
+    except ClientDisconnectedError as e:
+        await _save_pending_failure(
+            pending_id, str(e), models.ItineraryStatus.CANCELLED
+        )
+        raise HTTPException(status_code=499, detail="Client closed request")
     except ItineraryServiceError as e:
+        status = _failure_status(e)
+        await _save_pending_failure(pending_id, str(e), status)
         raise HTTPException(
-            status_code=500, detail=f"Failed to generate itinerary: {str(e)}"
+            status_code=504 if status is models.ItineraryStatus.TIMED_OUT else 500,
+            detail=f"Failed to generate itinerary: {str(e)}",
         )
+    except TimeoutError as e:
+        await _save_pending_failure(
+            pending_id,
+            str(e) or "Request deadline exceeded",
+            models.ItineraryStatus.TIMED_OUT,
+        )
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except asyncio.CancelledError:
+        if pending_id is not None:
+            _save_failure_detached(
+                pending_id, "Request cancelled", models.ItineraryStatus.CANCELLED
+            )
+        raise
     except Exception as e:
+        await _save_pending_failure(pending_id, str(e))
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    _set_consistency_token(response)
+    return updated
+
+
+def _sse_event(data: Any, event: str | None = None) -> str:
+    """Format a single Server-Sent Events message."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _stream_itinerary_events(
+    claim: Claim, query: str, use_cache: bool, deadline: float
+) -> AsyncIterator[str]:
+    """Forward generated chunks as SSE messages and persist the final text."""
+    query_id = claim.row.id
+    yield _sse_event({"id": str(query_id)}, event="created")
+
+    chunks: list[str] = []
+    interval = settings.stream_checkpoint_interval_seconds
+    last_checkpoint = time.monotonic()
+    try:
+        async for chunk in shared_results.stream(
+            claim,
+            lambda: itinerary_service.stream_itinerary(
+                query, use_cache=use_cache, deadline=deadline
+            ),
+            deadline,
+        ):
+            chunks.append(chunk)
+            yield _sse_event({"text": chunk})
+            if interval > 0 and time.monotonic() - last_checkpoint >= interval:
+                # Checkpoints only limit what a crash loses; do not wait
+                await _save_response(
+                    query_id,
+                    "".join(chunks),
+                    models.ItineraryStatus.RUNNING,
+                    durable=False,
+                )
+                last_checkpoint = time.monotonic()
+
+        if claim.response is None:
+            await _save_response(query_id, "".join(chunks))
+        yield _sse_event({"id": str(query_id)}, event="done")
+    except asyncio.CancelledError:
+        # The client disconnected and the response is being torn down
+        _save_failure_detached(
+            query_id, "Client disconnected", models.ItineraryStatus.CANCELLED
+        )
+        raise
+    except Exception as e:
+        detail = f"Failed to generate itinerary: {str(e)}"
+        await _save_failure(query_id, detail, _failure_status(e))
+        yield _sse_event({"detail": detail}, event="error")
+
+
+# mypy: disable-error-code="misc"
+@router.post(
+    "/itinerary/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        500: {"description": "Internal server error"},
+    },
+)
+async def stream_itinerary(
+    query: schemas.ItineraryQueryCreate,
+    deadline: RequestDeadline,
+    bypass_cache: bool = False,
+) -> StreamingResponse:
+    """Create a new itinerary, streaming it as Server-Sent Events.
+
+    Emits a ``created`` event with the id, one message per text chunk, then
+    ``done`` once the full response is stored (or ``error`` on failure). The
+    stream must finish within ``X-Request-Timeout`` seconds; if the client
+    disconnects first, generation stops and the row is marked ``cancelled``.
+    """
+    try:
+        claim = await _claim_query(
+            query.query, models.ItineraryStatus.RUNNING, not bypass_cache, deadline
+        )
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    return StreamingResponse(
+        _stream_itinerary_events(claim, query.query, not bypass_cache, deadline),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# mypy: disable-error-code="misc"
+@router.post(
+    "/itinerary/async",
+    response_model=schemas.ItineraryQueryResponse,
+    status_code=202,
+    responses={
+        503: {"description": "Job queue is full"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def create_itinerary_async(
+    query: schemas.ItineraryQueryCreate,
+    response: Response,
+    x_request_timeout: Annotated[float | None, Header(gt=0)] = None,
+    bypass_cache: bool = False,
+) -> models.ItineraryQuery:
+    """Queue a new itinerary for background generation.
+
+    Returns immediately with the queued record; poll
+    ``GET /itinerary/{query_id}`` (optionally with ``wait``) for the result.
+    With ``X-Request-Timeout``, a job not done within that many seconds
+    (including time in the queue) is abandoned and marked ``timed_out``.
+    """
+    deadline = (
+        None if x_request_timeout is None else time.monotonic() + x_request_timeout
+    )
+    # Id of the inserted row, to fail if it cannot be queued
+    pending_id: UUID | None = None
+    try:
+        db_query = await _insert_query(query.query, models.ItineraryStatus.QUEUED)
+        pending_id = db_query.id
+        job_queue.submit(
+            ItineraryJob(
+                db_query.id, query.query, use_cache=not bypass_cache, deadline=deadline
+            )
+        )
+    except JobQueueFullError as e:
+        await _save_failure(db_query.id, str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        await _save_pending_failure(pending_id, str(e))
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    response.headers["Location"] = f"/itinerary/{db_query.id}"
+    _set_consistency_token(response)
+    return db_query
+
+
+def _batch_outcomes(
+    db_queries: list[models.ItineraryQuery], results: list[str | ItineraryServiceError]
+) -> tuple[list[schemas.ItineraryBatchItem], list[dict[str, Any]]]:
+    """Response items and row updates for the results of a batch."""
+    items: list[schemas.ItineraryBatchItem] = []
+    updates: list[dict[str, Any]] = []
+    for db_query, result in zip(db_queries, results):
+        if isinstance(result, ItineraryServiceError):
+            status, response, error = (
+                _failure_status(result),
+                None,
+                str(result),
+            )
+        else:
+            status, response, error = models.ItineraryStatus.DONE, result, None
+        updates.append(
+            {
+                "id": db_query.id,
+                **models.ItineraryQuery.response_values(response),
+                "status": status.value,
+                "error_message": error,
+            }
+        )
+        items.append(
+            schemas.ItineraryBatchItem(
+                id=db_query.id,
+                query=db_query.query,
+                status=status.value,
+                error_message=error,
+            )
+        )
+    return items, updates
+
+
+# mypy: disable-error-code="misc"
+@router.post(
+    "/itinerary/batch",
+    response_model=schemas.ItineraryBatchResponse,
+    responses={
+        413: {"description": "Too many queries in one batch"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def create_itinerary_batch(
+    batch: schemas.ItineraryBatchCreate,
+    request: Request,
+    http_response: Response,
+    x_request_timeout: Annotated[float | None, Header(gt=0)] = None,
+    bypass_cache: bool = False,
+) -> schemas.ItineraryBatchResponse:
+    """Create itineraries for a group of queries in one request.
+
+    Rows are inserted with one bulk statement, generations fan out with at
+    most ``BATCH_CONCURRENCY`` provider calls in flight (identical queries are
+    generated once), and all results are stored with one bulk update.
+    Individual failures are reported per item; items not done within
+    ``X-Request-Timeout`` seconds are ``timed_out``. If the client
+    disconnects, the whole batch is abandoned and marked ``cancelled``.
+    """
+    deadline = (
+        None if x_request_timeout is None else time.monotonic() + x_request_timeout
+    )
+    if len(batch.queries) > settings.batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {settings.batch_max_size} queries",
+        )
+
+    queries = [item.query for item in batch.queries]
+    db_queries: list[models.ItineraryQuery] = []
+    try:
+        async with sessionmanager.session(mode="write") as db:
+            db_queries = await models.ItineraryQuery.insert_many(
+                db,
+                [
+                    {
+                        "query": q,
+                        "status": models.ItineraryStatus.RUNNING.value,
+                        **shared_results.fingerprint_values(q),
+                    }
+                    for q in queries
+                ],
+            )
+
+        try:
+            results = await cancel_on_disconnect(
+                request.receive,
+                itinerary_service.generate_batch(
+                    queries,
+                    settings.batch_concurrency,
+                    use_cache=not bypass_cache,
+                    deadline=deadline,
+                ),
+            )
+        except ClientDisconnectedError as e:
+            async with sessionmanager.session(mode="write") as db:
+                await models.ItineraryQuery.update_many(
+                    db,
+                    [
+                        {
+                            "id": db_query.id,
+                            "status": models.ItineraryStatus.CANCELLED.value,
+                            "error_message": str(e),
+                        }
+                        for db_query in db_queries
+                    ],
+                )
+            raise HTTPException(status_code=499, detail="Client closed request")
+
+        items, updates = _batch_outcomes(db_queries, results)
+        async with sessionmanager.session(mode="write") as db:
+            await models.ItineraryQuery.update_many(db, updates)
+        for db_query in db_queries:
+            completed_itineraries.invalidate(db_query.id)
+    except HTTPException:
+        raise
+    except asyncio.CancelledError:
+        _detach(_fail_pending([q.id for q in db_queries], "Request cancelled"))
+        raise
+    except Exception as e:
+        await _fail_pending([q.id for q in db_queries], str(e))
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    _set_consistency_token(http_response)
+    failed = sum(1 for item in items if item.error_message is not None)
+    return schemas.ItineraryBatchResponse(
+        items=items, succeeded=len(items) - failed, failed=failed
+    )
+
+
+# mypy: disable-error-code="misc"
+# Unset fields are left out, so items without their response (not
+# requested) differ from ones with a null response (not generated yet)
+@router.get(
+    "/itinerary/",
+    response_model=schemas.ItineraryQueryPage,
+    response_model_exclude_unset=True,
+)
+async def list_itineraries(
+    db: ReadDBSession,
+    after: UUID | None = None,
+    limit: Annotated[int, Query(ge=1, le=settings.list_page_max_size)] = 20,
+    include_response: bool = False,
+) -> schemas.ItineraryQueryPage:
+    """List itineraries in creation order, one keyset page at a time.
+
+    Pass the returned ``next_after`` as ``after`` to fetch the next page.
+    The ``itinerary_response`` field is left out unless ``include_response``
+    is set.
+    """
+    rows = await models.ItineraryQuery.get_page(
+        db, limit, after=after, include_response=include_response
+    )
+    items = [schemas.ItineraryQuerySummary.model_validate(row) for row in rows]
+    next_after = items[-1].id if len(items) == limit else None
+    return schemas.ItineraryQueryPage(items=items, next_after=next_after)
+
+
+async def _export_ndjson(
+    after: UUID | None, include_response: bool
+) -> AsyncIterator[str]:
+    """Yield every itinerary after ``after`` as one JSON document per line."""
+    async with sessionmanager.session(mode="read") as db:
+        async for row in models.ItineraryQuery.stream_rows(
+            db,
+            settings.export_batch_size,
+            after=after,
+            include_response=include_response,
+        ):
+            item = schemas.ItineraryQuerySummary.model_validate(row)
+            yield item.model_dump_json(exclude_unset=True) + "\n"
+
+
+# mypy: disable-error-code="misc"
+@router.get(
+    "/itinerary/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_itineraries(
+    after: UUID | None = None, include_response: bool = True
+) -> StreamingResponse:
+    """Export itineraries as NDJSON, streamed from a server-side cursor.
+
+    Memory use stays constant regardless of table size.
+    """
+    return StreamingResponse(
+        _export_ndjson(after, include_response),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _load_itinerary(
+    db: AsyncSession, query_id: UUID, wait: float
+) -> Dict[str, Any]:
+    """Load the API fields of an itinerary as a dict.
+
+    While it is pending, it is long-polled for up to ``wait`` seconds.
+    """
+    fields = await models.ItineraryQuery.get_fields(db, query_id)
+    if fields is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+
+    deadline = time.monotonic() + wait
+    while (
+        fields["status"] in models.PENDING_STATUSES
+        and (remaining := deadline - time.monotonic()) > 0
+    ):
+        # Release the pooled connection while waiting
+        await db.rollback()
+        if await job_queue.wait(query_id, remaining):
+            # Finished on this process: the primary has it, replicas may not
+            async with sessionmanager.session(mode="read", replica=False) as primary:
+                refreshed = await models.ItineraryQuery.get_fields(primary, query_id)
+        else:
+            await asyncio.sleep(min(settings.job_poll_interval_seconds, remaining))
+            refreshed = await models.ItineraryQuery.get_fields(db, query_id)
+        if refreshed is None:
+            raise HTTPException(status_code=404, detail="Itinerary not found")
+        fields = refreshed
+    return fields
+
 
 # mypy: disable-error-code="misc"
 @router.get(
     "/itinerary/{query_id}",
     response_model=schemas.ItineraryQueryResponse,
     responses={
+        304: {"description": "Not modified"},
         404: {"description": "Itinerary not found"},
     },
 )
-async def get_itinerary(query_id: str, db: ReadDBSession) -> models.ItineraryQuery:
-    """Get an existing itinerary by ID."""
-    db_query = await models.ItineraryQuery.get(db, query_id)
-    if db_query is None:
-        raise HTTPException(status_code=404, detail="Itinerary not found")
-    return db_query
+async def get_itinerary(
+    query_id: UUID,
+    request: Request,
+    wait: Annotated[float, Query(ge=0, le=settings.job_max_wait_seconds)] = 0,
+    x_consistency_token: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get an existing itinerary by ID.
+
+    With ``wait`` > 0, a pending itinerary is long-polled for up to that many
+    seconds before the current state is returned.
+
+    Completed itineraries are served from an in-process cache and carry
+    ETag/Last-Modified validators and a public ``Cache-Control``, so repeat
+    reads can be answered with ``304 Not Modified`` or by a CDN.
+
+    This is the hottest read, so it skips the ORM and the response model:
+    the row is read with a Core statement and encoded straight to JSON. A
+    read session is only opened on a cache miss.
+    """
+    itinerary = completed_itineraries.get(query_id)
+    done = itinerary is not None
+    if itinerary is None:
+        async with sessionmanager.session(
+            mode="read", read_after=x_consistency_token
+        ) as db:
+            fields = await _load_itinerary(db, query_id, wait)
+        itinerary = EncodedItinerary(fast_json.dumps(fields), fields["updated_at"])
+        done = fields["status"] == models.ItineraryStatus.DONE.value
+        if done:
+            completed_itineraries.set(query_id, itinerary)
+
+    etag = make_etag(itinerary.updated_at)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(itinerary.updated_at),
+        "Cache-Control": (
+            f"public, max-age={settings.itinerary_http_max_age}" if done else "no-cache"
+        ),
+    }
+    if is_not_modified(request.headers, etag, itinerary.updated_at):
+        return Response(status_code=304, headers=headers)
+    return Response(itinerary.body, media_type="application/json", headers=headers)
+
+
+@router.get("/health/llm")
+async def llm_health() -> Dict[str, Any]:
+    """Report LLM provider state: concurrency limits, circuits and latency."""
+    return itinerary_service.provider.status()
+
+
+@router.get("/health/db")
+async def db_health() -> Dict[str, Any]:
+    """Report database pools and read replica health and lag."""
+    return {
+        "pools": {mode: sessionmanager.pool_status(mode) for mode in ("write", "read")},
+        "replicas": sessionmanager.replicas.status(),
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose metrics in the Prometheus text format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+def _require_diagnostics() -> None:
+    if not settings.diagnostics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/debug/loop", include_in_schema=False)
+async def loop_diagnostics() -> Dict[str, Any]:
+    """Report event-loop lag and the stacks of recent loop stalls."""
+    _require_diagnostics()
+    return {
+        "lag_seconds": loop_monitor.last_lag,
+        "max_lag_seconds": loop_monitor.max_lag,
+        "stalls": [asdict(stall) for stall in loop_monitor.stalls],
+    }
+
+
+@router.get("/debug/profile", include_in_schema=False)
+async def profile(
+    seconds: Annotated[float, Query(gt=0, le=settings.profile_max_seconds)] = 5,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5,
+    all_threads: bool = False,
+    download: bool = False,
+) -> Response:
+    """Sample stacks for ``seconds`` and return them as collapsed stacks.
+
+    Only the event loop thread is sampled unless ``all_threads`` is set. The
+    output can be fed to flamegraph.pl or loaded into speedscope; with
+    ``download`` it is sent as a ``.folded`` attachment.
+    """
+    _require_diagnostics()
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        threads = None if all_threads else [threading.get_ident()]
+        stacks = await asyncio.to_thread(
+            sample_stacks, seconds, interval_ms / 1000, threads
+        )
+
+    headers = {}
+    if download:
+        filename = f"profile-{int(time.time())}.folded"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return PlainTextResponse(render_collapsed(stacks), headers=headers)
 
 
 # Create FastAPI app with router
@@ -100,6 +848,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_TOKEN_HEADER],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
@@ -0,0 +1,136 @@
+"""Application metrics and the HTTP instrumentation middleware."""
+
+import time
+from typing import Any, Awaitable, Callable, MutableMapping
+
+from .utils.metrics import registry
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# HTTP
+http_requests = registry.counter(
+    "http_requests", "HTTP requests handled", ["method", "route", "status"]
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the response body is sent",
+    ["method", "route"],
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+)
+
+# LLM
+llm_requests = registry.counter(
+    "llm_requests", "LLM calls by outcome", ["provider", "model", "outcome"]
+)
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency",
+    ["provider", "model", "outcome"],
+)
+llm_tokens = registry.counter(
+    "llm_tokens", "Estimated LLM tokens used", ["provider", "model", "kind"]
+)
+llm_requests_in_flight = registry.gauge(
+    "llm_requests_in_flight", "LLM calls in flight", ["provider", "model"]
+)
+llm_cache_requests = registry.counter(
+    "llm_cache_requests",
+    "Itinerary response cache lookups",
+    ["provider", "model", "result"],
+)
+itinerary_shared_results = registry.counter(
+    "itinerary_shared_results",
+    "Itinerary requests by how they were answered across nodes",
+    ["outcome"],
+)
+
+# Database
+db_checkout_wait = registry.histogram(
+    "db_checkout_wait_seconds",
+    "Time a session waited for a pooled connection",
+    ["pool"],
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time", ["pool"]
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Pooled database connections by state",
+    ["pool", "state"],
+)
+db_write_buffer_batch_size = registry.histogram(
+    "db_write_buffer_batch_size",
+    "Rows written per flush of the write-behind buffer",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+db_write_buffer_failures = registry.counter(
+    "db_write_buffer_failures", "Buffered row writes that could not be committed"
+)
+
+db_replica_healthy = registry.gauge(
+    "db_replica_healthy", "Whether a read replica is in rotation", ["replica"]
+)
+db_replica_lag_seconds = registry.gauge(
+    "db_replica_lag_seconds", "Replay lag of a read replica", ["replica"]
+)
+db_read_routes = registry.counter(
+    "db_read_routes", "Read sessions by target replica or primary", ["target"]
+)
+
+# Event loop (diagnostics mode, see app.utils.loop_monitor)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay before a scheduled callback ran on the event loop",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+event_loop_stalls = registry.counter(
+    "event_loop_stalls", "Times the event loop was blocked past the threshold"
+)
+
+# Instrumented functions (see app.utils.timing)
+function_duration = registry.histogram(
+    "function_duration_seconds", "Duration of timed functions", ["name"]
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route HTTP latency and status counts.
+
+    Requests are labelled by route template (e.g. ``/itinerary/{query_id}``)
+    rather than raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration.labels(method=method, route=path).observe(elapsed)
+            http_requests.labels(method=method, route=path, status=str(status)).inc()
@@ -1,14 +1,128 @@
 """SQLAlchemy models for the application."""
 
-from typing import Any
+import enum
+import functools
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Sequence
 
 import uuid6
-from sqlalchemy import DateTime, String, func, select
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Dialect,
+    Index,
+    LargeBinary,
+    Row,
+    Select,
+    String,
+    TypeDecorator,
+    bindparam,
+    func,
+    insert,
+    literal,
+    select,
+    type_coerce,
+    update,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import mapped_column
+from sqlalchemy.sql.functions import FunctionElement
 
+from .config import settings
 from .database import Base
+from .utils.compression import CODEC_RAW, TextCodec, load_codec
+
+# Largest expected gap between the timestamp in a row's uuid7 id (taken by
+# the app) and its created_at (taken by the database)
+ID_CLOCK_SKEW = timedelta(hours=1)
+
+
+def id_created_range(id: Any) -> tuple[datetime, datetime] | None:
+    """Range that created_at of the row with a uuid7 id falls in, if known."""
+    if not isinstance(id, uuid.UUID) or id.version != 7:
+        return None
+    created = datetime.fromtimestamp((id.int >> 80) / 1000, timezone.utc)
+    return created - ID_CLOCK_SKEW, created + ID_CLOCK_SKEW
+
+
+def ids_created_range(ids: Sequence[Any]) -> tuple[datetime, datetime] | None:
+    """Range holding created_at of all rows with uuid7 ids, if known."""
+    ranges = [id_created_range(id) for id in ids]
+    if not ranges or None in ranges:
+        return None
+    lower = min(r[0] for r in ranges if r is not None)
+    upper = max(r[1] for r in ranges if r is not None)
+    return lower, upper
+
+
+@functools.lru_cache(maxsize=1)
+def response_codec() -> TextCodec:
+    """Codec used for compressed itinerary responses, built on first use."""
+    codec = load_codec(
+        settings.response_compression,
+        level=settings.response_compression_level,
+        dictionary_path=settings.response_compression_dictionary,
+    )
+    for path in settings.response_compression_dictionaries:
+        codec.register_dictionary(Path(path).read_bytes())
+    return codec
+
+
+class CompressedText(TypeDecorator[str]):
+    """Text stored as bytea behind a one-byte codec header."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect: Dialect) -> bytes | None:
+        return None if value is None else response_codec().encode(value)
+
+    def process_result_value(self, value: Any | None, dialect: Dialect) -> str | None:
+        return None if value is None else response_codec().decode(bytes(value))
+
+
+class raw_framed(FunctionElement[bytes]):
+    """Plain text framed as a raw-codec ``CompressedText`` value in SQL."""
+
+    type = LargeBinary()
+    name = "raw_framed"
+    inherit_cache = True
+
+
+@compiles(raw_framed)  # type: ignore[misc]
+def _compile_raw_framed(element: raw_framed, compiler: Any, **kw: Any) -> str:
+    (text,) = element.clauses
+    framed = literal(bytes([CODEC_RAW]), LargeBinary).op("||")(
+        func.convert_to(text, "UTF8")
+    )
+    return str(compiler.process(framed, **kw))
+
+
+@compiles(raw_framed, "sqlite")  # type: ignore[misc]
+def _compile_raw_framed_sqlite(element: raw_framed, compiler: Any, **kw: Any) -> str:
+    (text,) = element.clauses
+    return f"CAST(char({CODEC_RAW}) || {compiler.process(text, **kw)} AS BLOB)"
+
+
+class ItineraryStatus(str, enum.Enum):
+    """Lifecycle of an itinerary generation."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    # Abandoned: the client disconnected, or the deadline passed
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+
+
+# Statuses of a generation that has not finished yet
+PENDING_STATUSES = (ItineraryStatus.QUEUED.value, ItineraryStatus.RUNNING.value)
 
 
 class ItineraryQuery(Base):
@@ -18,9 +132,29 @@ class ItineraryQuery(Base):
 
     id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid6.uuid7)
     query = mapped_column(String, nullable=False)
-    itinerary_response = mapped_column(String, nullable=True)
+    # The response lives in exactly one of these, see ``itinerary_response``
+    itinerary_response_text = mapped_column("itinerary_response", String, nullable=True)
+    itinerary_response_compressed = mapped_column(CompressedText, nullable=True)
+    status = mapped_column(
+        String(16),
+        nullable=False,
+        default=ItineraryStatus.QUEUED.value,
+        server_default=ItineraryStatus.QUEUED.value,
+    )
+    error_message = mapped_column(String, nullable=True)
+    # Hash of the normalized query and of the prompts and model answering it,
+    # so that any node can find earlier results for the same request
+    query_hash = mapped_column(String(64), nullable=True)
+    prompt_version = mapped_column(String(64), nullable=True)
+    # Part of the primary key because the table is partitioned on it; ids
+    # are still unique on their own. Set by the app, like the uuid7 id, so
+    # the ORM knows the key without reading it back
     created_at = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
     )
     updated_at = mapped_column(
         DateTime(timezone=True),
@@ -29,6 +163,68 @@ class ItineraryQuery(Base):
         nullable=False,
     )
 
+    # On Postgres the table is partitioned by created_at, see app.partitions
+    __table_args__ = (
+        Index("ix_itinerary_queries_created_at", "created_at"),
+        Index(
+            "ix_itinerary_queries_query_hash",
+            "query_hash",
+            "prompt_version",
+            "created_at",
+        ),
+    )
+
+    @hybrid_property
+    def itinerary_response(self) -> str | None:
+        """The generated itinerary, decoded from whichever column holds it.
+
+        New responses are compressed when ``RESPONSE_COMPRESSION`` is set;
+        rows written earlier keep their plain text until backfilled.
+        """
+        compressed: str | None = self.itinerary_response_compressed
+        text: str | None = self.itinerary_response_text
+        return compressed if compressed is not None else text
+
+    @itinerary_response.inplace.setter
+    def _itinerary_response_setter(self, value: str | None) -> None:
+        for key, column_value in self.response_values(value).items():
+            setattr(self, key, column_value)
+
+    @itinerary_response.inplace.expression
+    @classmethod
+    def _itinerary_response_expression(cls) -> ColumnElement[Any]:
+        if settings.response_compression == "none":
+            # Rows compressed earlier read as NULL here until decompressed
+            return cls.itinerary_response_text.label("itinerary_response")
+        # Plain text is re-framed as a raw-codec value so both columns decode
+        # through CompressedText in a single SQL expression
+        plain = raw_framed(cls.itinerary_response_text)
+        compressed = type_coerce(cls.itinerary_response_compressed, LargeBinary)
+        return type_coerce(func.coalesce(compressed, plain), CompressedText).label(
+            "itinerary_response"
+        )
+
+    @itinerary_response.inplace.update_expression
+    @classmethod
+    def _itinerary_response_update(cls, value: Any) -> list[tuple[Any, Any]]:
+        return [
+            (getattr(cls, key), column_value)
+            for key, column_value in cls.response_values(value).items()
+        ]
+
+    @classmethod
+    def response_values(cls, response: str | None) -> dict[str, Any]:
+        """Column values that store ``response`` in the configured format."""
+        if response is not None and settings.response_compression != "none":
+            return {
+                "itinerary_response_text": None,
+                "itinerary_response_compressed": response,
+            }
+        return {
+            "itinerary_response_text": response,
+            "itinerary_response_compressed": None,
+        }
+
     @classmethod
     async def create(cls, db: AsyncSession, **kwargs: Any) -> "ItineraryQuery":
         """Create a new itinerary query."""
@@ -39,22 +235,320 @@ class ItineraryQuery(Base):
         return query
 
     @classmethod
-    async def get(cls, db: AsyncSession, id: str) -> "ItineraryQuery | None":
+    async def insert(cls, db: AsyncSession, **kwargs: Any) -> "ItineraryQuery":
+        """Create a new itinerary query with a single INSERT ... RETURNING.
+
+        Unlike ``create`` this does not refresh after commit, so the pooled
+        connection is released as soon as the transaction ends.
+        """
+        result = await db.scalars(insert(cls).values(**kwargs).returning(cls))
+        query = result.one()
+        await db.commit()
+        return query
+
+    @classmethod
+    async def insert_many(
+        cls, db: AsyncSession, rows: list[dict[str, Any]]
+    ) -> list["ItineraryQuery"]:
+        """Create several itinerary queries with one bulk INSERT ... RETURNING.
+
+        The returned rows are in the same order as ``rows``.
+        """
+        stmt = insert(cls).returning(cls, sort_by_parameter_order=True)
+        result = await db.scalars(stmt, rows)
+        queries = list(result.all())
+        await db.commit()
+        return queries
+
+    @classmethod
+    async def update_many(cls, db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        """Update several rows by ID in one executemany UPDATE.
+
+        Every dict must contain ``id`` plus the same set of columns to update.
+        """
+        if not rows:
+            return
+        columns = cls.__mapper__.columns
+        keys = [key for key in rows[0] if key != "id"]
+        # A Core statement, since the ORM's bulk UPDATE also needs created_at
+        stmt = (
+            update(cls.__table__)
+            .where(columns["id"] == bindparam("b_id"))
+            .values({columns[key].name: bindparam(f"b_{key}") for key in keys})
+        )
+        # Rows with uuid7 ids also bind their created_at range, so that only
+        # the partitions that can hold them are searched
+        ranged: list[dict[str, Any]] = []
+        unranged: list[dict[str, Any]] = []
+        for row in rows:
+            params = {f"b_{key}": value for key, value in row.items()}
+            created = id_created_range(row["id"])
+            if created is None:
+                unranged.append(params)
+            else:
+                params["b_created_from"], params["b_created_to"] = created
+                ranged.append(params)
+        connection = await db.connection()
+        if ranged:
+            created_at = columns["created_at"]
+            await connection.execute(
+                stmt.where(
+                    created_at.between(
+                        bindparam("b_created_from"), bindparam("b_created_to")
+                    )
+                ),
+                ranged,
+            )
+        if unranged:
+            await connection.execute(stmt, unranged)
+        await db.commit()
+
+    @classmethod
+    async def fail_pending(
+        cls, db: AsyncSession, ids: Sequence[Any], error_message: str
+    ) -> int:
+        """Mark the rows among ids still queued or running as failed.
+
+        Returns the number of rows updated.
+        """
+        if not ids:
+            return 0
+        result = await db.execute(
+            update(cls)
+            .where(*cls._match_ids(ids), cls.status.in_(PENDING_STATUSES))
+            .values(status=ItineraryStatus.FAILED.value, error_message=error_message)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return int(result.rowcount)
+
+    @classmethod
+    async def update_by_id(
+        cls, db: AsyncSession, id: Any, **values: Any
+    ) -> "ItineraryQuery | None":
+        """Update columns of one row with a single UPDATE ... RETURNING."""
+        stmt = update(cls).where(*cls._match_id(id)).values(**values).returning(cls)
+        # Refresh any copy of the row already held by this session
+        result = await db.scalars(
+            select(cls).from_statement(stmt).execution_options(populate_existing=True)
+        )
+        query = result.one_or_none()
+        await db.commit()
+        return query
+
+    @classmethod
+    async def set_response(
+        cls,
+        db: AsyncSession,
+        id: Any,
+        response: str,
+        status: ItineraryStatus = ItineraryStatus.DONE,
+    ) -> "ItineraryQuery | None":
+        """Store the itinerary response of a row by ID."""
+        return await cls.update_by_id(
+            db, id, itinerary_response=response, status=status.value
+        )
+
+    @classmethod
+    async def set_status(
+        cls,
+        db: AsyncSession,
+        id: Any,
+        status: ItineraryStatus,
+        error_message: str | None = None,
+    ) -> "ItineraryQuery | None":
+        """Update the generation status of a row by ID."""
+        return await cls.update_by_id(
+            db, id, status=status.value, error_message=error_message
+        )
+
+    @classmethod
+    async def get(cls, db: AsyncSession, id: Any) -> "ItineraryQuery | None":
         """Get an itinerary query by ID."""
-        return await db.get(cls, id)
+        result = await db.scalars(select(cls).where(*cls._match_id(id)))
+        return result.one_or_none()
+
+    @classmethod
+    async def get_fields(cls, db: AsyncSession, id: Any) -> dict[str, Any] | None:
+        """Get the API fields of an itinerary by ID as a plain dict.
+
+        Runs a prebuilt Core statement on the session's connection, so no
+        ORM instance or identity map entry is created.
+        """
+        created = id_created_range(id)
+        params = {"id": id}
+        if created is not None:
+            params.update(created_from=created[0], created_to=created[1])
+        connection = await db.connection()
+        result = await connection.execute(_fields_by_id(created is not None), params)
+        row = result.first()
+        return None if row is None else row._asdict()
+
+    @classmethod
+    def _match_id(cls, id: Any) -> list[ColumnElement[bool]]:
+        """Conditions selecting a row by id.
+
+        For uuid7 ids these include the range created_at must be in, so that
+        only the partitions that can hold the row are searched.
+        """
+        conditions = [cls.id == id]
+        created = id_created_range(id)
+        if created is not None:
+            conditions.append(cls.created_at.between(*created))
+        return conditions
+
+    @classmethod
+    def _match_ids(cls, ids: Sequence[Any]) -> list[ColumnElement[bool]]:
+        """Conditions selecting rows by ids.
+
+        As in ``_match_id``, uuid7 ids add a created_at range that limits the
+        partitions searched.
+        """
+        conditions: list[ColumnElement[bool]] = [cls.id.in_(ids)]
+        created = ids_created_range(ids)
+        if created is not None:
+            conditions.append(cls.created_at.between(*created))
+        return conditions
+
+    @classmethod
+    async def find_by_hash(
+        cls,
+        db: AsyncSession,
+        query_hash: str,
+        prompt_version: str,
+        status: ItineraryStatus,
+        max_age: float,
+        exclude: Any | None = None,
+        newest: bool = True,
+    ) -> Row[Any] | None:
+        """Find a row for the same request created within max_age seconds.
+
+        Returns the id and response of the newest (or oldest) such row in
+        ``status``, skipping the row with id ``exclude``.
+        """
+        since = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        stmt = (
+            select(cls.id, cls.itinerary_response)
+            .where(
+                cls.query_hash == query_hash,
+                cls.prompt_version == prompt_version,
+                cls.created_at >= since,
+                cls.status == status.value,
+            )
+            .order_by(cls.created_at.desc() if newest else cls.created_at)
+            .limit(1)
+        )
+        if exclude is not None:
+            stmt = stmt.where(cls.id != exclude)
+        result = await db.execute(stmt)
+        return result.first()
 
     @classmethod
     async def get_all(cls, db: AsyncSession) -> list["ItineraryQuery"]:
-        """Get all itinerary queries."""
+        """Get all itinerary queries.
+
+        Loads every row into memory; prefer ``get_page`` or ``stream_rows``.
+        """
         result = await db.execute(select(cls))
         return list(result.scalars().all())
 
+    @classmethod
+    def _select_columns(
+        cls, include_response: bool, after: Any | None = None
+    ) -> Select[Any]:
+        """Select rows in id (creation) order, optionally without the body."""
+        columns: list[Any] = [
+            cls.id,
+            cls.query,
+            cls.status,
+            cls.error_message,
+            cls.created_at,
+            cls.updated_at,
+        ]
+        if include_response:
+            columns.append(cls.itinerary_response)
+        stmt = select(*columns).order_by(cls.id)
+        if after is not None:
+            stmt = stmt.where(cls.id > after)
+            created = id_created_range(after)
+            if created is not None:
+                # Skips partitions older than the page
+                stmt = stmt.where(cls.created_at >= created[0])
+        return stmt
+
+    @classmethod
+    async def get_page(
+        cls,
+        db: AsyncSession,
+        limit: int,
+        after: Any | None = None,
+        include_response: bool = False,
+    ) -> Sequence[Row[Any]]:
+        """Get up to ``limit`` rows whose id sorts after ``after``.
+
+        Ids are time-ordered uuid7 values, so this is a keyset page in
+        creation order that stays cheap however deep the client pages.
+        """
+        stmt = cls._select_columns(include_response, after).limit(limit)
+        result = await db.execute(stmt)
+        return result.all()
+
+    @classmethod
+    async def stream_rows(
+        cls,
+        db: AsyncSession,
+        batch_size: int,
+        after: Any | None = None,
+        include_response: bool = False,
+    ) -> AsyncIterator[Row[Any]]:
+        """Stream rows in id order from a server-side cursor.
+
+        At most ``batch_size`` rows are buffered at a time.
+        """
+        stmt = cls._select_columns(include_response, after).execution_options(
+            yield_per=batch_size
+        )
+        result = await db.stream(stmt)
+        async for row in result:
+            yield row
+
     async def update_response(
-        self, db: AsyncSession, response: str
+        self,
+        db: AsyncSession,
+        response: str,
+        status: ItineraryStatus = ItineraryStatus.DONE,
     ) -> "ItineraryQuery":
         """Update the itinerary response."""
         # Use direct attribute access with mapped_column
         self.itinerary_response = response
+        self.status = status.value
         await db.commit()
         await db.refresh(self)
         return self
+
+    @property
+    def is_pending(self) -> bool:
+        """Whether generation has not finished yet."""
+        return self.status in PENDING_STATUSES
+
+
+@functools.lru_cache(maxsize=None)
+def _fields_by_id(ranged: bool) -> Select[Any]:
+    """Statement selecting the API fields of one row, built once."""
+    table = ItineraryQuery.__table__
+    stmt = select(
+        table.c.query,
+        table.c.id,
+        ItineraryQuery.itinerary_response,
+        table.c.status,
+        table.c.error_message,
+        table.c.created_at,
+        table.c.updated_at,
+    ).where(table.c.id == bindparam("id"))
+    if ranged:
+        stmt = stmt.where(
+            table.c.created_at.between(
+                bindparam("created_from"), bindparam("created_to")
+            )
+        )
+    return stmt
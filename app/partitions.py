@@ -0,0 +1,211 @@
+"""Monthly range partitions of the itinerary table.
+
+On Postgres, the ``partition_itinerary_queries`` migration turns
+``itinerary_queries`` into a table partitioned by ``created_at``:
+
+- one partition per calendar month (UTC), named ``itinerary_queries_pYYYYMM``;
+- ``itinerary_queries_legacy``, holding every row from before the migration.
+
+Partitions for the coming months are created ahead of time, and old ones
+are detached and archived by ``scripts.partitions``. Ids are uuid7 values
+whose embedded timestamp tracks ``created_at``, so a lookup by id can be
+narrowed to the partition the row lives in.
+
+Nothing here applies to an unpartitioned table, such as one created by
+``create_all`` or on SQLite.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import AsyncContextManager, Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+TABLE = "itinerary_queries"
+ConnectFactory = Callable[[], AsyncContextManager[AsyncConnection]]
+# Serializes partition changes made by different nodes
+MAINTENANCE_LOCK_KEY = 0x1717_0000_0001
+
+PARTITIONS_QUERY = text(
+    "SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound,"
+    " i.inhdetachpending AS detach_pending"
+    " FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+    " WHERE i.inhparent = to_regclass(:table)"
+)
+IS_PARTITIONED_QUERY = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+    " WHERE partrelid = to_regclass(:table))"
+)
+# Tables of partitions that were detached but not yet archived
+DETACHED_QUERY = text(
+    "SELECT c.relname FROM pg_class c"
+    " JOIN pg_namespace n ON n.oid = c.relnamespace"
+    " WHERE n.nspname = current_schema() AND c.relkind = 'r'"
+    " AND NOT c.relispartition AND c.relname ~ :pattern"
+)
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+class PartitionError(Exception):
+    """Raised when partitions cannot be listed or changed."""
+
+    pass
+
+
+@dataclass
+class Partition:
+    """A partition and its ``[lower, upper)`` range of ``created_at``.
+
+    A None bound is unbounded (``MINVALUE`` or ``MAXVALUE``).
+    """
+
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    detach_pending: bool = False
+
+
+def month_start(moment: datetime) -> date:
+    """First day of the (UTC) month containing moment."""
+    moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """The first day of the month ``months`` after day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    """Name of the partition for the month starting on start."""
+    return f"{TABLE}_p{start:%Y%m}"
+
+
+def _bound_literal(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'")).astimezone(timezone.utc)
+
+
+def parse_partition_bound(bound: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Range of a bound such as ``FOR VALUES FROM ('...') TO ('...')``.
+
+    Raises:
+        PartitionError: If bound is not a range bound.
+    """
+    match = _BOUND.search(bound)
+    if match is None:
+        raise PartitionError(f"Not a range partition bound: {bound}")
+    return _parse_bound(match.group(1)), _parse_bound(match.group(2))
+
+
+async def is_partitioned(connection: AsyncConnection) -> bool:
+    """Whether the itinerary table is partitioned (always False off Postgres)."""
+    if connection.dialect.name != "postgresql":
+        return False
+    result = await connection.execute(IS_PARTITIONED_QUERY, {"table": TABLE})
+    return bool(result.scalar())
+
+
+async def list_partitions(connection: AsyncConnection) -> List[Partition]:
+    """Partitions of the itinerary table, oldest first."""
+    result = await connection.execute(PARTITIONS_QUERY, {"table": TABLE})
+    partitions = []
+    for row in result:
+        lower, upper = parse_partition_bound(row.bound)
+        partitions.append(Partition(row.name, lower, upper, row.detach_pending))
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(partitions, key=lambda p: p.lower or oldest)
+
+
+async def detached_tables(connection: AsyncConnection) -> List[str]:
+    """Detached partitions that are still waiting to be archived."""
+    result = await connection.execute(
+        DETACHED_QUERY, {"pattern": f"^{TABLE}_(p[0-9]{{6}}|legacy)$"}
+    )
+    return sorted(result.scalars())
+
+
+async def create_partitions(
+    connection: AsyncConnection, months_ahead: int, now: Optional[datetime] = None
+) -> List[str]:
+    """Create monthly partitions through ``months_ahead`` months from now.
+
+    Starts after the newest existing partition, so gaps are never filled
+    in behind it. Returns the names of the partitions created.
+    """
+    if not await is_partitioned(connection):
+        return []
+    await connection.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+    )
+    # Creating a partition briefly locks the parent; do not queue behind
+    # long-running queries while blocking everyone else
+    await connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+    current = month_start(now or datetime.now(timezone.utc))
+    uppers = [p.upper for p in await list_partitions(connection)]
+    if None in uppers:
+        # A MAXVALUE partition already covers the future
+        return []
+    start = max([month_start(upper) for upper in uppers if upper] + [current])
+    created = []
+    while start <= add_months(current, months_ahead):
+        end = add_months(start, 1)
+        name = partition_name(start)
+        await connection.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF {TABLE}"
+                f" FOR VALUES FROM ({_bound_literal(start)})"
+                f" TO ({_bound_literal(end)})"
+            )
+        )
+        created.append(name)
+        start = end
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    return created
+
+
+class PartitionMaintainer:
+    """Keeps partitions for the coming months in place while the app runs."""
+
+    def __init__(self, connect: ConnectFactory, months_ahead: int) -> None:
+        self.connect = connect
+        self.months_ahead = months_ahead
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def run_once(self) -> List[str]:
+        """Create any missing future partitions now."""
+        async with self.connect() as connection:
+            return await create_partitions(connection, self.months_ahead)
+
+    def start(self, interval: float) -> None:
+        """Check now and then every interval seconds."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the periodic checks."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Could not create partitions: %s", e)
+            await asyncio.sleep(interval)
@@ -0,0 +1,209 @@
+"""Read replica selection, health checks and read-your-writes tokens.
+
+Reads are spread over healthy replicas and fall back to the primary. A
+write can hand the client a consistency token, the primary's WAL position
+(LSN) after the write; a read carrying it is only sent to a replica that
+has replayed at least that far, so clients always see their own writes.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from .metrics import db_read_routes, db_replica_healthy, db_replica_lag_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaLagError(Exception):
+    """A replica is too far behind the primary to serve reads."""
+
+    pass
+
+
+# Replayed WAL position and replay lag. On a primary (e.g. a replica URL
+# pointing at it in development) the current position and no lag.
+REPLICA_STATE_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()"
+    " ELSE pg_current_wal_lsn() END::text AS lsn,"
+    " CASE WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),"
+    " 0) END AS lag"
+)
+PRIMARY_LSN_QUERY = text("SELECT pg_current_wal_lsn()::text")
+# Consistency token of a write whose position is unknown: reads carrying it
+# are served by the primary
+PRIMARY_TOKEN = "primary"
+
+
+def parse_lsn(lsn: str) -> int:
+    """Convert a Postgres LSN such as ``16/B374D848`` to an integer.
+
+    Raises:
+        ValueError: If lsn is not a valid LSN.
+    """
+    high, sep, low = lsn.partition("/")
+    if not sep:
+        raise ValueError(f"Invalid LSN: {lsn}")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def is_disconnect(error: BaseException) -> bool:
+    """Whether error means the database could not be reached."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError))
+
+
+@dataclass
+class Replica:
+    """A read replica and its state as of the last health check."""
+
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+    healthy: bool = False
+    replayed_lsn: int = 0
+    lag_seconds: Optional[float] = None
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def status(self) -> Dict[str, Any]:
+        """State reported by the database health endpoint."""
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "checked_seconds_ago": (
+                None
+                if self.checked_at is None
+                else round(time.monotonic() - self.checked_at, 3)
+            ),
+            "error": self.error,
+        }
+
+
+class ReplicaSet:
+    """Chooses replicas for reads and keeps their health up to date.
+
+    Replicas start out of rotation until their first successful check, and
+    leave it when a check fails, when they lag more than ``max_lag``
+    seconds, or when a session on them loses its connection.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        max_lag: float = 30.0,
+        check_timeout: float = 5.0,
+        refresh_timeout: float = 0.5,
+    ) -> None:
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self.refresh_timeout = refresh_timeout
+        self._turn = itertools.count()
+        self._task: Optional["asyncio.Task[None]"] = None
+        for replica in self.replicas:
+            db_replica_healthy.labels(replica=replica.name).set(0)
+
+    async def choose(self, min_lsn: Optional[int] = None) -> Optional[Replica]:
+        """Pick a healthy replica that has replayed min_lsn, if any.
+
+        The replica with the fewest connections in use wins; ties rotate.
+        Replayed positions are only as fresh as the last check, so if none
+        has reached min_lsn, the best candidate is re-checked once.
+        """
+        replica = self._pick(min_lsn)
+        if replica is None and min_lsn is not None:
+            candidate = self._pick(None)
+            if candidate is not None:
+                await self.check(candidate, self.refresh_timeout)
+                if candidate.healthy and candidate.replayed_lsn >= min_lsn:
+                    replica = candidate
+        db_read_routes.labels(target=replica.name if replica else "primary").inc()
+        return replica
+
+    def _pick(self, min_lsn: Optional[int]) -> Optional[Replica]:
+        eligible = [
+            replica
+            for replica in self.replicas
+            if replica.healthy and (min_lsn is None or replica.replayed_lsn >= min_lsn)
+        ]
+        if not eligible:
+            return None
+        start = next(self._turn) % len(eligible)
+        rotated = eligible[start:] + eligible[:start]
+        return min(rotated, key=lambda r: _checked_out(r.engine))
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        """Take a replica out of rotation until its next good check."""
+        if replica.healthy:
+            logger.warning("Read replica %s is down: %s", replica.name, error)
+        replica.healthy = False
+        replica.error = str(error)
+        db_replica_healthy.labels(replica=replica.name).set(0)
+
+    async def check(self, replica: Replica, timeout: Optional[float] = None) -> None:
+        """Refresh one replica's replayed position, lag and health."""
+        try:
+            async with asyncio.timeout(timeout or self.check_timeout):
+                async with replica.engine.connect() as connection:
+                    row = (await connection.execute(REPLICA_STATE_QUERY)).one()
+            replica.replayed_lsn = parse_lsn(row.lsn)
+            replica.lag_seconds = float(row.lag)
+            replica.checked_at = time.monotonic()
+        except Exception as e:
+            replica.checked_at = time.monotonic()
+            self.mark_down(replica, e)
+            return
+
+        db_replica_lag_seconds.labels(replica=replica.name).set(replica.lag_seconds)
+        if replica.lag_seconds > self.max_lag:
+            self.mark_down(
+                replica, ReplicaLagError(f"{replica.lag_seconds:.1f}s behind")
+            )
+            return
+        if not replica.healthy:
+            logger.info("Read replica %s is up", replica.name)
+        replica.healthy = True
+        replica.error = None
+        db_replica_healthy.labels(replica=replica.name).set(1)
+
+    async def check_all(self) -> None:
+        """Check every replica concurrently."""
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    def start(self, interval: float) -> None:
+        """Check replicas now and then every interval seconds."""
+        if self._task is None and self.replicas:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """State of every replica."""
+        return [replica.status() for replica in self.replicas]
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return int(checkedout()) if checkedout is not None else 0
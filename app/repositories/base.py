@@ -1,6 +1,6 @@
-from typing import Generic, TypeVar, Type, Optional, List, Any
+from typing import AsyncIterator, Generic, TypeVar, Type, Optional, List, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from pydantic import BaseModel
 from ..database import Base
 
@@ -25,6 +25,27 @@ class BaseRepository(Generic[ModelType, CreateSchemaType]):
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_page(
+        self, limit: int, after: Optional[Any] = None
+    ) -> List[ModelType]:
+        """Get up to limit records with id greater than after, in id order"""
+        stmt = select(self.model).order_by(self.model.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def stream_all(self, batch_size: int = 1000) -> AsyncIterator[ModelType]:
+        """Stream all records in id order from a server-side cursor"""
+        stmt = (
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream_scalars(stmt)
+        async for db_obj in result:
+            yield db_obj
+
     async def create(self, obj: CreateSchemaType) -> ModelType:
         """Create a new record"""
         db_obj = self.model(**obj.model_dump())
@@ -33,6 +54,33 @@ class BaseRepository(Generic[ModelType, CreateSchemaType]):
         await self.db.refresh(db_obj)
         return db_obj
 
+    async def create_returning(self, obj: CreateSchemaType) -> ModelType:
+        """Create a new record with INSERT ... RETURNING, without a refresh"""
+        stmt = insert(self.model).values(**obj.model_dump()).returning(self.model)
+        result = await self.db.scalars(stmt)
+        db_obj: ModelType = result.one()
+        await self.db.commit()
+        return db_obj
+
+    async def update_by_id(
+        self, id: Any, update_data: dict[str, Any]
+    ) -> Optional[ModelType]:
+        """Update a record by id with UPDATE ... RETURNING, without a refresh"""
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**update_data)
+            .returning(self.model)
+        )
+        result = await self.db.scalars(
+            select(self.model)
+            .from_statement(stmt)
+            .execution_options(populate_existing=True)
+        )
+        db_obj: Optional[ModelType] = result.one_or_none()
+        await self.db.commit()
+        return db_obj
+
     async def update(self, db_obj: ModelType, update_data: dict) -> ModelType:
         """Update a record"""
         for field, value in update_data.items():
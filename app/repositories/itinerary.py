@@ -1,5 +1,6 @@
+from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..models import ItineraryQuery
+from ..models import ItineraryQuery, ItineraryStatus
 from ..schemas import ItineraryQueryCreate
 from .base import BaseRepository
 
@@ -14,4 +15,22 @@ class ItineraryRepository(
         self, db_obj: ItineraryQuery, response: str
     ) -> ItineraryQuery:
         """Update itinerary response"""
-        return await self.update(db_obj, {"itinerary_response": response})
+        return await self.update(
+            db_obj,
+            {
+                "itinerary_response": response,
+                "status": ItineraryStatus.DONE.value,
+            },
+        )
+
+    async def set_itinerary_response(
+        self, id: Any, response: str
+    ) -> Optional[ItineraryQuery]:
+        """Update itinerary response by id in a single round trip"""
+        return await self.update_by_id(
+            id,
+            {
+                "itinerary_response": response,
+                "status": ItineraryStatus.DONE.value,
+            },
+        )
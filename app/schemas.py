@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 
 class ItineraryQueryBase(BaseModel):
@@ -15,8 +15,43 @@ class ItineraryQueryCreate(ItineraryQueryBase):
 class ItineraryQueryResponse(ItineraryQueryBase):
     id: UUID
     itinerary_response: Optional[str] = None
+    status: str
+    error_message: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class ItineraryBatchCreate(BaseModel):
+    queries: List[ItineraryQueryCreate] = Field(min_length=1)
+
+
+class ItineraryBatchItem(ItineraryQueryBase):
+    id: UUID
+    status: str
+    error_message: Optional[str] = None
+
+
+class ItineraryBatchResponse(BaseModel):
+    items: List[ItineraryBatchItem]
+    succeeded: int
+    failed: int
+
+
+class ItineraryQuerySummary(ItineraryQueryBase):
+    id: UUID
+    status: str
+    error_message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    itinerary_response: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ItineraryQueryPage(BaseModel):
+    items: List[ItineraryQuerySummary]
+    next_after: Optional[UUID] = None
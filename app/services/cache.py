@@ -0,0 +1,121 @@
+"""In-process caching for generated itineraries."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from ..config import settings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    The cache is meant to be used from a single event loop; none of its
+    methods await, so no locking is required.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: K) -> bool:
+        """Drop a single entry. Returns True if it was present."""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the statistics."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of entries, including expired ones not yet evicted."""
+        return len(self._entries)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a free-text query so trivial variations share a cache entry."""
+    return " ".join(query.split()).casefold()
+
+
+def make_cache_key(*parts: str) -> str:
+    """Build a stable, fixed-length cache key from its components."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class EncodedItinerary:
+    """A completed itinerary as served by ``GET /itinerary/{id}``."""
+
+    # The JSON response body
+    body: bytes
+    updated_at: datetime
+
+
+# Completed itineraries by id. A row no longer changes once it is done, so
+# reads can skip the database; every writer invalidates the ids it updates.
+completed_itineraries: TTLCache[UUID, EncodedItinerary] = TTLCache(
+    max_size=settings.read_cache_max_size,
+    ttl_seconds=settings.read_cache_ttl_seconds,
+)
@@ -1,9 +1,37 @@
-from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import time
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from ..config import settings
-from .llm import LLMFactory
+from ..metrics import llm_cache_requests
+from ..utils.cancellation import remaining
+from ..utils.circuit_breaker import CircuitBreaker
+from ..utils.limiter import AdaptiveLimiter
+from ..utils.semantic_cache import SemanticCache, SemanticCacheError, numpy_available
+from ..utils.timing import timed_async
+from .cache import TTLCache, make_cache_key, normalize_query
+from .llm import (
+    CoalescingProvider,
+    GuardedProvider,
+    InstrumentedProvider,
+    LLMFactory,
+    LLMProvider,
+)
+from .planning import format_outline, parse_outline, stitch, trip_days
+from .scheduler import DeadlineExceededError, Priority, QuotaScheduler, estimate_tokens
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
 class ItineraryServiceError(Exception):
@@ -12,43 +40,430 @@ class ItineraryServiceError(Exception):
     pass
 
 
+def _wrap_provider(provider: LLMProvider) -> LLMProvider:
+    """Instrument provider and guard it with its own limiter and breaker."""
+    provider = InstrumentedProvider(provider)
+    if not settings.llm_guard_enabled:
+        return provider
+    return GuardedProvider(
+        provider,
+        AdaptiveLimiter(
+            initial_limit=settings.llm_initial_concurrency,
+            min_limit=settings.llm_min_concurrency,
+            max_limit=settings.llm_max_concurrency,
+            tolerance=settings.llm_latency_tolerance,
+            max_waiting=settings.llm_max_waiting,
+        ),
+        CircuitBreaker(
+            failure_rate_threshold=settings.llm_breaker_failure_rate,
+            window_size=settings.llm_breaker_window,
+            min_calls=settings.llm_breaker_min_calls,
+            reset_timeout=settings.llm_breaker_reset_seconds,
+            half_open_probes=settings.llm_breaker_half_open_probes,
+        ),
+    )
+
+
+async def _stream_before(
+    stream: AsyncIterator[str], deadline: float
+) -> AsyncIterator[str]:
+    """Relay stream, failing if it has not finished by deadline."""
+    try:
+        while True:
+            try:
+                async with asyncio.timeout(remaining(deadline)):
+                    chunk = await anext(stream)
+            except StopAsyncIteration:
+                return
+            except TimeoutError as e:
+                raise DeadlineExceededError("LLM stream did not finish in time") from e
+            yield chunk
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
 class ItineraryService:
     """Service for generating itineraries using LLM providers."""
 
     def __init__(self, provider_name: str = "gemini"):
         """Initialize the service with specified LLM provider."""
+        self.provider: LLMProvider
         try:
-            self.provider = LLMFactory.create_provider(provider_name)
+            if settings.llm_routes:
+                self.provider = LLMFactory.create_router(
+                    settings.llm_routes,
+                    wrap=_wrap_provider,
+                    hedge_percentile=settings.llm_hedge_percentile,
+                    max_hedges=settings.llm_max_hedges,
+                    default_hedge_delay=settings.llm_hedge_default_delay_seconds,
+                )
+            else:
+                self.provider = _wrap_provider(
+                    LLMFactory.create_provider(provider_name)
+                )
         except ValueError as e:
             raise ItineraryServiceError(f"Failed to create provider: {str(e)}")
+        if settings.llm_coalesce_requests:
+            self.provider = CoalescingProvider(self.provider)
+        self.cache: TTLCache[str, str] = TTLCache(
+            max_size=settings.itinerary_cache_max_size,
+            ttl_seconds=settings.itinerary_cache_ttl_seconds,
+        )
+        self.scheduler = QuotaScheduler(
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            burst_seconds=settings.llm_quota_burst_seconds,
+            output_tokens_estimate=settings.llm_output_tokens_estimate,
+            max_retries=settings.llm_max_retries,
+            retry_base_delay=settings.llm_retry_base_delay_seconds,
+            retry_max_delay=settings.llm_retry_max_delay_seconds,
+        )
+        self.semantic_cache: Optional[SemanticCache] = None
+        if settings.semantic_cache_enabled:
+            if numpy_available():
+                self.semantic_cache = SemanticCache(
+                    threshold=settings.semantic_cache_threshold,
+                    max_size=settings.semantic_cache_max_size,
+                    ttl_seconds=settings.semantic_cache_ttl_seconds,
+                    dimensions=settings.semantic_cache_dimensions,
+                )
+            else:
+                logger.warning("numpy is not installed; semantic cache disabled")
 
     async def initialize(self) -> None:
-        """Initialize the LLM provider with API key from settings."""
+        """Initialize the LLM provider with API key from settings.
+
+        The provider's SDK is imported here, in a worker thread, rather than
+        when the app is imported.
+        """
         try:
             api_key = settings.gemini_api_key
             if not api_key:
                 raise ItineraryServiceError(
                     f"API key not found for provider {self.provider.provider_name}"
                 )
-            await self.provider.initialize(api_key)
+            await self.provider.initialize(
+                api_key,
+                timeout=settings.llm_request_timeout_seconds or None,
+                use_async=settings.gemini_use_async,
+                max_workers=settings.llm_executor_max_workers,
+            )
         except Exception as e:
             raise ItineraryServiceError(
                 f"Failed to initialize provider: {str(e)}"
             ) from e
+        path = settings.semantic_cache_path
+        if self.semantic_cache is not None and path and os.path.exists(path):
+            try:
+                await asyncio.to_thread(self.semantic_cache.load, path)
+            except SemanticCacheError as e:
+                logger.warning("Ignoring semantic cache file: %s", e)
+
+    async def close(self) -> None:
+        """Release the provider's resources."""
+        await self.provider.close()
+        path = settings.semantic_cache_path
+        if self.semantic_cache is not None and path:
+            try:
+                await asyncio.to_thread(self.semantic_cache.save, path)
+            except SemanticCacheError as e:
+                logger.warning("%s", e)
+
+    @timed_async()
+    async def generate_itinerary(
+        self,
+        query: str,
+        use_cache: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Generate an itinerary using the configured LLM provider.
+
+        Responses are cached per normalized query, prompt template and model;
+        with the semantic cache, near-duplicate queries share responses too.
+        Passing ``use_cache=False`` skips the lookup but still refreshes the
+        cached entry with the newly generated response. The LLM call waits
+        for quota in ``priority`` order and must finish by ``deadline`` (a
+        ``time.monotonic()`` timestamp, defaulting per priority class). Long
+        trips are generated day by day in parallel (see ``_generate_days``).
+        """
+        try:
+            prompt = self._create_prompt(query)
+            days = self._parallel_days(query)
+            cache_key = self._cache_key(query, parallel=days is not None)
+            if use_cache:
+                cached = await self._cache_lookup(cache_key, query, days is not None)
+                if cached is not None:
+                    return cached
+
+            if days is None:
+                response = await self._generate(prompt, priority, deadline)
+            else:
+                response = stitch(
+                    [
+                        day
+                        async for day in self._generate_days(
+                            query, days, priority, deadline
+                        )
+                    ]
+                )
+            await self._cache_store(cache_key, query, days is not None, response)
+            return response
+        except Exception as e:
+            raise ItineraryServiceError(
+                f"Failed to generate itinerary: {str(e)}"
+            ) from e
+
+    @timed_async()
+    async def generate_batch(
+        self,
+        queries: Sequence[str],
+        concurrency: int,
+        use_cache: bool = True,
+        priority: Priority = Priority.BATCH,
+        deadline: Optional[float] = None,
+    ) -> List[Union[str, ItineraryServiceError]]:
+        """Generate itineraries for many queries with bounded concurrency.
+
+        Queries that normalize to the same text are generated once. The result
+        list is aligned with ``queries``; failed items hold their error instead
+        of a response so one failure does not sink the whole batch.
+        """
+        if concurrency <= 0:
+            raise ItineraryServiceError("concurrency must be positive")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate_one(query: str) -> Union[str, ItineraryServiceError]:
+            async with semaphore:
+                try:
+                    return await self.generate_itinerary(
+                        query, use_cache=use_cache, priority=priority, deadline=deadline
+                    )
+                except ItineraryServiceError as e:
+                    return e
+
+        unique: Dict[str, str] = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query), query)
+        results = await asyncio.gather(*(generate_one(q) for q in unique.values()))
+        by_key = dict(zip(unique.keys(), results))
+        return [by_key[normalize_query(query)] for query in queries]
 
-    async def generate_itinerary(self, query: str) -> str:
-        """Generate an itinerary using the configured LLM provider."""
+    async def stream_itinerary(
+        self, query: str, use_cache: bool = True, deadline: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Stream an itinerary as text chunks from the configured LLM provider.
+
+        A cached response is yielded as a single chunk. The full streamed text
+        is cached once the provider finishes. Streams are interactive; they
+        wait for quota but are not retried once started, and must finish by
+        ``deadline``. Long trips are generated day by day in parallel and
+        each day is yielded whole, in order, as soon as it is ready.
+        """
         try:
             prompt = self._create_prompt(query)
-            return await self.provider.generate_text(prompt)
+            days = self._parallel_days(query)
+            cache_key = self._cache_key(query, parallel=days is not None)
+            if use_cache:
+                cached = await self._cache_lookup(cache_key, query, days is not None)
+                if cached is not None:
+                    yield cached
+                    return
+
+            if days is not None:
+                async for chunk in self._stream_days(query, days, cache_key, deadline):
+                    yield chunk
+                return
+
+            prompt_tokens = estimate_tokens(prompt)
+            estimate = self.scheduler.estimate(prompt_tokens)
+            if deadline is None:
+                deadline = self._deadline(Priority.INTERACTIVE)
+            await self.scheduler.acquire(estimate, Priority.INTERACTIVE, deadline)
+            chunks: list[str] = []
+            async for chunk in _stream_before(
+                self.provider.stream_text(prompt), deadline
+            ):
+                chunks.append(chunk)
+                yield chunk
+            response = "".join(chunks)
+            self.scheduler.record_usage(
+                estimate, prompt_tokens, estimate_tokens(response)
+            )
+            await self._cache_store(cache_key, query, False, response)
         except Exception as e:
             raise ItineraryServiceError(
                 f"Failed to generate itinerary: {str(e)}"
             ) from e
 
-    def _create_prompt(self, query: str) -> str:
+    async def _stream_days(
+        self, query: str, days: int, cache_key: str, deadline: Optional[float]
+    ) -> AsyncIterator[str]:
+        """Stream a trip generated day by day, one chunk per day."""
+        generated: List[str] = []
+        async for day in self._generate_days(
+            query, days, Priority.INTERACTIVE, deadline
+        ):
+            # Chunks concatenate to exactly the stitched itinerary
+            yield f"\n\n{day.strip()}" if generated else day.strip()
+            generated.append(day)
+        await self._cache_store(cache_key, query, True, stitch(generated))
+
+    async def _generate(
+        self, prompt: str, priority: Priority, deadline: Optional[float]
+    ) -> str:
+        """Call the provider within the LLM quota."""
+
+        def call() -> Awaitable[str]:
+            return self.provider.generate_text(prompt)
+
+        if deadline is None:
+            deadline = self._deadline(priority)
+        if isinstance(self.provider, CoalescingProvider) and self.provider.joinable(
+            prompt
+        ):
+            # The call already in flight was charged against the quota. Timing
+            # out only detaches this caller from it.
+            try:
+                return await asyncio.wait_for(call(), remaining(deadline))
+            except asyncio.TimeoutError as e:
+                raise DeadlineExceededError("LLM call did not finish in time") from e
+        return await self.scheduler.run(call, prompt, priority, deadline)
+
+    def _parallel_days(self, query: str) -> Optional[int]:
+        """Number of days to generate in parallel, or None for a single call.
+
+        Only trips stated to last at least ``itinerary_parallel_min_days``
+        days are split, and only if the planning prompts are configured.
+        """
+        min_days = settings.itinerary_parallel_min_days
+        if min_days <= 0 or not {"itinerary_plan", "itinerary_day"} <= set(
+            settings.prompts
+        ):
+            return None
+        days = trip_days(query, settings.itinerary_parallel_max_days)
+        if days is None or days < min_days:
+            return None
+        return days
+
+    async def _generate_days(
+        self, query: str, days: int, priority: Priority, deadline: Optional[float]
+    ) -> AsyncIterator[str]:
+        """Generate a trip day by day, yielding the days in order.
+
+        One planning call outlines the days, which are then generated
+        concurrently; each is yielded once it and all days before it are
+        done. If the plan cannot be parsed, the whole itinerary is generated
+        by a single call instead.
+        """
+        if deadline is None:
+            deadline = self._deadline(priority)
+        plan = await self._generate(
+            self._create_prompt(query, "itinerary_plan", days=days), priority, deadline
+        )
+        outlines = parse_outline(plan)[: settings.itinerary_parallel_max_days]
+        if not outlines:
+            yield await self._generate(self._create_prompt(query), priority, deadline)
+            return
+
+        outline = format_outline(outlines)
+        semaphore = asyncio.Semaphore(settings.itinerary_parallel_concurrency)
+
+        async def generate_day(day: int, summary: str) -> str:
+            prompt = self._create_prompt(
+                query, "itinerary_day", day=day, summary=summary, outline=outline
+            )
+            async with semaphore:
+                return await self._generate(prompt, priority, deadline)
+
+        tasks = [
+            asyncio.create_task(generate_day(day, summary))
+            for day, summary in enumerate(outlines, start=1)
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            # Stop the remaining days if one failed or the caller went away
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _deadline(self, priority: Priority) -> float:
+        """Default deadline for a call of the given priority class."""
+        if priority is Priority.INTERACTIVE:
+            return time.monotonic() + settings.llm_interactive_deadline_seconds
+        return time.monotonic() + settings.llm_background_deadline_seconds
+
+    async def _cache_lookup(
+        self, cache_key: str, query: str, parallel: bool
+    ) -> Optional[str]:
+        """Look up a cached response, counting the hit or miss.
+
+        The exact cache is tried first, then the semantic cache, whose search
+        runs in a worker thread to keep it off the event loop.
+        """
+        result = "miss"
+        cached = None
+        if settings.itinerary_cache_enabled:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                result = "hit"
+        if cached is None and self.semantic_cache is not None:
+            cached = await asyncio.to_thread(
+                self.semantic_cache.lookup, query, self._cache_namespace(parallel)
+            )
+            if cached is not None:
+                result = "semantic_hit"
+        llm_cache_requests.labels(
+            provider=self.provider.provider_name,
+            model=self.provider.model_name,
+            result=result,
+        ).inc()
+        return cached
+
+    async def _cache_store(
+        self, cache_key: str, query: str, parallel: bool, response: str
+    ) -> None:
+        """Cache a newly generated response."""
+        if settings.itinerary_cache_enabled:
+            self.cache.set(cache_key, response)
+        if self.semantic_cache is not None:
+            await asyncio.to_thread(
+                self.semantic_cache.add,
+                query,
+                response,
+                self._cache_namespace(parallel),
+            )
+
+    def _create_prompt(
+        self, query: str, template: str = "itinerary", **fields: Union[str, int]
+    ) -> str:
         """Create a standardized prompt for itinerary generation."""
         try:
-            return settings.prompts["itinerary"].format(query=query)
+            return settings.prompts[template].format(query=query, **fields)
         except (KeyError, ValueError) as e:
             raise ItineraryServiceError(f"Failed to create prompt: {str(e)}") from e
+
+    def fingerprint(self, query: str) -> Tuple[str, str]:
+        """Hash of the normalized query, and version of the prompts and model.
+
+        Requests with equal fingerprints get interchangeable responses.
+        """
+        parallel = self._parallel_days(query) is not None
+        return make_cache_key(normalize_query(query)), self._cache_namespace(parallel)
+
+    def _cache_key(self, query: str, parallel: bool = False) -> str:
+        """Build the response cache key for a query."""
+        return make_cache_key(normalize_query(query), self._cache_namespace(parallel))
+
+    def _cache_namespace(self, parallel: bool) -> str:
+        """Identify the prompt templates and model responses are made with."""
+        templates = ("itinerary_plan", "itinerary_day") if parallel else ("itinerary",)
+        return make_cache_key(
+            *(settings.prompts[template] for template in templates),
+            self.provider.provider_name,
+            self.provider.model_name,
+        )
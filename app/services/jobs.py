@@ -0,0 +1,213 @@
+"""Background generation of itineraries on a bounded worker pool."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Dict, List, Optional, Set
+from uuid import UUID
+
+from ..database import DatabaseSessionManager
+from ..models import ItineraryQuery, ItineraryStatus
+from ..write_buffer import WriteBuffer
+from .cache import completed_itineraries
+from .itinerary import ItineraryService, ItineraryServiceError
+from .scheduler import Priority, is_deadline_exceeded
+from .shared_results import SharedResults
+
+logger = logging.getLogger(__name__)
+
+# Recorded on jobs that were still queued or running at shutdown
+SHUTDOWN_MESSAGE = "Interrupted by server shutdown; please retry"
+
+
+class JobQueueFullError(ItineraryServiceError):
+    """Raised when the job queue cannot accept more work."""
+
+    pass
+
+
+@dataclass
+class ItineraryJob:
+    """A queued itinerary generation."""
+
+    query_id: UUID
+    query: str
+    use_cache: bool = True
+    # ``time.monotonic()`` deadline; the background default if None
+    deadline: Optional[float] = None
+
+
+class ItineraryJobQueue:
+    """Runs itinerary generations in the background.
+
+    Jobs are held in a bounded in-memory queue and processed by a fixed
+    number of worker tasks, so LLM concurrency is capped independently of
+    request volume. Progress is recorded on the ``ItineraryQuery`` row,
+    through ``writes`` if given. With ``shared``, jobs reuse or wait for
+    results of the same request from any node instead of generating them
+    again.
+    """
+
+    def __init__(
+        self,
+        service: ItineraryService,
+        sessions: DatabaseSessionManager,
+        concurrency: int,
+        max_queue_size: int,
+        shared: Optional[SharedResults] = None,
+        writes: Optional[WriteBuffer] = None,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.service = service
+        self.sessions = sessions
+        self.shared = shared
+        self.writes = writes or WriteBuffer(sessions)
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue[ItineraryJob] = asyncio.Queue(max_queue_size)
+        self._workers: List[asyncio.Task[None]] = []
+        self._completed: Dict[UUID, asyncio.Event] = {}
+        self._running: Set[UUID] = set()
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"itinerary-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers and mark unfinished jobs as failed.
+
+        Jobs are only held in memory, so those still queued or running
+        would otherwise stay ``queued`` or ``running`` in the database.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        interrupted = list(self._running)
+        self._running.clear()
+        while not self._queue.empty():
+            interrupted.append(self._queue.get_nowait().query_id)
+            self._queue.task_done()
+        if not interrupted:
+            return
+        # Buffered writes of the interrupted jobs must land first
+        await self.writes.flush()
+        try:
+            async with self.sessions.session(mode="write") as db:
+                failed = await ItineraryQuery.fail_pending(
+                    db, interrupted, SHUTDOWN_MESSAGE
+                )
+        except Exception:
+            logger.exception("Could not mark %d interrupted jobs", len(interrupted))
+            return
+        for query_id in interrupted:
+            completed_itineraries.invalidate(query_id)
+            event = self._completed.pop(query_id, None)
+            if event is not None:
+                event.set()
+        logger.info("Marked %d interrupted itinerary jobs as failed", failed)
+
+    def submit(self, job: ItineraryJob) -> None:
+        """Enqueue a job without waiting; raises JobQueueFullError if full."""
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Itinerary job queue is full")
+        self._completed[job.query_id] = asyncio.Event()
+
+    async def wait(self, query_id: UUID, timeout: float) -> bool:
+        """Wait up to timeout seconds for a job queued on this process.
+
+        Returns False if the job is unknown here or did not finish in time.
+        """
+        event = self._completed.get(query_id)
+        if event is None:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    async def _worker(self) -> None:
+        """Process jobs until cancelled."""
+        while True:
+            job = await self._queue.get()
+            self._running.add(job.query_id)
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Itinerary job %s could not be recorded", job.query_id)
+            finally:
+                self._queue.task_done()
+                event = self._completed.pop(job.query_id, None)
+                if event is not None:
+                    event.set()
+            # Left in place when cancelled, for stop() to record
+            self._running.discard(job.query_id)
+
+    async def _run(self, job: ItineraryJob) -> None:
+        """Generate one itinerary and record the outcome on its row."""
+        if job.deadline is not None and job.deadline <= time.monotonic():
+            await self._set_status(
+                job.query_id,
+                ItineraryStatus.TIMED_OUT,
+                "Deadline passed while the job was queued",
+            )
+            return
+
+        def generate() -> Awaitable[str]:
+            return self.service.generate_itinerary(
+                job.query,
+                use_cache=job.use_cache,
+                priority=Priority.BATCH,
+                deadline=job.deadline,
+            )
+
+        try:
+            if self.shared is None:
+                await self._set_status(job.query_id, ItineraryStatus.RUNNING)
+                response = await generate()
+            else:
+                claim = await self.shared.claim(
+                    job.query,
+                    ItineraryStatus.RUNNING,
+                    reuse=job.use_cache,
+                    query_id=job.query_id,
+                )
+                if claim.response is not None:
+                    return
+                response = await self.shared.resolve(claim, generate, job.deadline)
+        except ItineraryServiceError as e:
+            status = (
+                ItineraryStatus.TIMED_OUT
+                if is_deadline_exceeded(e)
+                else ItineraryStatus.FAILED
+            )
+            await self._set_status(job.query_id, status, str(e))
+            return
+
+        await self.writes.set_response(job.query_id, response)
+        completed_itineraries.invalidate(job.query_id)
+
+    async def _set_status(
+        self,
+        query_id: UUID,
+        status: ItineraryStatus,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """Update a job's status, committed before returning."""
+        await self.writes.set_status(query_id, status, error_message)
+        completed_itineraries.invalidate(query_id)
@@ -1,5 +1,20 @@
-from .base import LLMProvider
+from .base import DelegatingProvider, LLMProvider
 from .gemini import GeminiProvider
 from .factory import LLMFactory
+from .coalescing import CoalescingProvider
+from .guarded import GuardedProvider
+from .instrumented import InstrumentedProvider
+from .routing import Route, RoutingError, RoutingProvider
 
-__all__ = ["LLMProvider", "GeminiProvider", "LLMFactory"]
+__all__ = [
+    "LLMProvider",
+    "DelegatingProvider",
+    "GeminiProvider",
+    "LLMFactory",
+    "CoalescingProvider",
+    "GuardedProvider",
+    "InstrumentedProvider",
+    "Route",
+    "RoutingError",
+    "RoutingProvider",
+]
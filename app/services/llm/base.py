@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Dict
 
 
 class LLMProvider(ABC):
@@ -10,11 +10,26 @@ class LLMProvider(ABC):
         """Generate text from prompt"""
         pass
 
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Generate text from prompt, yielding chunks as they arrive.
+
+        Providers without native streaming yield the full text once.
+        """
+        yield await self.generate_text(prompt)
+
     @abstractmethod
     async def initialize(self, api_key: str, **kwargs: Any) -> None:
         """Initialize the LLM provider with credentials"""
         pass
 
+    async def close(self) -> None:
+        """Release resources held by the provider"""
+        pass
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the provider and its runtime state for monitoring."""
+        return {"provider": self.provider_name, "model": self.model_name}
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -26,3 +41,37 @@ class LLMProvider(ABC):
     def model_name(self) -> str:
         """Get the model name"""
         pass
+
+
+class DelegatingProvider(LLMProvider):
+    """Provider that forwards every call to a wrapped provider.
+
+    Subclasses override the calls they want to intercept.
+    """
+
+    def __init__(self, inner: LLMProvider) -> None:
+        self.inner = inner
+
+    async def generate_text(self, prompt: str) -> str:
+        return await self.inner.generate_text(prompt)
+
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        async for chunk in self.inner.stream_text(prompt):
+            yield chunk
+
+    async def initialize(self, api_key: str, **kwargs: Any) -> None:
+        await self.inner.initialize(api_key, **kwargs)
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def status(self) -> Dict[str, Any]:
+        return self.inner.status()
+
+    @property
+    def provider_name(self) -> str:
+        return self.inner.provider_name
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
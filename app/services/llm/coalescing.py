@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from ...utils.singleflight import SingleFlight
+from .base import DelegatingProvider, LLMProvider
+
+
+class CoalescingProvider(DelegatingProvider):
+    """Provider wrapper that merges identical concurrent prompts.
+
+    N concurrent calls with the same prompt cost a single call to the
+    wrapped provider; every caller receives its result or its exception.
+    """
+
+    def __init__(self, inner: LLMProvider) -> None:
+        super().__init__(inner)
+        self._flights: SingleFlight[str, str] = SingleFlight()
+
+    async def generate_text(self, prompt: str) -> str:
+        """Generate text, joining an identical call already in flight."""
+        return await self._flights.do(prompt, lambda: self.inner.generate_text(prompt))
+
+    def joinable(self, prompt: str) -> bool:
+        """Whether a call for prompt is in flight and would be joined."""
+        return self._flights.waiters(prompt) > 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct prompts currently being generated."""
+        return len(self._flights)
+
+    def status(self) -> Dict[str, Any]:
+        return {**self.inner.status(), "coalesced_in_flight": self.in_flight}
@@ -1,25 +1,77 @@
-from typing import Dict, Type
+import importlib
+from typing import Any, Callable, Dict, Mapping, Optional, Type, Union
 from .base import LLMProvider
-from .gemini import GeminiProvider
+from .routing import Route, RoutingProvider
 
 
 class LLMFactory:
-    """Factory for creating and managing LLM providers"""
+    """Factory for creating and managing LLM providers
 
-    _providers: Dict[str, Type[LLMProvider]] = {
-        "gemini": GeminiProvider
+    Providers can be registered by ``"module:Class"`` import path, which is
+    only imported when the provider is first created, so SDKs of unused
+    providers are never loaded.
+    """
+
+    _providers: Dict[str, Union[Type[LLMProvider], str]] = {
+        "gemini": "app.services.llm.gemini:GeminiProvider"
     }
 
     @classmethod
     def register_provider(
-        cls, name: str, provider_class: Type[LLMProvider]
+        cls, name: str, provider_class: Union[Type[LLMProvider], str]
     ) -> None:
-        """Register a new LLM provider"""
+        """Register a new LLM provider class or ``"module:Class"`` path"""
         cls._providers[name] = provider_class
 
     @classmethod
-    def create_provider(cls, name: str) -> LLMProvider:
-        """Create a new instance of an LLM provider"""
+    def get_provider_class(cls, name: str) -> Type[LLMProvider]:
+        """Return a registered provider class, importing it if needed"""
         if name not in cls._providers:
             raise ValueError(f"Unknown LLM provider: {name}")
-        return cls._providers[name]()
+        provider = cls._providers[name]
+        if isinstance(provider, str):
+            module_name, _, class_name = provider.partition(":")
+            try:
+                provider_class = getattr(
+                    importlib.import_module(module_name), class_name
+                )
+            except (ImportError, AttributeError) as e:
+                raise ValueError(
+                    f"Cannot import LLM provider {name} from {provider}: {str(e)}"
+                ) from e
+            if not (
+                isinstance(provider_class, type)
+                and issubclass(provider_class, LLMProvider)
+            ):
+                raise ValueError(f"{provider} is not an LLMProvider")
+            cls._providers[name] = provider = provider_class
+        return provider
+
+    @classmethod
+    def create_provider(cls, name: str) -> LLMProvider:
+        """Create a new instance of an LLM provider"""
+        return cls.get_provider_class(name)()
+
+    @classmethod
+    def create_router(
+        cls,
+        routes: Mapping[str, float],
+        wrap: Optional[Callable[[LLMProvider], LLMProvider]] = None,
+        **options: Any,
+    ) -> RoutingProvider:
+        """Create a routing provider over registered providers.
+
+        ``routes`` maps provider names to routing weights. Registering the
+        same provider class under several names adds replicas to hedge across.
+        ``wrap`` is applied to each routed provider, e.g. to guard it with its
+        own concurrency limit. Extra keyword arguments are passed to
+        ``RoutingProvider``.
+        """
+        wrap = wrap or (lambda provider: provider)
+        return RoutingProvider(
+            [
+                Route(name, wrap(cls.create_provider(name)), weight)
+                for name, weight in routes.items()
+            ],
+            **options,
+        )
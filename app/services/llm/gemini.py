@@ -1,10 +1,13 @@
 import asyncio
-from typing import Any, Optional
-
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterator, Optional
 
 from .base import LLMProvider
 
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
 
 class GeminiError(Exception):
     """Base exception for Gemini provider errors."""
@@ -13,37 +16,160 @@ class GeminiError(Exception):
 
 
 class GeminiProvider(LLMProvider):
-    """Gemini implementation of LLM provider."""
+    """Gemini implementation of LLM provider.
+
+    Calls use the SDK's native async API when it is available, so in-flight
+    generations cost no threads. Otherwise the blocking API runs on a
+    dedicated, bounded thread pool owned by the provider and shut down by
+    ``close``.
+    """
 
     def __init__(self) -> None:
-        self._model: Optional[genai.GenerativeModel] = None
+        self._model: Optional["genai.GenerativeModel"] = None
         self._model_name: str = "gemini-2.0-flash"
         self._initialized: bool = False
+        self._use_async: bool = False
+        self._timeout: Optional[float] = None
+        self._max_workers: int = 32
+        self._executor: Optional[ThreadPoolExecutor] = None
 
     async def initialize(self, api_key: str, **kwargs: Any) -> None:
-        """Initialize Gemini with API key."""
+        """Initialize Gemini with API key.
+
+        Keyword Args:
+            timeout: Seconds a request may take before failing (None waits
+                indefinitely).
+            use_async: Use the native async API if the SDK has it (default).
+            max_workers: Thread pool size for the blocking fallback.
+        """
         try:
-            genai.configure(api_key=api_key)
-            self._model = genai.GenerativeModel(self._model_name)
+            # SDK setup is blocking; keep it off the event loop
+            self._model = await asyncio.to_thread(self._configure, api_key)
+            self._timeout = kwargs.get("timeout")
+            self._max_workers = kwargs.get("max_workers", self._max_workers)
+            self._use_async = kwargs.get("use_async", True) and hasattr(
+                self._model, "generate_content_async"
+            )
             self._initialized = True
         except Exception as e:
             raise GeminiError(f"Failed to initialize Gemini: {str(e)}") from e
 
+    def _configure(self, api_key: str) -> "genai.GenerativeModel":
+        # The SDK is slow to import, so it is loaded here rather than at startup
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(self._model_name)
+
+    async def close(self) -> None:
+        """Shut down the fallback thread pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     async def generate_text(self, prompt: str) -> str:
         """Generate text using Gemini."""
-        if not self._initialized or not self._model:
-            raise GeminiError("Gemini provider not initialized")
-
+        model = self._require_model()
         try:
-            # Run the blocking API call in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, lambda: self._model.generate_content(prompt)  # type: ignore
-            )
+            async with asyncio.timeout(self._timeout):
+                if self._use_async:
+                    response = await model.generate_content_async(prompt)
+                else:
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        self._get_executor(), model.generate_content, prompt
+                    )
             return str(response.text)  # Ensure we return a string
+        except TimeoutError as e:
+            raise GeminiError(
+                f"Gemini text generation timed out after {self._timeout}s"
+            ) from e
         except Exception as e:
             raise GeminiError(f"Gemini text generation failed: {str(e)}") from e
 
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream generated text from Gemini chunk by chunk.
+
+        The timeout applies to the wait for each chunk, so time the caller
+        spends between chunks does not count against it.
+        """
+        model = self._require_model()
+        chunks: AsyncGenerator[str, None] = (
+            self._stream_async(model, prompt)
+            if self._use_async
+            else self._stream_in_executor(model, prompt)
+        )
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(self._timeout):
+                        chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                except TimeoutError as e:
+                    raise GeminiError(
+                        f"Gemini text streaming stalled for {self._timeout}s"
+                    ) from e
+                except Exception as e:
+                    raise GeminiError(f"Gemini text streaming failed: {str(e)}") from e
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    async def _stream_async(
+        self, model: "genai.GenerativeModel", prompt: str
+    ) -> AsyncGenerator[str, None]:
+        """Stream chunks from the SDK's native async API."""
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield str(chunk.text)
+
+    async def _stream_in_executor(
+        self, model: "genai.GenerativeModel", prompt: str
+    ) -> AsyncGenerator[str, None]:
+        """Stream chunks from the blocking API running on the thread pool."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[object] = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce() -> None:
+            # Runs in a worker thread; hands chunks back to the event loop
+            try:
+                for chunk in model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, str(chunk.text))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(self._get_executor(), produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield str(item)
+        finally:
+            # Let the worker thread stop early if the consumer went away
+            stop.set()
+
+    def _require_model(self) -> "genai.GenerativeModel":
+        if not self._initialized or not self._model:
+            raise GeminiError("Gemini provider not initialized")
+        return self._model
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the provider's thread pool, starting it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="gemini"
+            )
+        return self._executor
+
     @property
     def provider_name(self) -> str:
         return "gemini"
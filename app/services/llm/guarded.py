@@ -0,0 +1,71 @@
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Dict
+
+from ...utils.circuit_breaker import CircuitBreaker
+from ...utils.limiter import AdaptiveLimiter
+from .base import DelegatingProvider, LLMProvider
+
+
+class GuardedProvider(DelegatingProvider):
+    """Provider wrapper with an adaptive concurrency limit and circuit breaker.
+
+    Calls wait for a slot from the limiter, which shrinks when the provider
+    slows down or errors and grows back as it recovers. While the breaker
+    is open calls fail immediately with ``CircuitOpenError`` instead of
+    queueing behind a provider that is down.
+    """
+
+    def __init__(
+        self,
+        inner: LLMProvider,
+        limiter: AdaptiveLimiter,
+        breaker: CircuitBreaker,
+    ) -> None:
+        super().__init__(inner)
+        self.limiter = limiter
+        self.breaker = breaker
+
+    async def generate_text(self, prompt: str) -> str:
+        """Generate text within the concurrency limit."""
+        async with self._guard():
+            return await self.inner.generate_text(prompt)
+
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream text, holding a slot until the stream ends."""
+        async with self._guard():
+            async for chunk in self.inner.stream_text(prompt):
+                yield chunk
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.inner.status(),
+            "concurrency": asdict(self.limiter.snapshot()),
+            "circuit": asdict(self.breaker.snapshot()),
+        }
+
+    @asynccontextmanager
+    async def _guard(self) -> AsyncIterator[None]:
+        """Hold a limiter slot and report the call's outcome on exit."""
+        ticket = self.breaker.allow()
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.breaker.record_cancelled(ticket)
+            raise
+
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.limiter.release(failed=True)
+            self.breaker.record_failure(ticket)
+            raise
+        except BaseException:
+            # Cancelled or closed early: no signal about provider health
+            self.limiter.release()
+            self.breaker.record_cancelled(ticket)
+            raise
+        self.limiter.release(latency=time.monotonic() - start)
+        self.breaker.record_success(ticket)
@@ -0,0 +1,74 @@
+import time
+from typing import AsyncIterator, Dict, List
+
+from ...metrics import (
+    llm_request_duration,
+    llm_requests,
+    llm_requests_in_flight,
+    llm_tokens,
+)
+from ..scheduler import estimate_tokens
+from .base import DelegatingProvider
+
+
+class InstrumentedProvider(DelegatingProvider):
+    """Provider wrapper recording call latency, outcomes and token usage.
+
+    Metrics are labelled with the wrapped provider's name and model; token
+    counts are estimated from the prompt and response text.
+    """
+
+    async def generate_text(self, prompt: str) -> str:
+        """Generate text, recording the call's metrics."""
+        start = self._start(prompt)
+        outcome = "cancelled"
+        try:
+            result = await self.inner.generate_text(prompt)
+            outcome = "success"
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._finish(start, outcome)
+        self._count_output(result)
+        return result
+
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream text, recording the whole stream as one call."""
+        start = self._start(prompt)
+        outcome = "cancelled"
+        chunks: List[str] = []
+        try:
+            async for chunk in self.inner.stream_text(prompt):
+                chunks.append(chunk)
+                yield chunk
+            outcome = "success"
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._finish(start, outcome)
+            self._count_output("".join(chunks))
+
+    def _labels(self) -> Dict[str, str]:
+        return {"provider": self.provider_name, "model": self.model_name}
+
+    def _start(self, prompt: str) -> float:
+        labels = self._labels()
+        llm_requests_in_flight.labels(**labels).inc()
+        llm_tokens.labels(**labels, kind="prompt").inc(estimate_tokens(prompt))
+        return time.perf_counter()
+
+    def _finish(self, start: float, outcome: str) -> None:
+        labels = self._labels()
+        llm_requests_in_flight.labels(**labels).dec()
+        llm_request_duration.labels(**labels, outcome=outcome).observe(
+            time.perf_counter() - start
+        )
+        llm_requests.labels(**labels, outcome=outcome).inc()
+
+    def _count_output(self, text: str) -> None:
+        if text:
+            llm_tokens.labels(**self._labels(), kind="output").inc(
+                estimate_tokens(text)
+            )
@@ -0,0 +1,187 @@
+import asyncio
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from .base import LLMProvider
+from .stats import LatencyStats, ProviderStatsSnapshot
+
+
+class RoutingError(Exception):
+    """Raised when every routed provider failed."""
+
+    pass
+
+
+@dataclass
+class Route:
+    """A provider the router may send requests to."""
+
+    name: str
+    provider: LLMProvider
+    weight: float = 1.0
+    api_key: Optional[str] = None
+
+
+class RoutingProvider(LLMProvider):
+    """Routes calls across several providers with hedging and fallback.
+
+    Each call goes to a provider picked by weight. If it has not answered
+    within its ``hedge_percentile`` latency, a hedged request is sent to the
+    next provider; the first success wins and the others are cancelled.
+    Errors fall through to the remaining providers in weighted order.
+    """
+
+    def __init__(
+        self,
+        routes: Sequence[Route],
+        hedge_percentile: float = 0.95,
+        max_hedges: int = 1,
+        default_hedge_delay: float = 10.0,
+        min_samples: int = 20,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if not routes:
+            raise ValueError("RoutingProvider needs at least one route")
+        self.routes = list(routes)
+        self.hedge_percentile = hedge_percentile
+        self.max_hedges = max_hedges
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self._rng = rng or random.Random()
+        self._stats: Dict[str, LatencyStats] = {
+            route.name: LatencyStats() for route in self.routes
+        }
+
+    async def initialize(self, api_key: str, **kwargs: Any) -> None:
+        """Initialize every routed provider."""
+        await asyncio.gather(
+            *(
+                route.provider.initialize(route.api_key or api_key, **kwargs)
+                for route in self.routes
+            )
+        )
+
+    async def close(self) -> None:
+        """Close every routed provider."""
+        await asyncio.gather(*(route.provider.close() for route in self.routes))
+
+    async def generate_text(self, prompt: str) -> str:
+        """Generate text on the best available provider, hedging slow calls."""
+        candidates = self._ordered_routes()
+        in_flight: Dict["asyncio.Task[str]", Route] = {}
+        errors: List[str] = []
+        hedges = 0
+        try:
+            while True:
+                if not in_flight:
+                    if not candidates:
+                        raise RoutingError(
+                            "All LLM providers failed: " + "; ".join(errors)
+                        )
+                    self._launch(candidates.pop(0), prompt, in_flight)
+
+                can_hedge = bool(candidates) and hedges < self.max_hedges
+                newest = list(in_flight.values())[-1]
+                done, _ = await asyncio.wait(
+                    in_flight,
+                    timeout=self.hedge_delay(newest.name) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    hedges += 1
+                    self._launch(candidates.pop(0), prompt, in_flight)
+                    continue
+                for task in done:
+                    route = in_flight.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(f"{route.name}: {error}")
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream from one provider, falling back if it fails before output."""
+        errors: List[str] = []
+        for route in self._ordered_routes():
+            started = False
+            start = time.monotonic()
+            try:
+                async for chunk in route.provider.stream_text(prompt):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._stats[route.name].record_error()
+                if started:
+                    raise
+                errors.append(f"{route.name}: {e}")
+                continue
+            self._stats[route.name].record_success(time.monotonic() - start)
+            return
+        raise RoutingError("All LLM providers failed: " + "; ".join(errors))
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on a provider before sending a hedged request."""
+        stats = self._stats[name]
+        if stats.samples < self.min_samples:
+            return self.default_hedge_delay
+        delay = stats.percentile(self.hedge_percentile)
+        return self.default_hedge_delay if delay is None else delay
+
+    def stats(self) -> Dict[str, ProviderStatsSnapshot]:
+        """Per-provider call statistics."""
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    def status(self) -> Dict[str, Any]:
+        routes = {
+            route.name: {
+                **route.provider.status(),
+                "weight": route.weight,
+                "stats": asdict(self._stats[route.name].snapshot()),
+            }
+            for route in self.routes
+        }
+        return {"provider": self.provider_name, "routes": routes}
+
+    @property
+    def provider_name(self) -> str:
+        return "router"
+
+    @property
+    def model_name(self) -> str:
+        return "+".join(route.provider.model_name for route in self.routes)
+
+    def _ordered_routes(self) -> List[Route]:
+        """Weighted random order without replacement."""
+        remaining = [route for route in self.routes if route.weight > 0]
+        ordered: List[Route] = []
+        while remaining:
+            weights = [r.weight for r in remaining]
+            route = self._rng.choices(remaining, weights=weights)[0]
+            remaining.remove(route)
+            ordered.append(route)
+        return ordered
+
+    def _launch(
+        self, route: Route, prompt: str, in_flight: Dict["asyncio.Task[str]", Route]
+    ) -> None:
+        """Start a timed call to route's provider."""
+        in_flight[asyncio.create_task(self._timed_call(route, prompt))] = route
+
+    async def _timed_call(self, route: Route, prompt: str) -> str:
+        """Call a provider, recording its outcome and latency."""
+        stats = self._stats[route.name]
+        start = time.monotonic()
+        try:
+            result = await route.provider.generate_text(prompt)
+        except asyncio.CancelledError:
+            stats.record_cancelled()
+            raise
+        except Exception:
+            stats.record_error()
+            raise
+        stats.record_success(time.monotonic() - start)
+        return result
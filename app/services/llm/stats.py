@@ -0,0 +1,63 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional
+
+
+@dataclass
+class ProviderStatsSnapshot:
+    """Point-in-time view of a provider's call statistics."""
+
+    successes: int
+    errors: int
+    cancelled: int
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+
+
+class LatencyStats:
+    """Rolling latency window and outcome counters for one provider."""
+
+    def __init__(self, window: int = 500) -> None:
+        self.successes = 0
+        self.errors = 0
+        self.cancelled = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record_success(self, seconds: float) -> None:
+        """Record a successful call and its latency."""
+        self.successes += 1
+        self._latencies.append(seconds)
+
+    def record_error(self) -> None:
+        """Record a failed call."""
+        self.errors += 1
+
+    def record_cancelled(self) -> None:
+        """Record a call abandoned before it finished (e.g. a lost hedge)."""
+        self.cancelled += 1
+
+    @property
+    def samples(self) -> int:
+        """Number of latencies in the rolling window."""
+        return len(self._latencies)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile p (0-1) over the window, None if empty."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> ProviderStatsSnapshot:
+        """Return the current counters and latency percentiles."""
+        return ProviderStatsSnapshot(
+            successes=self.successes,
+            errors=self.errors,
+            cancelled=self.cancelled,
+            p50=self.percentile(0.5),
+            p95=self.percentile(0.95),
+            p99=self.percentile(0.99),
+        )
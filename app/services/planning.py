@@ -0,0 +1,75 @@
+"""Splitting long trips into days that can be generated in parallel."""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+_WORD_NUMBERS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+    "twenty": 20,
+}
+_NUMBER = r"(\d+|" + "|".join(_WORD_NUMBERS) + r")"
+_DURATION = re.compile(r"\b" + _NUMBER + r"(?:\s+|-)days?\b", re.IGNORECASE)
+_OUTLINE_LINE = re.compile(r"^\W*day\s+(\d+)\s*[:.)\-–—]\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def trip_days(query: str, max_days: int) -> Optional[int]:
+    """Length of the trip in days as stated in query, capped at max_days.
+
+    Only explicit durations count, such as "10 days" or "a five-day trip".
+    Returns None if there is none, or if the query states different ones.
+    """
+    days = {_parse_number(number) for number in _DURATION.findall(query)}
+    if len(days) != 1:
+        return None
+    return min(days.pop(), max_days)
+
+
+def _parse_number(number: str) -> int:
+    if number.isdigit():
+        return int(number)
+    return _WORD_NUMBERS[number.lower()]
+
+
+def parse_outline(text: str) -> List[str]:
+    """Day outlines from a planning response, in day order.
+
+    Lines look like ``Day 3: Old town and the harbour``; anything else is
+    ignored. Repeated days keep their first outline and the result is
+    ordered by day number.
+    """
+    outlines: Dict[int, str] = {}
+    for line in text.splitlines():
+        match = _OUTLINE_LINE.match(line)
+        if match:
+            outlines.setdefault(int(match.group(1)), match.group(2))
+    return [outlines[day] for day in sorted(outlines)]
+
+
+def format_outline(outlines: Sequence[str]) -> str:
+    """Render day outlines back into ``Day N: ...`` lines."""
+    return "\n".join(
+        f"Day {day}: {outline}" for day, outline in enumerate(outlines, start=1)
+    )
+
+
+def stitch(days: Sequence[str]) -> str:
+    """Join generated days, in order, into a single itinerary."""
+    return "\n\n".join(day.strip() for day in days)
@@ -0,0 +1,300 @@
+"""Quota-aware scheduling of LLM calls.
+
+Calls are admitted against local requests-per-minute and tokens-per-minute
+token buckets so usage stays under the provider quota instead of being
+discovered through 429s. Waiting calls are served by priority class, then
+deadline, then arrival; a call that cannot be admitted before its deadline
+fails immediately. Throttling and transient upstream errors are retried with
+full-jitter exponential backoff while the deadline allows.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Awaitable, Callable, List, Optional
+
+from ..utils.token_bucket import TokenBucket
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+# Upstream status codes worth retrying
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+class SchedulerError(Exception):
+    """Base exception for scheduler errors."""
+
+    pass
+
+
+class DeadlineExceededError(SchedulerError):
+    """Raised when a call cannot finish before its deadline."""
+
+    pass
+
+
+class Priority(IntEnum):
+    """Priority classes; lower values are served first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    PREWARM = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate for quota accounting."""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP-like status code of error or any exception in its cause chain."""
+    current: Optional[BaseException] = error
+    while current is not None:
+        code = getattr(current, "code", None)
+        if isinstance(code, int):
+            return code
+        current = current.__cause__
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether error is throttling or a transient upstream failure."""
+    return _status_code(error) in RETRYABLE_CODES
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Whether error means the upstream quota was exceeded."""
+    return _status_code(error) == 429
+
+
+def is_deadline_exceeded(error: BaseException) -> bool:
+    """Whether error, or any exception in its cause chain, is a missed deadline."""
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, DeadlineExceededError):
+            return True
+        current = current.__cause__
+    return False
+
+
+@dataclass(order=True)
+class _Ticket:
+    """A call waiting for quota, ordered by priority, deadline and arrival."""
+
+    priority: int
+    deadline: float
+    seq: int
+    tokens: int = field(compare=False)
+    future: "asyncio.Future[None]" = field(compare=False)
+
+
+class QuotaScheduler:
+    """Admits LLM calls within RPM/TPM quotas, by priority and deadline.
+
+    A limit of 0 disables that bucket. Bucket capacity is ``burst_seconds``
+    worth of quota, so usage is spread over the minute rather than spent in
+    one burst at its start.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        burst_seconds: float = 10.0,
+        output_tokens_estimate: int = 1024,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.output_tokens_estimate = float(output_tokens_estimate)
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._requests = self._bucket(requests_per_minute, burst_seconds, 1)
+        self._tokens = self._bucket(
+            tokens_per_minute, burst_seconds, output_tokens_estimate
+        )
+        self._heap: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task: Optional["asyncio.Task[None]"] = None
+
+    def _bucket(
+        self, per_minute: float, burst_seconds: float, minimum: float
+    ) -> Optional[TokenBucket]:
+        if per_minute <= 0:
+            return None
+        rate = per_minute / 60
+        return TokenBucket(rate, max(minimum, rate * burst_seconds), self._clock)
+
+    @property
+    def waiting(self) -> int:
+        """Number of calls queued for quota."""
+        return sum(1 for ticket in self._heap if not ticket.future.done())
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[str]],
+        prompt: str,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Run call within quota, retrying transient failures.
+
+        Args:
+            call: Makes the LLM request for prompt.
+            prompt: The prompt, used to estimate token usage.
+            priority: Priority class of the call.
+            deadline: Absolute ``clock()`` time by which the call must finish.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while waiting for
+                quota, retrying or generating.
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            estimate = self.estimate(prompt_tokens)
+            await self.acquire(estimate, priority, deadline)
+            try:
+                result = await self._call_before(call, deadline)
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                if is_throttled(e):
+                    self.throttled()
+                delay = self._backoff(attempt)
+                attempt += 1
+                if (
+                    not is_retryable(e)
+                    or attempt > self.max_retries
+                    or (deadline is not None and self._clock() + delay >= deadline)
+                ):
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.record_usage(estimate, prompt_tokens, estimate_tokens(result))
+            return result
+
+    def estimate(self, prompt_tokens: int) -> int:
+        """Estimated total tokens of a call with the given prompt size."""
+        return prompt_tokens + math.ceil(self.output_tokens_estimate)
+
+    async def acquire(
+        self,
+        tokens: int,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """Wait until one request and tokens fit in the quota.
+
+        Raises:
+            DeadlineExceededError: If the quota will not allow the call
+                before its deadline.
+        """
+        if not self._heap and self._wait_time(tokens) == 0:
+            self._take(tokens)
+            return
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._heap,
+            _Ticket(
+                int(priority),
+                math.inf if deadline is None else deadline,
+                next(self._seq),
+                tokens,
+                future,
+            ),
+        )
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    def record_usage(
+        self, estimate: int, prompt_tokens: int, output_tokens: int
+    ) -> None:
+        """Reconcile the token bucket with a finished call's actual usage."""
+        self.output_tokens_estimate += 0.1 * (
+            output_tokens - self.output_tokens_estimate
+        )
+        if self._tokens is None:
+            return
+        difference = prompt_tokens + output_tokens - estimate
+        if difference > 0:
+            self._tokens.take(difference)
+        else:
+            self._tokens.give(-difference)
+
+    def throttled(self) -> None:
+        """Back off after the upstream reported its quota exceeded."""
+        for bucket in (self._requests, self._tokens):
+            if bucket is not None:
+                bucket.drain()
+
+    async def _pump(self) -> None:
+        """Admit queued calls in order as quota becomes available."""
+        while self._heap:
+            ticket = self._heap[0]
+            if ticket.future.done():
+                # The waiter was cancelled
+                heapq.heappop(self._heap)
+                continue
+            wait = self._wait_time(ticket.tokens)
+            if self._clock() + wait > ticket.deadline:
+                heapq.heappop(self._heap)
+                ticket.future.set_exception(
+                    DeadlineExceededError(
+                        f"LLM quota frees up in {wait:.1f}s, after the deadline"
+                    )
+                )
+                continue
+            if wait == 0:
+                heapq.heappop(self._heap)
+                self._take(ticket.tokens)
+                ticket.future.set_result(None)
+                continue
+            # Sleep until quota frees up or a new, possibly more urgent, call
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call_before(
+        self, call: Callable[[], Awaitable[str]], deadline: Optional[float]
+    ) -> str:
+        if deadline is None:
+            return await call()
+        try:
+            return await asyncio.wait_for(call(), max(0.0, deadline - self._clock()))
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededError("LLM call did not finish in time") from e
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(
+            0.0 if bucket is None else bucket.wait_time(amount)
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens))
+        )
+
+    def _take(self, tokens: int) -> None:
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay."""
+        cap = min(self.retry_max_delay, self.retry_base_delay * 2**attempt)
+        return self._rng.uniform(0, cap)
@@ -0,0 +1,296 @@
+"""Sharing generated itineraries between nodes through the database.
+
+Every row records a fingerprint of its request (``query_hash`` and
+``prompt_version``). Before generating, a request claims its fingerprint in
+a short transaction serialized by a Postgres advisory lock. Under the lock
+it reuses the response of a recent completed row, follows a row that
+another request is generating, or becomes the leader and generates the
+response itself.
+
+The lock is released when the claim commits, so no connection is held
+while the LLM works; followers poll the leading row instead. Once a node
+is generating a request, later claims for it on that node generate too,
+since their LLM calls are coalesced in memory. SQLite runs in a single
+process and takes no lock.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+)
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import DatabaseSessionManager
+from ..metrics import itinerary_shared_results
+from ..models import ItineraryQuery, ItineraryStatus
+from ..utils.cancellation import remaining
+from ..write_buffer import WriteBuffer
+from .cache import completed_itineraries, make_cache_key
+from .itinerary import ItineraryService, ItineraryServiceError
+from .scheduler import DeadlineExceededError
+
+
+class SharedResultsError(Exception):
+    """Raised when a request cannot be claimed."""
+
+    pass
+
+
+@dataclass
+class Claim:
+    """A request's row, and how its response is to be obtained."""
+
+    row: ItineraryQuery
+    key: int
+    # Response of an earlier completed row, already stored on ``row``
+    response: Optional[str] = None
+    # Row of the same request being generated elsewhere, to wait for
+    leader_id: Optional[UUID] = None
+
+
+def lock_key(query_hash: str, prompt_version: str) -> int:
+    """Signed 64-bit advisory lock key for a request fingerprint."""
+    digest = bytes.fromhex(make_cache_key(query_hash, prompt_version))
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+async def advisory_xact_lock(db: AsyncSession, key: int) -> None:
+    """Hold a lock on key until the session's transaction ends.
+
+    A no-op on databases other than Postgres.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+
+
+class SharedResults:
+    """Claims itinerary requests so each is generated once across nodes."""
+
+    def __init__(
+        self,
+        service: ItineraryService,
+        sessions: DatabaseSessionManager,
+        enabled: bool = True,
+        max_age: float = 3600.0,
+        lease: float = 120.0,
+        poll_interval: float = 0.5,
+        writes: Optional[WriteBuffer] = None,
+    ) -> None:
+        self.service = service
+        self.sessions = sessions
+        self.enabled = enabled
+        self.max_age = max_age
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.writes = writes or WriteBuffer(sessions)
+        self._leading: Counter[int] = Counter()
+
+    def fingerprint_values(self, query: str) -> Dict[str, str]:
+        """Fingerprint columns to store on a row for query."""
+        query_hash, prompt_version = self.service.fingerprint(query)
+        return {"query_hash": query_hash, "prompt_version": prompt_version}
+
+    async def claim(
+        self,
+        query: str,
+        status: ItineraryStatus,
+        reuse: bool = True,
+        query_id: Optional[UUID] = None,
+    ) -> Claim:
+        """Record a request on a new row, or on row ``query_id``, in status.
+
+        With ``reuse``, a recent completed response for the same request is
+        copied onto the row (which is then ``done``), or else a row of it
+        that another node is generating is returned to follow.
+        """
+        values: Dict[str, Any] = self.fingerprint_values(query)
+        key = lock_key(values["query_hash"], values["prompt_version"])
+        if not (reuse and self.enabled):
+            # Nothing to look up, so the row need not be written under the
+            # lock and can go through the write buffer
+            row = await self._record(query, status, values, query_id)
+            return Claim(row, key)
+
+        response = leader_id = None
+        async with self.sessions.session(mode="write") as db:
+            await advisory_xact_lock(db, key)
+            response, leader_id = await self._find(db, values, key, query_id)
+            if response is not None:
+                status = ItineraryStatus.DONE
+                values.update(ItineraryQuery.response_values(response))
+            # Committing releases the lock, with this row visible to others
+            if query_id is None:
+                row = await ItineraryQuery.insert(
+                    db, query=query, status=status.value, **values
+                )
+            else:
+                updated = await ItineraryQuery.update_by_id(
+                    db, query_id, status=status.value, **values
+                )
+                if updated is None:
+                    raise SharedResultsError(f"Itinerary {query_id} not found")
+                row = updated
+                completed_itineraries.invalidate(query_id)
+        if response is not None:
+            itinerary_shared_results.labels(outcome="reused").inc()
+        return Claim(row, key, response, leader_id)
+
+    async def _record(
+        self,
+        query: str,
+        status: ItineraryStatus,
+        values: Dict[str, Any],
+        query_id: Optional[UUID],
+    ) -> ItineraryQuery:
+        """Write a claimed row without taking the lock."""
+        values = {"status": status.value, **values}
+        if query_id is None:
+            return await self.writes.insert({"query": query, **values})
+        updated = await self.writes.update(query_id, values)
+        if updated is None:
+            raise SharedResultsError(f"Itinerary {query_id} not found")
+        completed_itineraries.invalidate(query_id)
+        return updated
+
+    async def _find(
+        self,
+        db: AsyncSession,
+        fingerprint: Dict[str, Any],
+        key: int,
+        query_id: Optional[UUID],
+    ) -> Tuple[Optional[str], Optional[UUID]]:
+        """Reusable response, or else a leading row to follow."""
+        done = await ItineraryQuery.find_by_hash(
+            db,
+            fingerprint["query_hash"],
+            fingerprint["prompt_version"],
+            ItineraryStatus.DONE,
+            self.max_age,
+            exclude=query_id,
+        )
+        if done is not None and done.itinerary_response is not None:
+            return done.itinerary_response, None
+        if key in self._leading:
+            return None, None
+        running = await ItineraryQuery.find_by_hash(
+            db,
+            fingerprint["query_hash"],
+            fingerprint["prompt_version"],
+            ItineraryStatus.RUNNING,
+            self.lease,
+            exclude=query_id,
+            newest=False,
+        )
+        return None, (None if running is None else running.id)
+
+    async def resolve(
+        self,
+        claim: Claim,
+        generate: Callable[[], Awaitable[str]],
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Response for a claimed request.
+
+        That is the reused response, the one generated by the row being
+        followed, or, if there is neither, the result of ``generate``.
+
+        Raises:
+            ItineraryServiceError: If generation fails, or deadline passes
+                while following another row.
+        """
+        response = await self._shared_response(claim, deadline)
+        if response is not None:
+            return response
+        with self.leading(claim):
+            return await generate()
+
+    async def stream(
+        self,
+        claim: Claim,
+        stream: Callable[[], AsyncIterator[str]],
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Stream the response for a claimed request.
+
+        A reused or followed response is yielded as a single chunk; otherwise
+        the chunks of ``stream`` are relayed.
+        """
+        response = await self._shared_response(claim, deadline)
+        if response is not None:
+            yield response
+            return
+        with self.leading(claim):
+            async for chunk in stream():
+                yield chunk
+
+    async def _shared_response(
+        self, claim: Claim, deadline: Optional[float]
+    ) -> Optional[str]:
+        """Reused response, or that of the followed row once it is done."""
+        if claim.response is not None or claim.leader_id is None:
+            return claim.response
+        try:
+            response = await self.wait_for(claim.leader_id, deadline)
+        except DeadlineExceededError as e:
+            raise ItineraryServiceError(
+                f"Failed to generate itinerary: {str(e)}"
+            ) from e
+        if response is not None:
+            itinerary_shared_results.labels(outcome="followed").inc()
+        return response
+
+    @contextlib.contextmanager
+    def leading(self, claim: Claim) -> Iterator[None]:
+        """Mark the claimed request as being generated on this node."""
+        itinerary_shared_results.labels(outcome="generated").inc()
+        self._leading[claim.key] += 1
+        try:
+            yield
+        finally:
+            self._leading[claim.key] -= 1
+            if not self._leading[claim.key]:
+                del self._leading[claim.key]
+
+    async def wait_for(
+        self, leader_id: UUID, deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """Poll a row being generated elsewhere until it is done.
+
+        Returns None if that generation failed or did not finish within
+        the lease (its node may have died), so the caller can generate.
+
+        Raises:
+            DeadlineExceededError: If deadline passes first.
+        """
+        give_up = time.monotonic() + self.lease
+        while True:
+            async with self.sessions.session(mode="read", replica=False) as db:
+                row = await ItineraryQuery.get(db, leader_id)
+            if row is not None and row.status == ItineraryStatus.DONE.value:
+                return row.itinerary_response
+            if row is None or not row.is_pending:
+                return None
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise DeadlineExceededError("Shared itinerary did not finish in time")
+            if now >= give_up:
+                itinerary_shared_results.labels(outcome="lease_expired").inc()
+                return None
+            delay = min(self.poll_interval, give_up - now)
+            if deadline is not None:
+                delay = min(delay, remaining(deadline))
+            await asyncio.sleep(delay)
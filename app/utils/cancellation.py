@@ -0,0 +1,51 @@
+"""Request deadlines and cancellation of work for disconnected clients."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, MutableMapping, TypeVar
+
+T = TypeVar("T")
+
+Receive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away before its response was ready."""
+
+    pass
+
+
+def remaining(deadline: float) -> float:
+    """Seconds left until a ``time.monotonic()`` deadline, never negative."""
+    return max(0.0, deadline - time.monotonic())
+
+
+async def _wait_for_disconnect(receive: Receive) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(receive: Receive, work: Awaitable[T]) -> T:
+    """Await work, cancelling it if the client disconnects first.
+
+    ``receive`` is the request's ASGI receive channel; the request body must
+    already have been read. Cancelling work only cancels what this request
+    owns: calls shared with other waiters (see ``SingleFlight``) carry on.
+
+    Raises:
+        ClientDisconnectedError: If the client disconnected first.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if task.cancelled():
+        raise ClientDisconnectedError("Client disconnected")
+    return task.result()
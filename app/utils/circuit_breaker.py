@@ -0,0 +1,160 @@
+"""Circuit breaker that fails fast while a dependency is unhealthy."""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Deque, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+    pass
+
+
+class CircuitState(str, Enum):
+    """States of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerSnapshot:
+    """Point-in-time view of a circuit breaker."""
+
+    state: str
+    failure_rate: float
+    calls: int
+    retry_after: Optional[float]
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probes.
+
+    While closed, the outcomes of the last ``window_size`` calls are kept;
+    once at least ``min_calls`` are recorded and the failure rate reaches
+    ``failure_rate_threshold`` the circuit opens and calls are rejected.
+    After ``reset_timeout`` seconds it turns half-open and lets up to
+    ``half_open_probes`` calls through: if they all succeed the circuit
+    closes, and any failure opens it again.
+
+    ``allow`` returns a ticket that must be passed back when recording the
+    call's outcome, so calls started under an earlier state cannot move the
+    current one.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 10,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._generation = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, turning half-open once the reset timeout passed."""
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of failed calls in the current window."""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        """Seconds until the circuit turns half-open, None unless open."""
+        if self.state is not CircuitState.OPEN:
+            return None
+        return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> int:
+        """Claim permission for a call and return its ticket.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all
+                probes already in flight.
+        """
+        state = self.state
+        if state is CircuitState.OPEN:
+            raise CircuitOpenError(
+                f"Circuit open, retry in {self.retry_after or 0.0:.1f}s"
+            )
+        if state is CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                raise CircuitOpenError("Circuit half-open, probes in flight")
+            self._probes += 1
+        return self._generation
+
+    def record_success(self, ticket: int) -> None:
+        """Record a successful call."""
+        if ticket != self._generation:
+            return
+        if self._state is CircuitState.HALF_OPEN:
+            self._probes -= 1
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._transition(CircuitState.CLOSED)
+        elif self._state is CircuitState.CLOSED:
+            self._outcomes.append(True)
+
+    def record_failure(self, ticket: int) -> None:
+        """Record a failed call, opening the circuit if needed."""
+        if ticket != self._generation:
+            return
+        if self._state is CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+        elif self._state is CircuitState.CLOSED:
+            self._outcomes.append(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and self.failure_rate >= self.failure_rate_threshold
+            ):
+                self._transition(CircuitState.OPEN)
+
+    def record_cancelled(self, ticket: int) -> None:
+        """Record a call abandoned without an outcome."""
+        if ticket == self._generation and self._state is CircuitState.HALF_OPEN:
+            self._probes -= 1
+
+    def snapshot(self) -> CircuitBreakerSnapshot:
+        """Return the current state, failure rate and retry delay."""
+        return CircuitBreakerSnapshot(
+            state=self.state.value,
+            failure_rate=self.failure_rate,
+            calls=len(self._outcomes),
+            retry_after=self.retry_after,
+        )
+
+    def _transition(self, state: CircuitState) -> None:
+        self._state = state
+        self._generation += 1
+        self._probes = 0
+        self._probe_successes = 0
+        if state is CircuitState.OPEN:
+            self._opened_at = self._clock()
+        elif state is CircuitState.CLOSED:
+            self._outcomes.clear()
@@ -0,0 +1,131 @@
+"""Compact binary encoding for large text bodies.
+
+Every encoded value starts with a single codec byte followed by the payload:
+
+- ``0``: raw UTF-8
+- ``1``: zlib
+- ``2``: zstd, optionally with a trained dictionary
+
+zstd frames record the id of the dictionary they were compressed with, so
+values written with different dictionaries can be decoded side by side as
+long as each dictionary is registered. ``zstandard`` is optional; without it
+zstd writes fall back to zlib and zstd values cannot be decoded.
+"""
+
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+CODECS = {"none": CODEC_RAW, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+
+class CompressionError(Exception):
+    """Raised when a value cannot be encoded or decoded."""
+
+    pass
+
+
+def zstd_available() -> bool:
+    """Whether the optional zstandard package is installed."""
+    return zstandard is not None
+
+
+class TextCodec:
+    """Encodes text with a configured codec and decodes any supported codec."""
+
+    def __init__(
+        self,
+        codec: str = "zlib",
+        level: Optional[int] = None,
+        dictionary: Optional[bytes] = None,
+    ) -> None:
+        if codec not in CODECS:
+            raise CompressionError(f"Unknown compression codec: {codec}")
+        if codec == "zstd" and not zstd_available():
+            codec = "zlib"
+        self.codec = codec
+        self.level = level
+        self._dictionaries: Dict[int, Any] = {}
+        self._write_dictionary: Any = None
+        self._compressor: Any = None
+        if dictionary is not None:
+            self._write_dictionary = self.register_dictionary(dictionary)
+
+    def register_dictionary(self, data: bytes) -> Any:
+        """Make a zstd dictionary available for decoding; returns it."""
+        if not zstd_available():
+            raise CompressionError("zstandard is required for dictionaries")
+        dictionary = zstandard.ZstdCompressionDict(data)
+        self._dictionaries[dictionary.dict_id()] = dictionary
+        return dictionary
+
+    def encode(self, text: str) -> bytes:
+        """Encode text using the configured codec."""
+        raw = text.encode("utf-8")
+        if self.codec == "none":
+            return bytes([CODEC_RAW]) + raw
+        if self.codec == "zlib":
+            level = -1 if self.level is None else self.level
+            return bytes([CODEC_ZLIB]) + zlib.compress(raw, level)
+        compressed: bytes = self._zstd_compressor().compress(raw)
+        return bytes([CODEC_ZSTD]) + compressed
+
+    def decode(self, data: bytes) -> str:
+        """Decode a value produced by ``encode`` with any codec."""
+        if not data:
+            raise CompressionError("Cannot decode an empty value")
+        codec, payload = data[0], memoryview(data)[1:]
+        if codec == CODEC_RAW:
+            return bytes(payload).decode("utf-8")
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload).decode("utf-8")
+        if codec == CODEC_ZSTD:
+            return self._zstd_decompress(bytes(payload)).decode("utf-8")
+        raise CompressionError(f"Unknown codec byte: {codec}")
+
+    def _zstd_compressor(self) -> Any:
+        if self._compressor is None:
+            self._compressor = zstandard.ZstdCompressor(
+                level=3 if self.level is None else self.level,
+                dict_data=self._write_dictionary,
+            )
+        return self._compressor
+
+    def _zstd_decompress(self, payload: bytes) -> bytes:
+        if not zstd_available():
+            raise CompressionError("zstandard is required to decode zstd values")
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        dictionary = None
+        if dict_id:
+            dictionary = self._dictionaries.get(dict_id)
+            if dictionary is None:
+                raise CompressionError(f"Unknown zstd dictionary id: {dict_id}")
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return bytes(decompressor.decompress(payload))
+
+
+def train_dictionary(samples: Iterable[str], size: int = 64 * 1024) -> bytes:
+    """Train a zstd dictionary on sample texts and return its bytes."""
+    if not zstd_available():
+        raise CompressionError("zstandard is required to train a dictionary")
+    encoded = [sample.encode("utf-8") for sample in samples]
+    if not encoded:
+        raise CompressionError("Cannot train a dictionary without samples")
+    return bytes(zstandard.train_dictionary(size, encoded).as_bytes())
+
+
+def load_codec(
+    codec: str, level: Optional[int] = None, dictionary_path: str = ""
+) -> TextCodec:
+    """Build a codec, loading a trained dictionary from disk if configured."""
+    dictionary = Path(dictionary_path).read_bytes() if dictionary_path else None
+    return TextCodec(codec, level=level, dictionary=dictionary)
@@ -0,0 +1,53 @@
+"""JSON encoding for hot API responses.
+
+Uses orjson or msgspec when installed, and otherwise the encoder in
+pydantic-core, which pydantic always brings along. All three write UUIDs as
+strings and datetimes in ISO 8601 with ``Z`` for UTC, the same JSON that
+FastAPI produces through the pydantic schemas.
+"""
+
+from typing import Any, Callable, Tuple
+from uuid import UUID
+
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+def _default(value: Any) -> Any:
+    # orjson only takes exact UUIDs, not subclasses such as uuid6's
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def _pydantic_dumps(value: Any) -> bytes:
+    return to_json(value)
+
+
+def _installed(module: Any) -> bool:
+    return module is not None
+
+
+def _select() -> Tuple[str, Callable[[Any], bytes]]:
+    if _installed(orjson):
+        return "orjson", _orjson_dumps
+    if _installed(msgspec):
+        return "msgspec", msgspec.json.Encoder(enc_hook=_default).encode
+    return "pydantic-core", _pydantic_dumps
+
+
+# Name of the encoder in use, and the encoder: value -> UTF-8 JSON bytes
+backend, dumps = _select()
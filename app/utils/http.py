@@ -0,0 +1,54 @@
+"""HTTP caching helpers: validators and conditional request evaluation."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Read a naive datetime (as SQLite returns them) as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def make_etag(updated_at: datetime) -> str:
+    """Build a strong ETag from a row's last modification time."""
+    micros = int(_as_utc(updated_at).timestamp() * 1_000_000)
+    return f'"{micros:x}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date (RFC 9110 IMF-fixdate)."""
+    return format_datetime(_as_utc(value).astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(
+    headers: Mapping[str, str], etag: str, last_modified: datetime
+) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since for a GET request.
+
+    If-None-Match takes precedence when both are present, as required by
+    RFC 9110.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
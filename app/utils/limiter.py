@@ -0,0 +1,151 @@
+"""Adaptive (AIMD) concurrency limiting for calls to a slow dependency."""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional
+
+
+class ConcurrencyLimitError(Exception):
+    """Raised when too many callers are already waiting for a slot."""
+
+    pass
+
+
+@dataclass
+class LimiterSnapshot:
+    """Point-in-time view of an adaptive limiter."""
+
+    limit: int
+    in_flight: int
+    waiting: int
+    baseline_latency: Optional[float]
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts to observed latency and errors.
+
+    The limit grows by roughly one for every ``limit`` successful calls made
+    while it was saturated (additive increase). An error, or a success slower
+    than ``tolerance`` times the smoothed baseline latency, multiplies it by
+    ``backoff`` (multiplicative decrease). Decreases are spaced by at least
+    one baseline latency so a burst of failures from calls that were already
+    in flight only counts once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        backoff: float = 0.5,
+        tolerance: float = 2.0,
+        smoothing: float = 0.05,
+        max_waiting: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min <= initial <= max")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.max_waiting = max_waiting
+        self._clock = clock
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of slots currently held."""
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers queued for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot; every acquire must be paired with release."""
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+        if self.max_waiting is not None and len(self._waiters) >= self.max_waiting:
+            raise ConcurrencyLimitError(
+                f"{len(self._waiters)} calls already waiting for a slot"
+            )
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we were cancelled
+                self._release_slot()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, failed: bool = False) -> None:
+        """Return a slot, reporting a success's latency or a failure.
+
+        Calls released with neither (e.g. cancelled ones) do not move the
+        limit.
+        """
+        if failed:
+            self._decrease()
+        elif latency is not None:
+            self._observe(latency)
+        self._release_slot()
+
+    def snapshot(self) -> LimiterSnapshot:
+        """Return the current limit, usage and baseline latency."""
+        return LimiterSnapshot(
+            limit=self.limit,
+            in_flight=self._in_flight,
+            waiting=len(self._waiters),
+            baseline_latency=self._baseline,
+        )
+
+    def _observe(self, latency: float) -> None:
+        baseline = self._baseline
+        if baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline = baseline + self.smoothing * (latency - baseline)
+        if baseline is not None and latency > self.tolerance * baseline:
+            self._decrease()
+        elif self._in_flight >= self.limit:
+            # Only grow while the limit is what constrains throughput
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._wake()
+
+    def _decrease(self) -> None:
+        now = self._clock()
+        if now - self._last_decrease < (self._baseline or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to queued callers in arrival order."""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
@@ -0,0 +1,139 @@
+"""Event-loop lag sampling and stall detection.
+
+A watchdog thread keeps pinging the event loop and measures how long each
+ping waits to run; that delay is the loop's lag. If a ping has not
+run within the stall threshold, something is blocking the loop right now,
+so the watchdog captures the loop thread's current stack, which points at
+the blocking call.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoopStall:
+    """A period during which the event loop did not run callbacks."""
+
+    started_at: float
+    duration: float
+    stack: str
+
+
+class LoopMonitor:
+    """Measures event-loop lag and records stacks of loop stalls."""
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        stall_threshold: float = 0.1,
+        max_stalls: int = 20,
+        on_lag: Optional[Callable[[float], None]] = None,
+        on_stall: Optional[Callable[[LoopStall], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.on_lag = on_lag
+        self.on_stall = on_stall
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._stalls: Deque[LoopStall] = deque(maxlen=max_stalls)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+
+    @property
+    def stalls(self) -> List[LoopStall]:
+        """Most recent stalls, oldest first."""
+        return list(self._stalls)
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watchdog thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.stall_threshold + 1)
+            self._thread = None
+
+    def _watch(self) -> None:
+        # Ping often enough that no stall past the threshold goes unseen,
+        # but only report lag once per interval (and for every stall)
+        period = min(self.interval, self.stall_threshold / 2)
+        next_report = 0.0
+        while not self._stop.wait(period):
+            result = self._ping()
+            if result is None:
+                return
+            lag, stalled = result
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            now = time.monotonic()
+            if self.on_lag is not None and (stalled or now >= next_report):
+                self.on_lag(lag)
+                next_report = now + self.interval
+
+    def _ping(self) -> Optional[Tuple[float, bool]]:
+        """Time one round trip through the loop; None once it is gone.
+
+        Returns:
+            The lag and whether it was long enough to count as a stall.
+        """
+        ran = threading.Event()
+        ran_at = 0.0
+
+        def beat() -> None:
+            nonlocal ran_at
+            ran_at = time.monotonic()
+            ran.set()
+
+        loop = self._loop
+        if loop is None:
+            return None
+        sent = time.monotonic()
+        try:
+            loop.call_soon_threadsafe(beat)
+        except RuntimeError:
+            return None
+
+        if ran.wait(self.stall_threshold):
+            return ran_at - sent, False
+
+        # Blocked right now: the loop thread's stack shows the culprit
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        while not ran.wait(self.interval):
+            if self._stop.is_set():
+                return None
+        self._record_stall(LoopStall(time.time(), ran_at - sent, stack))
+        return ran_at - sent, True
+
+    def _record_stall(self, stall: LoopStall) -> None:
+        self._stalls.append(stall)
+        logger.warning(
+            "Event loop blocked for %.3fs, loop thread stack:\n%s",
+            stall.duration,
+            stall.stack,
+        )
+        if self.on_stall is not None:
+            self.on_stall(stall)
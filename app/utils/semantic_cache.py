@@ -0,0 +1,339 @@
+"""Near-duplicate query cache backed by a local vector index.
+
+Queries are embedded without any network call: words are normalized
+(stop words dropped, plurals and a few travel synonyms folded), then the
+words and their character trigrams are hashed into a fixed-size signed
+vector. Cosine similarity between such vectors tracks word overlap closely
+enough to match rephrasings such as "3 days in Paris with kids" and "Paris
+3-day trip for family with children". ``numpy`` is optional; without it the
+cache is unavailable. It is imported on first use, so importing this module
+stays cheap while the cache is disabled.
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS = frozenset(
+    "a about an and any are as at be by can could do for from give have help i"
+    " in into is it its me my need of on or our out over please plan planning"
+    " some suggest that the this to trip trips travel us want we what with"
+    " would you itinerary itineraries".split()
+)
+# Words folded together so that common rephrasings share features
+SYNONYMS = {
+    "kid": "family",
+    "child": "family",
+    "children": "family",
+    "toddler": "family",
+    "families": "family",
+    "night": "day",
+    "vacation": "holiday",
+    "cheap": "budget",
+    "affordable": "budget",
+    "inexpensive": "budget",
+    "luxurious": "luxury",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+# Character trigrams count less than whole words
+TRIGRAM_WEIGHT = 0.35
+
+
+class SemanticCacheError(Exception):
+    """Raised when the semantic cache cannot be used or persisted."""
+
+    pass
+
+
+def numpy_available() -> bool:
+    """Whether the optional numpy package is installed."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _numpy() -> Any:
+    """The numpy module, imported on first use.
+
+    Raises:
+        SemanticCacheError: If numpy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise SemanticCacheError("numpy is required for the semantic cache") from e
+    return numpy
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized content words of text, in order."""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if not word.isdigit() and len(word) > 3:
+            if word.endswith("ies"):
+                word = word[:-3] + "y"
+            elif word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+        tokens.append(SYNONYMS.get(word, word))
+    return tokens
+
+
+def query_numbers(text: str) -> FrozenSet[str]:
+    """Numbers mentioned in text; queries only match if these are equal."""
+    return frozenset(word for word in _WORD.findall(text) if word.isdigit())
+
+
+class HashingEncoder:
+    """Embeds text as L2-normalized hashed word and trigram vectors."""
+
+    def __init__(self, dimensions: int = 1024) -> None:
+        _numpy()
+        if dimensions <= 0:
+            raise ValueError("dimensions must be positive")
+        self.dimensions = dimensions
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            # The top bit picks a sign so that collisions tend to cancel out
+            bucket = (value % self.dimensions, -1.0 if value >> 63 else 1.0)
+            if len(self._buckets) < 100_000:
+                self._buckets[feature] = bucket
+        return bucket
+
+    def features(self, text: str) -> Dict[str, float]:
+        """Weighted features of text: its words and their trigrams."""
+        weights: Dict[str, float] = {}
+        for token in tokenize(text):
+            weights[f"w:{token}"] = weights.get(f"w:{token}", 0.0) + 1.0
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                trigram = f"c:{padded[i:i + 3]}"
+                weights[trigram] = weights.get(trigram, 0.0) + TRIGRAM_WEIGHT
+        return weights
+
+    def encode(self, texts: Sequence[str]) -> Any:
+        """Embed texts as the rows of a float32 matrix."""
+        np = _numpy()
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self.features(text).items():
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class VectorIndex:
+    """Bounded matrix of unit vectors with brute-force cosine search.
+
+    Rows are allocated as needed up to ``capacity``; once full, each new
+    vector replaces the oldest one.
+    """
+
+    def __init__(self, dimensions: int, capacity: int) -> None:
+        np = _numpy()
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.dimensions = dimensions
+        self.capacity = capacity
+        self.size = 0
+        self._next = 0
+        self._vectors = np.zeros((min(capacity, 64), dimensions), dtype=np.float32)
+
+    def add(self, vector: Any) -> int:
+        """Store a vector, returning the slot it was stored in."""
+        np = _numpy()
+        slot = self._next
+        if slot >= len(self._vectors):
+            grown = np.zeros(
+                (min(self.capacity, 2 * len(self._vectors)), self.dimensions),
+                dtype=np.float32,
+            )
+            grown[: self.size] = self._vectors[: self.size]
+            self._vectors = grown
+        self._vectors[slot] = vector
+        self._next = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return slot
+
+    def search(self, queries: Any, k: int = 1) -> Tuple[Any, Any]:
+        """Top-k cosine similarities and slots for each row of queries.
+
+        Both results have one row per query, best match first.
+        """
+        np = _numpy()
+        k = min(k, self.size)
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        scores = queries @ self._vectors[: self.size].T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return (
+            np.take_along_axis(top_scores, order, axis=1),
+            np.take_along_axis(top, order, axis=1),
+        )
+
+    def state(self) -> Dict[str, Any]:
+        """Arrays and positions needed to restore the index."""
+        return {"vectors": self._vectors[: self.size], "next": self._next}
+
+    def restore(self, vectors: Any, next_slot: int) -> None:
+        """Replace the contents with vectors saved by ``state``."""
+        np = _numpy()
+        if vectors.shape[1] != self.dimensions:
+            raise SemanticCacheError(
+                f"Saved vectors have {vectors.shape[1]} dimensions,"
+                f" expected {self.dimensions}"
+            )
+        vectors = vectors[: self.capacity]
+        self._vectors = np.zeros(
+            (max(len(vectors), min(self.capacity, 64)), self.dimensions),
+            dtype=np.float32,
+        )
+        self._vectors[: len(vectors)] = vectors
+        self.size = len(vectors)
+        self._next = next_slot % self.capacity if self.size else 0
+
+
+class SemanticCache:
+    """Maps queries to responses of earlier queries that mean the same thing.
+
+    A lookup returns the response of the most similar stored query if their
+    cosine similarity is at least ``threshold``, they were stored under the
+    same namespace (prompt templates and model), they mention the same
+    numbers and the entry is younger than ``ttl_seconds``. Its methods may be
+    called from worker threads; a lock keeps the index consistent.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_size: int = 10000,
+        ttl_seconds: float = 86400.0,
+        dimensions: int = 1024,
+        candidates: int = 5,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.candidates = candidates
+        self.encoder = HashingEncoder(dimensions)
+        self.index = VectorIndex(dimensions, max_size)
+        self.hits = 0
+        self.misses = 0
+        self._entries: List[Tuple[str, str, FrozenSet[str], float]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of indexed queries."""
+        return self.index.size
+
+    def lookup(self, query: str, namespace: str = "") -> Optional[str]:
+        """Response of a stored near-duplicate of query, if any."""
+        match = self.lookup_many([query], namespace)[0]
+        return None if match is None else match[0]
+
+    def lookup_many(
+        self, queries: Sequence[str], namespace: str = ""
+    ) -> List[Optional[Tuple[str, float]]]:
+        """Best acceptable (response, similarity) for each query, if any."""
+        if not queries:
+            return []
+        vectors = self.encoder.encode(queries)
+        with self._lock:
+            scores, slots = self.index.search(vectors, self.candidates)
+            entries = [[self._entries[slot] for slot in row] for row in slots]
+        oldest = time.time() - self.ttl_seconds
+        results: List[Optional[Tuple[str, float]]] = []
+        for query, row_scores, row_entries in zip(queries, scores, entries):
+            numbers = query_numbers(query)
+            match = None
+            for score, entry in zip(row_scores, row_entries):
+                if score < self.threshold:
+                    break
+                response, entry_namespace, entry_numbers, created = entry
+                if (
+                    entry_namespace == namespace
+                    and entry_numbers == numbers
+                    and created >= oldest
+                ):
+                    match = (response, float(score))
+                    break
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            results.append(match)
+        return results
+
+    def add(self, query: str, response: str, namespace: str = "") -> None:
+        """Store the response generated for query."""
+        vector = self.encoder.encode([query])[0]
+        entry = (response, namespace, query_numbers(query), time.time())
+        with self._lock:
+            slot = self.index.add(vector)
+            if slot == len(self._entries):
+                self._entries.append(entry)
+            else:
+                self._entries[slot] = entry
+
+    def save(self, path: str) -> None:
+        """Write the cache to path, replacing it atomically."""
+        np = _numpy()
+        with self._lock:
+            state = self.index.state()
+            vectors = state["vectors"].copy()
+            entries = [
+                [response, namespace, sorted(numbers), created]
+                for response, namespace, numbers, created in self._entries
+            ]
+        meta = json.dumps({"next": state["next"], "entries": entries})
+        target = Path(path)
+        temporary = target.with_name(target.name + ".tmp")
+        try:
+            with open(temporary, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    vectors=vectors,
+                    meta=np.frombuffer(meta.encode("utf-8"), dtype=np.uint8),
+                )
+            os.replace(temporary, target)
+        except OSError as e:
+            raise SemanticCacheError(f"Failed to save semantic cache: {str(e)}") from e
+
+    def load(self, path: str) -> None:
+        """Replace the cache contents with those saved at path."""
+        np = _numpy()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        except (OSError, KeyError, ValueError) as e:
+            raise SemanticCacheError(f"Failed to load semantic cache: {str(e)}") from e
+        entries = meta["entries"]
+        if len(entries) != len(vectors):
+            raise SemanticCacheError("Semantic cache file is inconsistent")
+        with self._lock:
+            self.index.restore(vectors, meta["next"])
+            self._entries = [
+                (response, namespace, frozenset(numbers), created)
+                for response, namespace, numbers, created in entries[: self.index.size]
+            ]
+        logger.info("Loaded %d semantic cache entries from %s", len(self), path)
@@ -0,0 +1,60 @@
+"""Single-flight coalescing of concurrent identical async calls."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """An in-flight call shared by one or more waiters."""
+
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, T]):
+    """Run at most one call per key at a time and share its outcome.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it is running await the same task. Results and exceptions
+    are delivered to every waiter. Cancelling a waiter only detaches that
+    waiter; the shared task is cancelled once no waiters are left.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[K, _Call[T]] = {}
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the call already in flight for it."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to read the result
+                self._forget(key, call)
+                call.task.cancel()
+
+    def waiters(self, key: K) -> int:
+        """Number of callers currently waiting on key."""
+        call = self._calls.get(key)
+        return call.waiters if call else 0
+
+    def __len__(self) -> int:
+        """Number of keys with a call in flight."""
+        return len(self._calls)
+
+    def _forget(self, key: K, call: _Call[T]) -> None:
+        """Remove call from the in-flight table if it is still registered."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
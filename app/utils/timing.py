@@ -1,25 +1,25 @@
-import asyncio
 import functools
 import time
 from typing import Any, Callable, TypeVar
 
+from ..metrics import function_duration
+
 T = TypeVar("T", bound=Callable[..., Any])
 
 
 def timed_async(name: str = "") -> Callable[[T], T]:
-    """Decorator for timing async functions."""
+    """Decorator recording an async function's duration as a metric."""
 
     def decorator(func: T) -> T:
+        histogram = function_duration.labels(name=name or func.__qualname__)
+
         @functools.wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = asyncio.get_event_loop().time()
+            start_time = time.perf_counter()
             try:
-                result = await func(*args, **kwargs)
-                return result
+                return await func(*args, **kwargs)
             finally:
-                end_time = asyncio.get_event_loop().time()
-                operation_name = name or func.__name__
-                print(f"{operation_name} took {end_time - start_time:.2f} seconds")
+                histogram.observe(time.perf_counter() - start_time)
 
         return wrapper  # type: ignore
 
@@ -27,19 +27,18 @@ def timed_async(name: str = "") -> Callable[[T], T]:
 
 
 def timed_sync(name: str = "") -> Callable[[T], T]:
-    """Decorator for timing synchronous functions."""
+    """Decorator recording a synchronous function's duration as a metric."""
 
     def decorator(func: T) -> T:
+        histogram = function_duration.labels(name=name or func.__qualname__)
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
-                result = func(*args, **kwargs)
-                return result
+                return func(*args, **kwargs)
             finally:
-                end_time = time.time()
-                operation_name = name or func.__name__
-                print(f"{operation_name} took {end_time - start_time:.2f} seconds")
+                histogram.observe(time.perf_counter() - start_time)
 
         return wrapper  # type: ignore
 
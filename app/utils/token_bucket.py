@@ -0,0 +1,59 @@
+"""Token bucket for smoothing usage against a per-minute quota."""
+
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    A single take may exceed the capacity; it waits for a full bucket and
+    then leaves it in debt, so oversized requests still get through without
+    exceeding the long-run rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available (negative while in debt)."""
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken, 0 if it can be taken now."""
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Remove amount tokens; callers check ``wait_time`` first."""
+        self._refill()
+        self._tokens -= amount
+
+    def give(self, amount: float) -> None:
+        """Return unused tokens, e.g. after over-estimating a request."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream reported throttling."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
@@ -0,0 +1,313 @@
+"""Write-behind batching of itinerary row writes.
+
+Each request inserts its row and later stores its response, and written one
+by one every write is a transaction and a commit of its own. A
+``WriteBuffer`` holds writes for a short interval, or until ``max_batch``
+rows are pending, and commits them together in one transaction: a
+multi-row ``INSERT ... RETURNING`` for new rows and, on Postgres, one
+``UPDATE ... FROM (VALUES ...)`` per set of updated columns.
+
+Per write, callers choose to wait until it is committed (``durable=True``)
+or to return at once (fire-and-forget; failures are logged and counted).
+Updates of a row still waiting to be inserted are folded into its insert,
+and updates of a row already waiting into one, so each row ends up as if
+its writes had run in order. When disabled, every write runs at once in its
+own transaction.
+"""
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import uuid6
+from sqlalchemy import ColumnElement, cast, column, insert, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import DatabaseSessionManager
+from .metrics import db_write_buffer_batch_size, db_write_buffer_failures
+from .models import ItineraryQuery, ItineraryStatus, ids_created_range
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBufferError(Exception):
+    """Raised when buffered writes cannot be committed."""
+
+    pass
+
+
+@dataclass
+class _PendingWrite:
+    """Column values waiting to be written to one row."""
+
+    values: Dict[str, Any]
+    done: "asyncio.Future[Optional[ItineraryQuery]]" = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+    # Consistency token of the committed batch, for the waiting request
+    token: Optional[str] = None
+
+
+def _retrieve(future: "asyncio.Future[Any]") -> None:
+    """Mark a failure as seen; it is logged once per batch by the flush."""
+    if not future.cancelled():
+        future.exception()
+
+
+def _column_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Values keyed by mapped column, with the response in its storage format."""
+    if "itinerary_response" in values:
+        values = dict(values)
+        values.update(ItineraryQuery.response_values(values.pop("itinerary_response")))
+    return values
+
+
+def _by_columns(rows: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split rows into groups that set the same columns, in order."""
+    groups: Dict[frozenset[str], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return list(groups.values())
+
+
+def _created_between(ids: Sequence[Any]) -> List[ColumnElement[bool]]:
+    """A created_at range holding all ids, so older partitions are skipped."""
+    created = ids_created_range(ids)
+    if created is None:
+        return []
+    return [ItineraryQuery.created_at.between(*created)]
+
+
+class WriteBuffer:
+    """Groups itinerary inserts and updates from concurrent requests."""
+
+    def __init__(
+        self,
+        sessions: DatabaseSessionManager,
+        enabled: bool = False,
+        max_batch: int = 200,
+        interval: float = 0.005,
+    ) -> None:
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.sessions = sessions
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.interval = interval
+        self._inserts: Dict[Any, _PendingWrite] = {}
+        self._updates: Dict[Any, _PendingWrite] = {}
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def size(self) -> int:
+        """Number of rows with writes waiting to be flushed."""
+        return len(self._inserts) + len(self._updates)
+
+    async def insert(
+        self, values: Dict[str, Any], durable: bool = True
+    ) -> ItineraryQuery:
+        """Insert a row with column values.
+
+        Buffered rows get their id and timestamps here. Without ``durable``
+        the returned row is built from the values and may not be committed
+        yet.
+
+        Raises:
+            WriteBufferError: If a durable insert cannot be committed.
+        """
+        if not self.enabled:
+            async with self.sessions.session(mode="write") as db:
+                return await ItineraryQuery.insert(db, **_column_values(values))
+
+        now = datetime.now(timezone.utc)
+        values = {
+            "id": uuid6.uuid7(),
+            "status": ItineraryStatus.QUEUED.value,
+            "created_at": now,
+            "updated_at": now,
+            **_column_values(values),
+        }
+        pending = _PendingWrite(values)
+        self._inserts[values["id"]] = pending
+        self._enqueued(pending)
+        if durable:
+            row = await asyncio.shield(pending.done)
+            self.sessions.track_write(pending.token)
+            if row is not None:
+                return row
+        return ItineraryQuery(**values)
+
+    async def update(
+        self, id: Any, values: Dict[str, Any], durable: bool = True
+    ) -> Optional[ItineraryQuery]:
+        """Update column values of one row by ID.
+
+        Returns the updated row, or None if there is none; always None
+        without ``durable``.
+
+        Raises:
+            WriteBufferError: If a durable update cannot be committed.
+        """
+        if not self.enabled:
+            async with self.sessions.session(mode="write") as db:
+                return await ItineraryQuery.update_by_id(db, id, **values)
+
+        values = _column_values(values)
+        pending = self._inserts.get(id) or self._updates.get(id)
+        if pending is not None:
+            pending.values.update(values)
+        else:
+            pending = _PendingWrite(values)
+            self._updates[id] = pending
+            self._enqueued(pending)
+        if durable:
+            row = await asyncio.shield(pending.done)
+            self.sessions.track_write(pending.token)
+            return row
+        return None
+
+    async def set_response(
+        self,
+        id: Any,
+        response: str,
+        status: ItineraryStatus = ItineraryStatus.DONE,
+        durable: bool = True,
+    ) -> Optional[ItineraryQuery]:
+        """Store the itinerary response of a row by ID."""
+        return await self.update(
+            id, {"itinerary_response": response, "status": status.value}, durable
+        )
+
+    async def set_status(
+        self,
+        id: Any,
+        status: ItineraryStatus,
+        error_message: Optional[str] = None,
+        durable: bool = True,
+    ) -> Optional[ItineraryQuery]:
+        """Update the generation status of a row by ID."""
+        return await self.update(
+            id, {"status": status.value, "error_message": error_message}, durable
+        )
+
+    def _enqueued(self, pending: _PendingWrite) -> None:
+        """Schedule a flush for a newly pending row."""
+        pending.done.add_done_callback(_retrieve)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._pending.set()
+        if self.size >= self.max_batch:
+            self._full.set()
+
+    async def _run(self) -> None:
+        """Flush whenever writes are pending, after letting others join."""
+        while True:
+            await self._pending.wait()
+            if self.size < self.max_batch:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+            # Cancelling the loop must not abort a batch being committed
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> None:
+        """Commit all pending writes now."""
+        async with self._flush_lock:
+            inserts, self._inserts = self._inserts, {}
+            updates, self._updates = self._updates, {}
+            self._pending.clear()
+            self._full.clear()
+            batch = list(inserts.items()) + list(updates.items())
+            if not batch:
+                return
+            db_write_buffer_batch_size.observe(len(batch))
+            try:
+                rows = await self._write(inserts, updates)
+            except Exception as e:
+                db_write_buffer_failures.inc(len(batch))
+                logger.warning("Could not write %d buffered rows: %s", len(batch), e)
+                error = WriteBufferError(f"Failed to write buffered rows: {str(e)}")
+                error.__cause__ = e
+                for _, pending in batch:
+                    if not pending.done.done():
+                        pending.done.set_exception(error)
+                return
+            # The batch was written in this task, which holds its token
+            token = self.sessions.consistency_token()
+            for id, pending in batch:
+                pending.token = token
+                if not pending.done.done():
+                    pending.done.set_result(rows.get(id))
+
+    async def _write(
+        self, inserts: Dict[Any, _PendingWrite], updates: Dict[Any, _PendingWrite]
+    ) -> Dict[Any, ItineraryQuery]:
+        """Write a batch in one transaction; returns the written rows by ID."""
+        rows: Dict[Any, ItineraryQuery] = {}
+        async with self.sessions.session(mode="write") as db:
+            for group in _by_columns([p.values for p in inserts.values()]):
+                stmt = insert(ItineraryQuery).returning(
+                    ItineraryQuery, sort_by_parameter_order=True
+                )
+                for row in await db.scalars(stmt, group):
+                    rows[row.id] = row
+            for group in _by_columns(
+                [{"id": id, **p.values} for id, p in updates.items()]
+            ):
+                for row in await self._update_group(db, group):
+                    rows[row.id] = row
+            await db.commit()
+        return rows
+
+    async def _update_group(
+        self, db: AsyncSession, group: List[Dict[str, Any]]
+    ) -> Sequence[ItineraryQuery]:
+        """Apply updates that set the same columns, returning updated rows."""
+        keys = [key for key in group[0] if key != "id"]
+        if db.get_bind().dialect.name != "postgresql":
+            # One statement per row, still committed together
+            updated: List[ItineraryQuery] = []
+            for row in group:
+                result = await db.scalars(
+                    update(ItineraryQuery)
+                    .where(ItineraryQuery.id == row["id"])
+                    .values({key: row[key] for key in keys})
+                    .returning(ItineraryQuery)
+                )
+                updated.extend(result.all())
+            return updated
+
+        mapped = ItineraryQuery.__mapper__.columns
+        changes = values(
+            *(column(key, mapped[key].type) for key in ["id", *keys]),
+            name="changes",
+        ).data([tuple(row[key] for key in ["id", *keys]) for row in group])
+        stmt = (
+            update(ItineraryQuery)
+            .where(
+                ItineraryQuery.id == changes.c.id,
+                *_created_between([row["id"] for row in group]),
+            )
+            # VALUES renders None as an untyped NULL
+            .values({key: cast(changes.c[key], mapped[key].type) for key in keys})
+            .returning(ItineraryQuery)
+        )
+        result = await db.scalars(
+            select(ItineraryQuery)
+            .from_statement(stmt)
+            .execution_options(populate_existing=True)
+        )
+        return result.all()
+
+    async def close(self) -> None:
+        """Stop the flush task and commit whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
@@ -0,0 +1,5 @@
+"""Benchmarks for the itinerary planner.
+
+Run each module from the repository root, e.g.
+``python -m benchmarks.compression --help``.
+"""
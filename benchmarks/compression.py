@@ -0,0 +1,133 @@
+"""Size and latency benchmark for itinerary response codecs.
+
+Compares plain text, zlib and zstd (with and without a trained dictionary)
+on a corpus of itinerary responses. The corpus is either an NDJSON file
+produced by ``GET /itinerary/export`` or a deterministic synthetic sample.
+The dictionary is trained on the first half of the corpus and measured on
+the second half, so its gain is not flattered by training on test data.
+
+    python -m benchmarks.compression --corpus export.ndjson --json out.json
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.utils.compression import TextCodec, train_dictionary, zstd_available
+
+ACTIVITIES = [
+    "Breakfast at a local cafe near the hotel",
+    "Guided walking tour of the old town",
+    "Visit the main art museum; book tickets in advance",
+    "Lunch at a traditional market hall",
+    "Afternoon boat ride along the river",
+    "Free time for shopping in the design district",
+    "Sunset at the viewpoint overlooking the city",
+    "Dinner at a family-run restaurant serving regional dishes",
+    "Day trip by train to a nearby coastal village",
+    "Cooking class focused on seasonal produce",
+]
+CITIES = ["Paris", "Rome", "Lisbon", "Kyoto", "Oslo", "Cusco", "Hanoi", "Prague"]
+
+
+def synthetic_corpus(size: int, seed: int = 7) -> List[str]:
+    """Generate itinerary-like responses with realistic repetition."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        city = rng.choice(CITIES)
+        lines = [f"# {rng.randint(2, 10)}-day itinerary for {city}", ""]
+        for day in range(1, rng.randint(3, 10) + 1):
+            lines.append(f"## Day {day}")
+            hour = 8
+            for activity in rng.sample(ACTIVITIES, k=rng.randint(4, 7)):
+                lines.append(f"- {hour:02d}:00 - {activity} in {city}.")
+                hour += rng.randint(1, 3)
+            lines.append("")
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def load_corpus(path: Path) -> List[str]:
+    """Read responses from an NDJSON export."""
+    corpus = []
+    with path.open() as f:
+        for line in f:
+            response = json.loads(line).get("itinerary_response")
+            if response:
+                corpus.append(response)
+    return corpus
+
+
+def measure(codec: TextCodec, corpus: List[str]) -> Dict[str, Any]:
+    """Encode and decode every document, returning size and timing stats."""
+    start = time.perf_counter()
+    encoded = [codec.encode(text) for text in corpus]
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_s = time.perf_counter() - start
+
+    raw_bytes = sum(len(text.encode("utf-8")) for text in corpus)
+    stored_bytes = sum(len(data) for data in encoded)
+    return {
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "ratio": round(raw_bytes / stored_bytes, 3),
+        "encode_us_per_doc": round(encode_s / len(corpus) * 1e6, 2),
+        "decode_us_per_doc": round(decode_s / len(corpus) * 1e6, 2),
+    }
+
+
+def run(corpus: List[str], dictionary_size: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmark every available codec configuration."""
+    train, test = corpus[: len(corpus) // 2], corpus[len(corpus) // 2 :]
+    configs: Dict[str, Optional[TextCodec]] = {
+        "none": TextCodec("none"),
+        "zlib-1": TextCodec("zlib", level=1),
+        "zlib-6": TextCodec("zlib", level=6),
+        "zstd-3": TextCodec("zstd", level=3) if zstd_available() else None,
+        "zstd-3-dict": (
+            TextCodec(
+                "zstd", level=3, dictionary=train_dictionary(train, dictionary_size)
+            )
+            if zstd_available()
+            else None
+        ),
+    }
+    return {name: measure(codec, test) for name, codec in configs.items() if codec}
+
+
+def main() -> None:
+    """Parse command line arguments, run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--corpus", type=Path, help="NDJSON export to use")
+    parser.add_argument("--synthetic-size", type=int, default=2000)
+    parser.add_argument("--dictionary-size", type=int, default=64 * 1024)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    corpus = (
+        load_corpus(args.corpus)
+        if args.corpus
+        else synthetic_corpus(args.synthetic_size)
+    )
+    results = run(corpus, args.dictionary_size)
+
+    print(f"{'codec':<12} {'ratio':>7} {'stored':>12} {'enc us':>9} {'dec us':>9}")
+    for name, stats in results.items():
+        print(
+            f"{name:<12} {stats['ratio']:>7} {stats['stored_bytes']:>12} "
+            f"{stats['encode_us_per_doc']:>9} {stats['decode_us_per_doc']:>9}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Deterministic fake LLM provider for load tests and benchmarks.
+
+Latency, output size and error rate are configurable. Responses depend only
+on the prompt, and latencies and errors come from a seeded generator, so two
+runs with the same configuration see the same workload.
+
+    from benchmarks.fake_llm import FakeLLMConfig, register_fake_provider
+
+    register_fake_provider(FakeLLMConfig(latency="lognormal", latency_ms=800))
+    # then create the service with provider name "fake" (LLM_PROVIDER=fake)
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, ClassVar, Type
+
+from app.services.llm import LLMFactory, LLMProvider
+
+WORDS = (
+    "morning visit museum lunch market walk river dinner old town tour "
+    "garden cafe train station viewpoint sunset breakfast gallery square"
+).split()
+
+
+class FakeLLMError(Exception):
+    """Injected failure of the fake provider."""
+
+    pass
+
+
+@dataclass
+class FakeLLMConfig:
+    """Workload generated by the fake provider.
+
+    ``latency`` is ``constant``, ``uniform`` (0 to twice ``latency_ms``) or
+    ``lognormal`` (median ``latency_ms``, shape ``latency_sigma``), which has
+    the long tail of real LLM APIs.
+    """
+
+    latency: str = "lognormal"
+    latency_ms: float = 500.0
+    latency_sigma: float = 0.5
+    output_chars: int = 4000
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class FakeLLMProvider(LLMProvider):
+    """LLM provider that sleeps and returns canned text."""
+
+    config: ClassVar[FakeLLMConfig] = FakeLLMConfig()
+    calls: ClassVar[int] = 0
+    _rng: ClassVar[random.Random] = random.Random(0)
+
+    async def initialize(self, api_key: str, **kwargs: Any) -> None:
+        """Nothing to initialize."""
+        pass
+
+    async def generate_text(self, prompt: str) -> str:
+        """Sleep for a sampled latency, then return text for prompt."""
+        cls = type(self)
+        cls.calls += 1
+        delay, fail = self._sample()
+        await asyncio.sleep(delay)
+        if fail:
+            raise FakeLLMError("Injected fake LLM failure")
+        return self._text(prompt)
+
+    def _sample(self) -> tuple[float, bool]:
+        config, rng = self.config, self._rng
+        median = config.latency_ms / 1000
+        if config.latency == "constant":
+            delay = median
+        elif config.latency == "uniform":
+            delay = rng.uniform(0, 2 * median)
+        elif config.latency == "lognormal":
+            delay = rng.lognormvariate(math.log(median), config.latency_sigma)
+        else:
+            raise ValueError(f"Unknown latency distribution: {config.latency}")
+        return delay, rng.random() < config.error_rate
+
+    def _text(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        rng = random.Random(digest)
+        words = []
+        length = 0
+        while length < self.config.output_chars:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)[: self.config.output_chars]
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    @property
+    def model_name(self) -> str:
+        return f"fake-{self.config.latency}-{self.config.latency_ms:g}ms"
+
+
+def register_fake_provider(
+    config: FakeLLMConfig, name: str = "fake"
+) -> Type[FakeLLMProvider]:
+    """Register a fake provider class configured with config under name."""
+    provider = type(
+        "ConfiguredFakeLLMProvider",
+        (FakeLLMProvider,),
+        {"config": config, "calls": 0, "_rng": random.Random(config.seed)},
+    )
+    LLMFactory.register_provider(name, provider)
+    return provider
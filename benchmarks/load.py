@@ -0,0 +1,280 @@
+"""Load test of the itinerary API against a deterministic fake LLM.
+
+Drives ``POST /itinerary/`` and ``GET /itinerary/{id}`` through the ASGI app
+in-process (no network, no server) at a fixed concurrency, against Postgres
+or a throwaway SQLite file, and reports throughput, latency percentiles and
+DB pool checkout wait. Results can be written as JSON and compared with an
+earlier run to catch regressions.
+
+    python -m benchmarks.load --database sqlite --requests 2000 --json run.json
+    python -m benchmarks.load --database "$DATABASE_URL" --baseline run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+CITIES = ["Paris", "Rome", "Lisbon", "Kyoto", "Oslo", "Cusco", "Hanoi", "Prague"]
+
+# Report values where higher is worse, compared against a baseline
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def configure_environment(database: str) -> str:
+    """Point the app at the benchmark database and fake provider.
+
+    Must run before the app first reads its settings. Tables are created
+    at startup, since a fresh database has no migrations applied. Returns
+    the database URL used.
+    """
+    if database == "sqlite":
+        path = Path(tempfile.mkdtemp(prefix="itinerary-bench-")) / "bench.db"
+        database = f"sqlite+aiosqlite:///{path}"
+    os.environ["DATABASE_URL"] = database
+    for name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ["GEMINI_API_KEY"] = os.environ.get("GEMINI_API_KEY") or "benchmark"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_ROUTES"] = "{}"
+    os.environ["DB_CREATE_ALL"] = "true"
+    return database
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    """Latency percentiles of a list of durations, in milliseconds."""
+    if not seconds:
+        return {}
+    ordered = sorted(seconds)
+
+    def at(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p * len(ordered)) - 1))
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _histogram_state(child: Any) -> Tuple[List[int], float]:
+    return list(child.counts), child.sum
+
+
+def pool_wait(
+    before: Dict[str, Tuple[List[int], float]],
+    after: Dict[str, Tuple[List[int], float]],
+    bounds: Tuple[float, ...],
+) -> Dict[str, Dict[str, float]]:
+    """Checkout wait per pool between two histogram snapshots.
+
+    p95 is the upper bound of the bucket holding the 95th percentile.
+    """
+    report = {}
+    for pool, (counts, total) in after.items():
+        old_counts, old_total = before[pool]
+        deltas = [new - old for new, old in zip(counts, old_counts)]
+        count = sum(deltas)
+        if not count:
+            continue
+        p95 = float("inf")
+        seen = 0
+        for bound, delta in zip(bounds + (float("inf"),), deltas):
+            seen += delta
+            if seen >= 0.95 * count:
+                p95 = bound
+                break
+        report[pool] = {
+            "checkouts": count,
+            "mean_ms": round((total - old_total) / count * 1000, 3),
+            "p95_le_ms": round(p95 * 1000, 3),
+        }
+    return report
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the configured workload and return the report."""
+    # Imported here: the environment must be configured first
+    from app.metrics import db_checkout_wait
+    from benchmarks.fake_llm import FakeLLMConfig, register_fake_provider
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        output_chars=args.output_chars,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    provider = register_fake_provider(config)
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    ids: List[str] = []
+    samples: Dict[str, List[float]] = {"create": [], "get": []}
+    statuses: Counter[str] = Counter()
+    remaining = args.requests
+
+    def next_query() -> str:
+        city = CITIES[rng.randrange(len(CITIES))]
+        return f"{rng.randint(1, 7)} days in {city}, plan #{rng.randrange(args.unique)}"
+
+    async def create(client: httpx.AsyncClient) -> None:
+        start = time.perf_counter()
+        response = await client.post("/itinerary/", json={"query": next_query()})
+        samples["create"].append(time.perf_counter() - start)
+        statuses[f"create {response.status_code}"] += 1
+        if response.status_code == 201:
+            ids.append(response.json()["id"])
+
+    async def get(client: httpx.AsyncClient) -> None:
+        start = time.perf_counter()
+        response = await client.get(f"/itinerary/{rng.choice(ids)}")
+        samples["get"].append(time.perf_counter() - start)
+        statuses[f"get {response.status_code}"] += 1
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            if ids and rng.random() < args.get_ratio:
+                await get(client)
+            else:
+                await create(client)
+
+    pools = ("read", "write")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for _ in range(args.warmup):
+                await create(client)
+            for recorded in samples.values():
+                recorded.clear()
+            statuses.clear()
+            provider.calls = 0
+            before = {
+                p: _histogram_state(db_checkout_wait.labels(pool=p)) for p in pools
+            }
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+            after = {
+                p: _histogram_state(db_checkout_wait.labels(pool=p)) for p in pools
+            }
+
+    total = sum(len(s) for s in samples.values())
+    return {
+        "config": {
+            "database": args.database.split(":", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "get_ratio": args.get_ratio,
+            "unique_queries": args.unique,
+            "write_buffer": args.write_buffer,
+            "fake_llm": vars(config),
+        },
+        "duration_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2),
+        "latency": {
+            "all": summarize(samples["create"] + samples["get"]),
+            "create": summarize(samples["create"]),
+            "get": summarize(samples["get"]),
+        },
+        "status_codes": dict(statuses),
+        "llm_calls": provider.calls,
+        "pool_wait": pool_wait(before, after, db_checkout_wait.bounds),
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Describe every metric more than threshold (a fraction) worse."""
+    regressions = []
+    if current["rps"] < baseline["rps"] * (1 - threshold):
+        regressions.append(f"rps {baseline['rps']} -> {current['rps']}")
+    for op, stats in current["latency"].items():
+        old = baseline["latency"].get(op, {})
+        for key in LATENCY_KEYS:
+            if key in stats and key in old and stats[key] > old[key] * (1 + threshold):
+                regressions.append(f"{op} {key} {old[key]} -> {stats[key]}")
+    return regressions
+
+
+def main() -> None:
+    """Parse command line arguments, run the load test and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--database",
+        default=os.environ.get("DATABASE_URL", "sqlite"),
+        help="database URL, or 'sqlite' for a temporary SQLite file",
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--get-ratio", type=float, default=0.8, help="share of requests that read"
+    )
+    parser.add_argument(
+        "--unique", type=int, default=500, help="distinct queries (cache hit rate)"
+    )
+    parser.add_argument(
+        "--latency",
+        choices=["constant", "uniform", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--output-chars", type=int, default=4000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--write-buffer",
+        action="store_true",
+        help="batch row writes (WRITE_BUFFER_ENABLED)",
+    )
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--baseline", type=Path, help="report to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed regression (0.1=10%%)"
+    )
+    args = parser.parse_args()
+    args.database = configure_environment(args.database)
+    if args.write_buffer:
+        os.environ["WRITE_BUFFER_ENABLED"] = "true"
+
+    report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    baseline: Optional[Dict[str, Any]] = (
+        json.loads(args.baseline.read_text()) if args.baseline else None
+    )
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
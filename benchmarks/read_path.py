@@ -0,0 +1,161 @@
+"""Microbenchmark of ``GET /itinerary/{id}``: ORM path versus Core path.
+
+Serves single-row reads through the ASGI app in-process, one at a time, and
+reports requests per CPU second (i.e. per core) and latency for:
+
+- ``orm``: the former handler, which loads an ORM entity and returns it
+  through the ``ItineraryQueryResponse`` response model;
+- ``core``: the current handler on rows it cannot cache (still running),
+  which reads the columns with a Core statement and encodes them directly;
+- ``cached``: the current handler on completed rows, served from the
+  in-process cache.
+
+    python -m benchmarks.read_path --requests 5000
+    python -m benchmarks.read_path --database "$DATABASE_URL" --json read.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from uuid import UUID
+
+import httpx
+
+from benchmarks.load import configure_environment
+
+
+def _orm_route(app: Any) -> None:
+    """Register the former GET handler under ``/bench/orm/{query_id}``."""
+    from app import models, schemas
+    from app.main import ReadDBSession
+
+    async def get_itinerary_orm(
+        query_id: UUID, db: ReadDBSession
+    ) -> schemas.ItineraryQueryResponse:
+        db_query = await models.ItineraryQuery.get(db, query_id)
+        return schemas.ItineraryQueryResponse.model_validate(db_query)
+
+    app.add_api_route(
+        "/bench/orm/{query_id}",
+        get_itinerary_orm,
+        response_model=schemas.ItineraryQueryResponse,
+    )
+
+
+async def _seed(rows: int, output_chars: int, status: str) -> List[str]:
+    """Insert rows with a response of output_chars characters."""
+    from app.database import sessionmanager
+    from app.models import ItineraryQuery
+
+    response = ("Day 1: breakfast at a local cafe, museum, lunch. " * 100)[
+        :output_chars
+    ]
+    async with sessionmanager.session(mode="write") as db:
+        inserted = await ItineraryQuery.insert_many(
+            db,
+            [
+                {
+                    "query": f"{i % 7 + 1} days in Rome, plan #{i}",
+                    "status": status,
+                    **ItineraryQuery.response_values(response),
+                }
+                for i in range(rows)
+            ],
+        )
+    return [str(row.id) for row in inserted]
+
+
+async def _measure(
+    client: httpx.AsyncClient, path: Callable[[str], str], ids: List[str], count: int
+) -> Dict[str, float]:
+    """Issue count sequential GETs and time them."""
+    rng = random.Random(1)
+    timings = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get(path(rng.choice(ids)))
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    timings.sort()
+    return {
+        "requests": count,
+        "rps_per_core": round(count / cpu, 1),
+        "rps": round(count / wall, 1),
+        "p50_us": round(statistics.median(timings) * 1e6, 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Seed the database, then measure each read path."""
+    # Imported here: the environment must be configured first
+    from benchmarks.fake_llm import FakeLLMConfig, register_fake_provider
+
+    register_fake_provider(FakeLLMConfig())
+    from app.main import app
+    from app.models import ItineraryStatus
+    from app.utils import fast_json
+
+    _orm_route(app)
+    results: Dict[str, Any] = {"json_backend": fast_json.backend}
+    async with app.router.lifespan_context(app):
+        running = await _seed(
+            args.rows, args.output_chars, ItineraryStatus.RUNNING.value
+        )
+        done = await _seed(args.rows, args.output_chars, ItineraryStatus.DONE.value)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            paths = {
+                "orm": (lambda id: f"/bench/orm/{id}", running),
+                "core": (lambda id: f"/itinerary/{id}", running),
+                "cached": (lambda id: f"/itinerary/{id}", done),
+            }
+            for name, (path, ids) in paths.items():
+                await _measure(client, path, ids, args.warmup)
+                results[name] = await _measure(client, path, ids, args.requests)
+    return results
+
+
+def main() -> None:
+    """Parse command line arguments, run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--database",
+        default=os.environ.get("DATABASE_URL", "sqlite"),
+        help="database URL, or 'sqlite' for a temporary SQLite file",
+    )
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--output-chars", type=int, default=4000)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args()
+    configure_environment(args.database)
+
+    results = asyncio.run(run(args))
+    print(f"JSON encoder: {results['json_backend']}")
+    print(f"{'path':>6} {'req/s/core':>10} {'req/s':>8} {'p50 us':>8} {'p99 us':>8}")
+    for name in ("orm", "core", "cached"):
+        stats = results[name]
+        print(
+            f"{name:>6} {stats['rps_per_core']:>10} {stats['rps']:>8} "
+            f"{stats['p50_us']:>8} {stats['p99_us']:>8}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
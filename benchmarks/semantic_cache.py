@@ -0,0 +1,224 @@
+"""Similarity and hit-rate evaluation for the semantic query cache.
+
+Measures three things on labelled query pairs, either a JSONL file of
+``{"a": ..., "b": ..., "duplicate": true}`` lines or a deterministic
+synthetic sample of paraphrases and hard negatives (the same request with a
+different city, length or theme):
+
+- precision and recall of "similarity >= threshold" for several thresholds;
+- hit rate and wrong-hit rate when replaying a stream of queries through
+  the cache, compared with exact matching on the normalized query;
+- lookup latency against a full index.
+
+    python -m benchmarks.semantic_cache --thresholds 0.8 0.85 0.9 0.95
+    python -m benchmarks.semantic_cache --pairs pairs.jsonl --json out.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.utils.semantic_cache import HashingEncoder, SemanticCache, numpy_available
+
+CITIES = ["Paris", "Rome", "Lisbon", "Kyoto", "Oslo", "Cusco", "Hanoi", "Prague"]
+DAYS = [2, 3, 4, 5, 7, 10]
+THEMES = {
+    "family": ["with kids", "for a family with children", "with my children"],
+    "food": ["focused on food", "for foodies", "with lots of local food"],
+    "budget": ["on a budget", "cheap", "budget backpacking"],
+    "romance": ["for a couple", "romantic", "for our honeymoon"],
+    "museums": ["with museums", "museum focused", "to see museums and galleries"],
+}
+TEMPLATES = [
+    "{days} days in {city} {theme}",
+    "{city} {days}-day trip {theme}",
+    "Plan a {days} day itinerary for {city} {theme}",
+    "I want to spend {days} days in {city} {theme}",
+    "{city} for {days} days, {theme}",
+]
+
+Intent = Tuple[str, int, str]
+Pair = Tuple[str, str, bool]
+
+
+def phrase(intent: Intent, rng: random.Random) -> str:
+    """Word an intent with a random template and theme phrase."""
+    city, days, theme = intent
+    return rng.choice(TEMPLATES).format(
+        city=city, days=days, theme=rng.choice(THEMES[theme])
+    )
+
+
+def random_intent(rng: random.Random) -> Intent:
+    """A random (city, days, theme) request."""
+    return rng.choice(CITIES), rng.choice(DAYS), rng.choice(list(THEMES))
+
+
+def synthetic_pairs(size: int, seed: int = 7) -> List[Pair]:
+    """Paraphrase pairs and hard negatives differing in one attribute."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(size):
+        intent = random_intent(rng)
+        pairs.append((phrase(intent, rng), phrase(intent, rng), True))
+        city, days, theme = intent
+        changed = rng.choice(
+            [
+                (rng.choice([c for c in CITIES if c != city]), days, theme),
+                (city, rng.choice([d for d in DAYS if d != days]), theme),
+                (city, days, rng.choice([t for t in THEMES if t != theme])),
+            ]
+        )
+        pairs.append((phrase(intent, rng), phrase(changed, rng), False))
+    return pairs
+
+
+def load_pairs(path: Path) -> List[Pair]:
+    """Read labelled pairs from a JSONL file."""
+    pairs = []
+    with path.open() as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                pairs.append((item["a"], item["b"], bool(item["duplicate"])))
+    return pairs
+
+
+def evaluate_pairs(
+    pairs: Sequence[Pair], thresholds: Sequence[float], dimensions: int
+) -> Dict[str, Dict[str, float]]:
+    """Precision and recall of each threshold on labelled pairs."""
+    encoder = HashingEncoder(dimensions)
+    a = encoder.encode([pair[0] for pair in pairs])
+    b = encoder.encode([pair[1] for pair in pairs])
+    similarities = (a * b).sum(axis=1)
+    results = {}
+    for threshold in thresholds:
+        true_hits = false_hits = missed = 0
+        for similarity, (_, _, duplicate) in zip(similarities, pairs):
+            if similarity >= threshold:
+                true_hits += duplicate
+                false_hits += not duplicate
+            else:
+                missed += duplicate
+        results[str(threshold)] = {
+            "precision": round(true_hits / max(1, true_hits + false_hits), 4),
+            "recall": round(true_hits / max(1, true_hits + missed), 4),
+            "false_hits": false_hits,
+        }
+    return results
+
+
+def replay(
+    threshold: float, queries: int, intents: int, dimensions: int, seed: int = 11
+) -> Dict[str, float]:
+    """Hit rates when a stream of repeated requests goes through the cache.
+
+    Requests are drawn from a fixed pool of intents with a long-tailed
+    popularity, and each is worded afresh, so many repeats differ in wording.
+    """
+    rng = random.Random(seed)
+    pool = [random_intent(rng) for _ in range(intents)]
+    weights = [1 / (rank + 1) for rank in range(intents)]
+    cache = SemanticCache(threshold=threshold, dimensions=dimensions)
+    answers: Dict[str, Intent] = {}
+    exact_seen = set()
+    exact_hits = hits = wrong_hits = 0
+    for _ in range(queries):
+        intent = rng.choices(pool, weights)[0]
+        query = phrase(intent, rng)
+        normalized = " ".join(query.split()).casefold()
+        exact_hits += normalized in exact_seen
+        exact_seen.add(normalized)
+        response = cache.lookup(query)
+        if response is None:
+            answers[query] = intent
+            cache.add(query, query)
+        else:
+            hits += 1
+            wrong_hits += answers[response] != intent
+    return {
+        "exact_hit_rate": round(exact_hits / queries, 4),
+        "hit_rate": round(hits / queries, 4),
+        "wrong_hit_rate": round(wrong_hits / queries, 4),
+    }
+
+
+def lookup_latency(size: int, dimensions: int, lookups: int = 200) -> Dict[str, float]:
+    """Lookup latency in microseconds with size entries in the index."""
+    rng = random.Random(3)
+    cache = SemanticCache(max_size=size, dimensions=dimensions)
+    for i in range(size):
+        cache.add(f"{phrase(random_intent(rng), rng)} #{i}", "response")
+    timings = []
+    for _ in range(lookups):
+        query = phrase(random_intent(rng), rng)
+        start = time.perf_counter()
+        cache.lookup(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "entries": size,
+        "p50_us": round(statistics.median(timings), 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1], 1),
+    }
+
+
+def main() -> None:
+    """Parse command line arguments, run the evaluation and print tables."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--pairs", type=Path, help="labelled JSONL pairs to use")
+    parser.add_argument("--synthetic-size", type=int, default=1000)
+    parser.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.8, 0.85, 0.9, 0.95]
+    )
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--replay-queries", type=int, default=5000)
+    parser.add_argument("--replay-intents", type=int, default=500)
+    parser.add_argument("--index-size", type=int, default=10000)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+    if not numpy_available():
+        parser.error("numpy is required for the semantic cache")
+
+    pairs = (
+        load_pairs(args.pairs) if args.pairs else synthetic_pairs(args.synthetic_size)
+    )
+    results: Dict[str, Any] = {
+        "pairs": evaluate_pairs(pairs, args.thresholds, args.dimensions),
+        "replay": {
+            str(threshold): replay(
+                threshold, args.replay_queries, args.replay_intents, args.dimensions
+            )
+            for threshold in args.thresholds
+        },
+        "latency": lookup_latency(args.index_size, args.dimensions),
+    }
+
+    print(
+        f"{'threshold':>9} {'precision':>9} {'recall':>7} "
+        f"{'hit rate':>9} {'wrong':>7} {'exact':>7}"
+    )
+    for threshold in map(str, args.thresholds):
+        pair_stats = results["pairs"][threshold]
+        replay_stats = results["replay"][threshold]
+        print(
+            f"{threshold:>9} {pair_stats['precision']:>9} {pair_stats['recall']:>7} "
+            f"{replay_stats['hit_rate']:>9} {replay_stats['wrong_hit_rate']:>7} "
+            f"{replay_stats['exact_hit_rate']:>7}"
+        )
+    latency = results["latency"]
+    print(
+        f"lookup with {latency['entries']} entries: "
+        f"p50 {latency['p50_us']}us, p99 {latency['p99_us']}us"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
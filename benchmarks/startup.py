@@ -0,0 +1,157 @@
+"""Cold start benchmark: import, startup, first request and shutdown time.
+
+Each run is a fresh interpreter that imports ``app.main``, runs the lifespan
+startup, serves one database-backed request through the ASGI app and shuts
+down, as a newly scheduled pod would. The report has the median, min and max
+of each phase over all runs, and can be compared with an earlier one to
+catch regressions.
+
+    python -m benchmarks.startup --runs 10 --json startup.json
+    python -m benchmarks.startup --baseline startup.json
+
+Use ``python -X importtime -c "import app.main"`` to see which imports
+dominate a regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.load import configure_environment
+
+PHASES = ("import_s", "startup_s", "first_request_s", "shutdown_s", "total_s")
+
+
+async def _lifecycle(timings: Dict[str, Any]) -> None:
+    start = time.perf_counter()
+    from app.main import app
+
+    timings["import_s"] = time.perf_counter() - start
+    timings["sdk_imported"] = "google.generativeai" in sys.modules
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings["startup_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.get("/itinerary/", params={"limit": 1})
+        response.raise_for_status()
+        timings["first_request_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+    timings["shutdown_s"] = time.perf_counter() - start
+
+
+def measure() -> Dict[str, Any]:
+    """Time one cold start in this (fresh) interpreter."""
+    timings: Dict[str, Any] = {}
+    asyncio.run(_lifecycle(timings))
+    timings["total_s"] = sum(timings[phase] for phase in PHASES[:-1])
+    timings["modules"] = len(sys.modules)
+    return timings
+
+
+def _run_child(env: Dict[str, str]) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result: Dict[str, Any] = json.loads(output.strip().splitlines()[-1])
+    return result
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median, min and max of each phase, in milliseconds."""
+    report: Dict[str, Any] = {}
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        report[phase.replace("_s", "_ms")] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2),
+        }
+    report["modules"] = runs[-1]["modules"]
+    report["sdk_imported_at_startup"] = runs[-1]["sdk_imported"]
+    return report
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Describe every phase whose median is more than threshold worse."""
+    regressions = []
+    for phase in PHASES:
+        key = phase.replace("_s", "_ms")
+        if key not in baseline:
+            continue
+        old, new = baseline[key]["median"], current[key]["median"]
+        if new > old * (1 + threshold):
+            regressions.append(f"{key} median {old} -> {new}")
+    return regressions
+
+
+def main() -> None:
+    """Parse command line arguments, run the benchmark and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--database",
+        default=os.environ.get("DATABASE_URL", "sqlite"),
+        help="database URL, or 'sqlite' for a temporary SQLite file",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--baseline", type=Path, help="report to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed regression (0.2=20%%)"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return
+
+    database = configure_environment(args.database)
+    env = dict(os.environ, LLM_PROVIDER="gemini")
+    # One unmeasured run creates the schema and warms the bytecode cache;
+    # measured runs start like a pod against a migrated database
+    _run_child(dict(env, DB_CREATE_ALL="true"))
+    env["DB_CREATE_ALL"] = "false"
+    runs = [_run_child(env) for _ in range(args.runs)]
+
+    report = {
+        "config": {"database": database.split(":", 1)[0], "runs": args.runs},
+        **summarize(runs),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    baseline: Optional[Dict[str, Any]] = (
+        json.loads(args.baseline.read_text()) if args.baseline else None
+    )
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Maintenance commands for compressed itinerary responses.
+
+Usage (from the repository root)::
+
+    python -m scripts.compress_responses train-dictionary --output dict.zstd
+    python -m scripts.compress_responses backfill --batch-size 500 --pause 0.1
+    python -m scripts.compress_responses decompress
+
+``backfill`` moves plain-text responses into the compressed column using the
+configured ``RESPONSE_COMPRESSION`` codec. It runs online: rows are processed
+in small keyset-ordered batches, each in its own short transaction, and a row
+is only rewritten if its text has not changed since it was read.
+``decompress`` reverses it, e.g. before downgrading the migration.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import bindparam, select, update
+
+from app.config import settings
+from app.database import sessionmanager
+from app.models import ItineraryQuery
+from app.utils.compression import train_dictionary
+
+table = ItineraryQuery.__table__
+
+
+async def _backfill(batch_size: int, pause: float) -> int:
+    """Compress plain-text responses batch by batch; returns rows rewritten."""
+    if settings.response_compression == "none":
+        raise SystemExit("Set RESPONSE_COMPRESSION to zlib or zstd first")
+
+    stmt = (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.itinerary_response == bindparam("b_old"),
+        )
+        .values(
+            itinerary_response=None,
+            itinerary_response_compressed=bindparam("b_new"),
+        )
+    )
+    return await _rewrite(
+        select(table.c.id, table.c.itinerary_response).where(
+            table.c.itinerary_response.is_not(None)
+        ),
+        stmt,
+        batch_size,
+        pause,
+    )
+
+
+async def _decompress(batch_size: int, pause: float) -> int:
+    """Move compressed responses back to plain text; returns rows rewritten."""
+    stmt = (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.itinerary_response_compressed.is_not(None),
+        )
+        .values(
+            itinerary_response=bindparam("b_new"),
+            itinerary_response_compressed=None,
+        )
+    )
+    return await _rewrite(
+        select(table.c.id, table.c.itinerary_response_compressed).where(
+            table.c.itinerary_response_compressed.is_not(None)
+        ),
+        stmt,
+        batch_size,
+        pause,
+    )
+
+
+async def _rewrite(source: Any, stmt: Any, batch_size: int, pause: float) -> int:
+    """Apply stmt to every (id, text) row of source, one batch per transaction.
+
+    The statement receives ``b_id``, ``b_old`` (the text as read) and
+    ``b_new`` (the text to write).
+    """
+    total = 0
+    after: Any = None
+    while True:
+        query = source.order_by(table.c.id).limit(batch_size)
+        if after is not None:
+            query = query.where(table.c.id > after)
+        async with sessionmanager.session(mode="write") as db:
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            await db.execute(
+                stmt,
+                [{"b_id": id, "b_old": text, "b_new": text} for id, text in rows],
+            )
+            await db.commit()
+        after = rows[-1][0]
+        total += len(rows)
+        print(f"rewrote {total} rows (last id {after})")
+        if pause > 0:
+            await asyncio.sleep(pause)
+    return total
+
+
+async def _train(output: Path, samples: int, size: int) -> None:
+    """Train a zstd dictionary on the most recent completed responses."""
+    async with sessionmanager.session(mode="read") as db:
+        result = await db.execute(
+            select(ItineraryQuery.itinerary_response)
+            .where(ItineraryQuery.status == "done")
+            .order_by(ItineraryQuery.id.desc())
+            .limit(samples)
+        )
+        texts = [text for (text,) in result.all() if text]
+    output.write_bytes(train_dictionary(texts, size))
+    print(f"trained a {size}-byte dictionary on {len(texts)} responses: {output}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "backfill":
+            await _backfill(args.batch_size, args.pause)
+        elif args.command == "decompress":
+            await _decompress(args.batch_size, args.pause)
+        else:
+            await _train(Path(args.output), args.samples, args.size)
+    finally:
+        await sessionmanager.close()
+
+
+def main() -> None:
+    """Parse command line arguments and run the selected command."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("backfill", "decompress"):
+        command = commands.add_parser(name)
+        command.add_argument("--batch-size", type=int, default=500)
+        command.add_argument(
+            "--pause", type=float, default=0.1, help="seconds to sleep per batch"
+        )
+    train = commands.add_parser("train-dictionary")
+    train.add_argument("--output", required=True)
+    train.add_argument("--samples", type=int, default=2000)
+    train.add_argument("--size", type=int, default=64 * 1024)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Maintenance commands for the monthly partitions of itinerary queries.
+
+Usage (from the repository root)::
+
+    python -m scripts.partitions list
+    python -m scripts.partitions create --months-ahead 3
+    python -m scripts.partitions archive --retention-months 12 --output-dir archive
+
+``archive`` handles every partition whose whole range is older than the
+retention period: it detaches it without blocking queries on the table
+(``DETACH PARTITION ... CONCURRENTLY``), exports its rows to
+``<partition>.ndjson.gz`` in the output directory, checks the row count and
+drops it. An archive interrupted at any step picks up where it stopped on
+the next run; a table whose export file already exists is not exported
+again.
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import MetaData, func, select, text
+
+from app.config import settings
+from app.database import sessionmanager
+from app.models import ItineraryQuery
+from app.partitions import (
+    TABLE,
+    Partition,
+    add_months,
+    create_partitions,
+    detached_tables,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+table = ItineraryQuery.__table__
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _row_document(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Row as archived: the response in plain text, whichever column held it."""
+    compressed = row.pop("itinerary_response_compressed")
+    if row["itinerary_response"] is None:
+        row["itinerary_response"] = compressed
+    return row
+
+
+def _expired(partitions: List[Partition], retention_months: int) -> List[Partition]:
+    """Partitions whose whole range is older than the retention period."""
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -retention_months)
+    return [p for p in partitions if p.upper is not None and p.upper.date() <= cutoff]
+
+
+async def _list() -> None:
+    async with sessionmanager.connect(mode="read") as connection:
+        if not await is_partitioned(connection):
+            raise SystemExit(f"{TABLE} is not partitioned")
+        partitions = await list_partitions(connection)
+        detached = await detached_tables(connection)
+        for partition in partitions:
+            rows = await connection.scalar(
+                text(f"SELECT count(*) FROM {partition.name}")
+            )
+            lower = partition.lower.date() if partition.lower else "MINVALUE"
+            upper = partition.upper.date() if partition.upper else "MAXVALUE"
+            pending = " (detach pending)" if partition.detach_pending else ""
+            print(f"{partition.name}: {lower} to {upper}, {rows} rows{pending}")
+    for name in detached:
+        print(f"{name}: detached, not yet archived")
+
+
+async def _create(months_ahead: int) -> None:
+    async with sessionmanager.connect(mode="write") as connection:
+        if not await is_partitioned(connection):
+            raise SystemExit(f"{TABLE} is not partitioned")
+        created = await create_partitions(connection, months_ahead)
+    print(f"created {', '.join(created)}" if created else "nothing to create")
+
+
+async def _detach(partition: Partition) -> None:
+    """Detach a partition, finishing an earlier interrupted detach if needed."""
+    mode = "FINALIZE" if partition.detach_pending else "CONCURRENTLY"
+    async with sessionmanager.connect(mode="write", autocommit=True) as connection:
+        await connection.execute(
+            text(f"ALTER TABLE {TABLE} DETACH PARTITION {partition.name} {mode}")
+        )
+    print(f"detached {partition.name}")
+
+
+async def _export(name: str, output_dir: Path) -> int:
+    """Write the rows of a detached partition to a gzipped NDJSON file."""
+    source = table.to_metadata(MetaData(), name=name)
+    path = output_dir / f"{name}.ndjson.gz"
+    partial = path.with_name(path.name + ".partial")
+    written = 0
+    async with sessionmanager.connect(mode="write") as connection:
+        expected = await connection.scalar(select(func.count()).select_from(source))
+        result = await connection.stream(select(source).order_by(source.c.id))
+        with gzip.open(partial, "wt", encoding="utf-8") as f:
+            async for row in result.mappings():
+                document = _row_document(dict(row))
+                f.write(json.dumps(document, default=_json_default) + "\n")
+                written += 1
+    if written != expected:
+        partial.unlink()
+        raise SystemExit(f"{name}: exported {written} of {expected} rows")
+    os.replace(partial, path)
+    print(f"exported {written} rows of {name} to {path}")
+    return written
+
+
+async def _drop(name: str) -> None:
+    async with sessionmanager.connect(mode="write") as connection:
+        await connection.execute(text(f"DROP TABLE {name}"))
+    print(f"dropped {name}")
+
+
+async def _archive(
+    retention_months: int, output_dir: Path, keep_tables: bool, dry_run: bool
+) -> None:
+    """Detach, export and drop every partition past the retention period."""
+    async with sessionmanager.connect(mode="write") as connection:
+        if not await is_partitioned(connection):
+            raise SystemExit(f"{TABLE} is not partitioned")
+        expired = _expired(await list_partitions(connection), retention_months)
+        leftover = await detached_tables(connection)
+    if dry_run:
+        for name in leftover + [p.name for p in expired if p.name not in leftover]:
+            print(f"would archive {name}")
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for partition in expired:
+        await _detach(partition)
+    names = leftover + [p.name for p in expired if p.name not in leftover]
+    for name in names:
+        # An existing file was complete when written
+        if not (output_dir / f"{name}.ndjson.gz").exists():
+            await _export(name, output_dir)
+        if not keep_tables:
+            await _drop(name)
+    if not names:
+        print("nothing to archive")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "list":
+            await _list()
+        elif args.command == "create":
+            await _create(args.months_ahead)
+        else:
+            await _archive(
+                args.retention_months,
+                Path(args.output_dir),
+                args.keep_tables,
+                args.dry_run,
+            )
+    finally:
+        await sessionmanager.close()
+
+
+def main() -> None:
+    """Parse command line arguments and run the selected command."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    create = commands.add_parser("create")
+    create.add_argument(
+        "--months-ahead", type=int, default=settings.partition_months_ahead
+    )
+    archive = commands.add_parser("archive")
+    archive.add_argument(
+        "--retention-months", type=int, default=settings.partition_retention_months
+    )
+    archive.add_argument("--output-dir", required=True)
+    archive.add_argument(
+        "--keep-tables",
+        action="store_true",
+        help="keep detached tables after exporting them",
+    )
+    archive.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if args.command == "archive" and args.retention_months < 0:
+        parser.error("--retention-months must not be negative")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import pytest
+
+from app.services.cache import TTLCache, make_cache_key, normalize_query
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, str] = TTLCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", "1")
+    clock.now = 4.9
+    assert cache.get("a") == "1"
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.expirations == 1
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_invalidate_and_clear() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.invalidate("a")
+    assert not cache.invalidate("a")
+    cache.set("b", 2)
+    cache.clear()
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("max_size, ttl", [(0, 1), (1, 0)])
+def test_rejects_invalid_limits(max_size: int, ttl: float) -> None:
+    with pytest.raises(ValueError):
+        TTLCache(max_size=max_size, ttl_seconds=ttl)
+
+
+def test_cache_keys_ignore_trivial_query_differences() -> None:
+    assert normalize_query("  3 Days in   ROME ") == "3 days in rome"
+    assert make_cache_key("a", "bc") != make_cache_key("ab", "c")
@@ -0,0 +1,100 @@
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def open_breaker(clock: Clock, **kwargs: float) -> CircuitBreaker:
+    breaker = CircuitBreaker(
+        window_size=4, min_calls=4, reset_timeout=10, clock=clock, **kwargs
+    )
+    for _ in range(4):
+        breaker.record_failure(breaker.allow())
+    assert breaker.state is CircuitState.OPEN
+    return breaker
+
+
+def test_opens_at_the_failure_rate_once_enough_calls() -> None:
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4)
+    for _ in range(3):
+        breaker.record_failure(breaker.allow())
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_success(breaker.allow())
+    breaker.record_success(breaker.allow())
+    assert breaker.failure_rate == 0.5
+    # Successes never open it; a failure leaving 1 in 4 failed does not either
+    breaker.record_success(breaker.allow())
+    breaker.record_failure(breaker.allow())
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure(breaker.allow())
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_open_circuit_rejects_until_the_reset_timeout() -> None:
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 4
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.retry_after == 6
+
+    clock.now = 10
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.retry_after is None
+
+
+def test_half_open_probes_close_the_circuit() -> None:
+    clock = Clock()
+    breaker = open_breaker(clock, half_open_probes=2)
+    clock.now = 10
+    first, second = breaker.allow(), breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record_success(first)
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_success(second)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failure_rate == 0
+
+
+def test_failed_probe_reopens_the_circuit() -> None:
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10
+    breaker.record_failure(breaker.allow())
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.retry_after == 10
+
+
+def test_cancelled_probe_frees_its_slot() -> None:
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10
+    breaker.record_cancelled(breaker.allow())
+    breaker.record_success(breaker.allow())
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_outcomes_from_an_earlier_state_are_ignored() -> None:
+    clock = Clock()
+    breaker = CircuitBreaker(window_size=4, min_calls=4, reset_timeout=10, clock=clock)
+    stale = breaker.allow()
+    for _ in range(4):
+        breaker.record_failure(breaker.allow())
+    clock.now = 10
+    probe = breaker.allow()
+
+    # A call started while closed neither closes nor reopens the circuit
+    breaker.record_success(stale)
+    breaker.record_failure(stale)
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_success(probe)
+    assert breaker.state is CircuitState.CLOSED
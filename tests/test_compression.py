@@ -0,0 +1,50 @@
+import pytest
+
+from app.utils.compression import (
+    CODEC_RAW,
+    CODEC_ZLIB,
+    CompressionError,
+    TextCodec,
+    zstd_available,
+)
+
+TEXT = "Day 1: Colosseum and the Forum. Day 2: Vatican Museums. " * 20 + "Caffè."
+
+
+@pytest.mark.parametrize("codec, header", [("none", CODEC_RAW), ("zlib", CODEC_ZLIB)])
+def test_round_trip(codec: str, header: int) -> None:
+    encoded = TextCodec(codec).encode(TEXT)
+    assert encoded[0] == header
+    assert TextCodec(codec).decode(encoded) == TEXT
+
+
+def test_any_codec_decodes_every_format() -> None:
+    reader = TextCodec("none")
+    for codec in ("none", "zlib"):
+        assert reader.decode(TextCodec(codec).encode(TEXT)) == TEXT
+
+
+def test_zlib_compresses_repetitive_text() -> None:
+    assert len(TextCodec("zlib").encode(TEXT)) < len(TEXT) / 4
+
+
+@pytest.mark.skipif(not zstd_available(), reason="zstandard is not installed")
+def test_zstd_round_trip() -> None:
+    codec = TextCodec("zstd")
+    assert codec.decode(codec.encode(TEXT)) == TEXT
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard() -> None:
+    expected = "zstd" if zstd_available() else "zlib"
+    assert TextCodec("zstd").codec == expected
+
+
+@pytest.mark.parametrize("data", [b"", b"\x09payload"])
+def test_invalid_values_are_rejected(data: bytes) -> None:
+    with pytest.raises(CompressionError):
+        TextCodec().decode(data)
+
+
+def test_unknown_codec_is_rejected() -> None:
+    with pytest.raises(CompressionError):
+        TextCodec("lz4")
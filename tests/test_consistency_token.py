@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+
+from app.database import DatabaseSessionManager
+from app.models import ItineraryQuery
+from app.replicas import PRIMARY_TOKEN
+from app.write_buffer import WriteBuffer
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+async def sessions(tmp_path: Path) -> AsyncIterator[DatabaseSessionManager]:
+    # SQLite has no WAL position to read, like a primary whose query fails
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tokens.db'}"
+    manager = DatabaseSessionManager()
+    manager.init(url, [url])
+    async with manager.connect() as connection:
+        await manager.create_all(connection)
+    yield manager
+    await manager.close()
+
+
+async def insert(sessions: DatabaseSessionManager, query: str) -> None:
+    async with sessions.session(mode="write") as db:
+        await ItineraryQuery.insert(db, query=query, status="queued")
+
+
+@pytest.mark.anyio
+async def test_unknown_position_sends_reads_to_the_primary(
+    sessions: DatabaseSessionManager,
+) -> None:
+    assert sessions.consistency_token() is None
+    await insert(sessions, "rome")
+    assert sessions.consistency_token() == PRIMARY_TOKEN
+    assert await sessions._choose_replica(PRIMARY_TOKEN) is None
+
+
+@pytest.mark.anyio
+async def test_token_belongs_to_the_task_that_wrote(
+    sessions: DatabaseSessionManager,
+) -> None:
+    await asyncio.create_task(insert(sessions, "oslo"))
+    assert sessions.consistency_token() is None
+
+
+@pytest.mark.anyio
+async def test_sessions_without_commit_leave_no_token(
+    sessions: DatabaseSessionManager,
+) -> None:
+    async with sessions.session(mode="write") as db:
+        await ItineraryQuery.get(db, uuid.uuid4())
+    assert sessions.consistency_token() is None
+
+
+@pytest.mark.anyio
+async def test_buffered_writes_hand_the_token_to_the_waiter(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=0.001)
+    await buffer.insert({"query": "lima"})
+    await buffer.close()
+    assert sessions.consistency_token() == PRIMARY_TOKEN
+
+
+def test_without_replicas_there_is_no_token() -> None:
+    assert DatabaseSessionManager().consistency_token() is None
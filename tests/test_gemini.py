@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+import pytest
+
+from app.services.llm.gemini import GeminiError, GeminiProvider
+
+
+class _Chunk:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _Model:
+    def __init__(self, delays: List[float]) -> None:
+        self.delays = delays
+
+    async def generate_content_async(self, prompt: str, stream: bool) -> Any:
+        return self._chunks()
+
+    async def _chunks(self) -> AsyncIterator[_Chunk]:
+        for i, delay in enumerate(self.delays):
+            await asyncio.sleep(delay)
+            yield _Chunk(f"chunk {i}")
+
+
+def _provider(delays: List[float], timeout: float) -> GeminiProvider:
+    provider = GeminiProvider()
+    provider._model = _Model(delays)
+    provider._initialized = True
+    provider._use_async = True
+    provider._timeout = timeout
+    return provider
+
+
+@pytest.mark.anyio
+async def test_stream_timeout_excludes_consumer_time() -> None:
+    provider = _provider([0.01, 0.01, 0.01], timeout=0.1)
+    chunks = []
+    async for chunk in provider.stream_text("prompt"):
+        chunks.append(chunk)
+        # Slower than the timeout, but spent by the consumer
+        await asyncio.sleep(0.15)
+    assert chunks == ["chunk 0", "chunk 1", "chunk 2"]
+
+
+@pytest.mark.anyio
+async def test_stalled_stream_raises_gemini_error() -> None:
+    provider = _provider([0.01, 1.0], timeout=0.1)
+    chunks = []
+    with pytest.raises(GeminiError, match="stalled"):
+        async for chunk in provider.stream_text("prompt"):
+            chunks.append(chunk)
+    assert chunks == ["chunk 0"]
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils.http import http_date, is_not_modified, make_etag
+
+AWARE = datetime(2024, 5, 1, 12, 30, 15, 250_000, tzinfo=timezone.utc)
+NAIVE = AWARE.replace(tzinfo=None)
+OFFSET = AWARE.astimezone(timezone(timedelta(hours=2)))
+
+
+@pytest.mark.parametrize("updated_at", [AWARE, NAIVE, OFFSET])
+def test_validators_read_naive_datetimes_as_utc(updated_at: datetime) -> None:
+    assert make_etag(updated_at) == make_etag(AWARE)
+    assert http_date(updated_at) == "Wed, 01 May 2024 12:30:15 GMT"
+
+
+@pytest.mark.parametrize("updated_at", [AWARE, NAIVE])
+@pytest.mark.parametrize(
+    "since, expected",
+    [
+        ("Wed, 01 May 2024 12:30:15 GMT", True),
+        ("Wed, 01 May 2024 12:31:00 GMT", True),
+        ("Wed, 01 May 2024 12:30:14 GMT", False),
+        ("not a date", False),
+    ],
+)
+def test_if_modified_since(updated_at: datetime, since: str, expected: bool) -> None:
+    etag = make_etag(updated_at)
+    headers = {"if-modified-since": since}
+    assert is_not_modified(headers, etag, updated_at) is expected
+
+
+def test_if_none_match() -> None:
+    etag = make_etag(AWARE)
+    assert is_not_modified({"if-none-match": etag}, etag, AWARE)
+    assert is_not_modified({"if-none-match": f'"x", W/{etag}'}, etag, AWARE)
+    assert is_not_modified({"if-none-match": "*"}, etag, AWARE)
+    assert not is_not_modified({"if-none-match": '"x"'}, etag, AWARE)
+
+
+def test_if_none_match_takes_precedence() -> None:
+    etag = make_etag(AWARE)
+    headers = {
+        "if-none-match": '"x"',
+        "if-modified-since": "Wed, 01 May 2024 12:31:00 GMT",
+    }
+    assert not is_not_modified(headers, etag, AWARE)
+
+
+def test_no_conditional_headers() -> None:
+    assert not is_not_modified({}, make_etag(AWARE), AWARE)
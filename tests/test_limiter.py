@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.utils.limiter import AdaptiveLimiter, ConcurrencyLimitError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.anyio
+async def test_waiters_get_slots_in_arrival_order() -> None:
+    limiter = AdaptiveLimiter(initial_limit=1)
+    await limiter.acquire()
+    order = []
+
+    async def wait(name: str) -> None:
+        await limiter.acquire()
+        order.append(name)
+
+    tasks = [asyncio.create_task(wait(name)) for name in "ab"]
+    await asyncio.sleep(0)
+    assert limiter.waiting == 2
+
+    limiter.release()
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b"]
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.anyio
+async def test_too_many_waiters_are_rejected() -> None:
+    limiter = AdaptiveLimiter(initial_limit=1, max_waiting=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(ConcurrencyLimitError):
+        await limiter.acquire()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_leak_a_slot() -> None:
+    limiter = AdaptiveLimiter(initial_limit=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    # The slot is handed over and the waiter cancelled before it runs
+    limiter.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_limit_grows_while_saturated() -> None:
+    limiter = AdaptiveLimiter(initial_limit=2)
+    for _ in range(4):
+        await limiter.acquire()
+        await limiter.acquire()
+        limiter.release(latency=0.1)
+        limiter.release(latency=0.1)
+    assert limiter.limit == 3
+
+
+@pytest.mark.anyio
+async def test_limit_does_not_grow_when_idle() -> None:
+    limiter = AdaptiveLimiter(initial_limit=4)
+    for _ in range(20):
+        await limiter.acquire()
+        limiter.release(latency=0.1)
+    assert limiter.limit == 4
+
+
+@pytest.mark.anyio
+async def test_failures_back_off_once_per_baseline_latency() -> None:
+    clock = Clock()
+    limiter = AdaptiveLimiter(initial_limit=16, clock=clock)
+    await limiter.acquire()
+    limiter.release(latency=1.0)
+
+    for _ in range(3):
+        await limiter.acquire()
+    for _ in range(3):
+        limiter.release(failed=True)
+    assert limiter.limit == 8
+
+    clock.now = 2.0
+    await limiter.acquire()
+    limiter.release(failed=True)
+    assert limiter.limit == 4
+
+
+@pytest.mark.anyio
+async def test_slow_calls_back_off() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=2)
+    await limiter.acquire()
+    limiter.release(latency=0.1)
+    await limiter.acquire()
+    limiter.release(latency=1.0)
+    assert limiter.limit == 4
+    assert limiter.snapshot().baseline_latency == pytest.approx(0.145)
+
+
+def test_limits_must_be_ordered() -> None:
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial_limit=8, max_limit=4)
@@ -0,0 +1,47 @@
+import pytest
+
+from app.utils.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_rendering() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("requests", "Requests served.", ["route"])
+    requests.labels(route="/a").inc()
+    requests.labels(route="/a").inc(2)
+    registry.gauge("queue", "Queued jobs.").set(3)
+    assert registry.render().splitlines() == [
+        "# HELP requests Requests served.",
+        "# TYPE requests counter",
+        'requests_total{route="/a"} 3.0',
+        "# HELP queue Queued jobs.",
+        "# TYPE queue gauge",
+        "queue 3.0",
+    ]
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency", "Latency.", buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'latency_bucket{le="0.1"} 1.0',
+        'latency_bucket{le="1.0"} 3.0',
+        'latency_bucket{le="+Inf"} 4.0',
+        "latency_sum 6.25",
+        "latency_count 4.0",
+    ]
+
+
+def test_label_values_are_escaped() -> None:
+    registry = MetricsRegistry()
+    registry.counter("errors", "Errors.", ["message"]).labels(message='a "b"\n').inc()
+    assert 'errors_total{message="a \\"b\\"\\n"} 1.0' in registry.render()
+
+
+def test_duplicate_names_are_rejected() -> None:
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests served.")
+    with pytest.raises(ValueError):
+        registry.gauge("requests", "Again.")
@@ -0,0 +1,39 @@
+from typing import Optional
+
+import pytest
+
+from app.services.planning import format_outline, parse_outline, stitch, trip_days
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("10 days in Japan", 10),
+        ("A 5-day trip to Rome", 5),
+        ("Plan a five-day trip to Rome", 5),
+        ("Seven days in Peru, visiting 3 cities", 7),
+        ("3 days in Paris, then 3 days in Lyon", 3),
+        ("A day in Paris", None),
+        ("6 nights in Bali", None),
+        ("Two weeks in Italy", None),
+        ("Weekend in Berlin with 4 friends", None),
+        ("3 days in Paris or 5 days in Rome", None),
+        ("A 300-day trip around the world", 30),
+    ],
+)
+def test_trip_days(query: str, expected: Optional[int]) -> None:
+    assert trip_days(query, max_days=30) == expected
+
+
+def test_parse_outline_orders_days_and_keeps_first() -> None:
+    text = "Here is the plan:\nDay 2: Harbour\nDay 1: Old town\nDay 2) Again\n"
+    assert parse_outline(text) == ["Old town", "Harbour"]
+
+
+def test_format_outline_round_trips() -> None:
+    outlines = ["Old town", "Harbour"]
+    assert parse_outline(format_outline(outlines)) == outlines
+
+
+def test_stitch() -> None:
+    assert stitch([" Day 1 \n", "Day 2\n"]) == "Day 1\n\nDay 2"
@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Type
+
+import pytest
+
+from app.services.llm.base import LLMProvider
+from app.services.llm.factory import LLMFactory
+from app.services.llm.routing import RoutingError, RoutingProvider
+
+
+class FakeProvider(LLMProvider):
+    """Answers with its name after ``delay`` seconds, or raises ``error``."""
+
+    delay = 0.0
+    error: Optional[Exception] = None
+    calls: List[str] = []
+
+    def __init__(self) -> None:
+        self.started: Optional[float] = None
+        self.cancelled = False
+
+    async def generate_text(self, prompt: str) -> str:
+        self.started = time.monotonic()
+        self.calls.append(self.name)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    async def initialize(self, api_key: str, **kwargs: Any) -> None:
+        pass
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    @property
+    def model_name(self) -> str:
+        return self.name
+
+
+class FirstChoice(random.Random):
+    """Picks routes in the order they were given."""
+
+    def choices(self, population: Sequence[Any], *args: Any, **kwargs: Any) -> Any:
+        return [population[0]]
+
+
+@pytest.fixture
+def register(monkeypatch: pytest.MonkeyPatch) -> Any:
+    monkeypatch.setattr(LLMFactory, "_providers", dict(LLMFactory._providers))
+    calls: List[str] = []
+
+    def register(
+        name: str, delay: float = 0.0, error: Optional[Exception] = None
+    ) -> None:
+        attributes = {"delay": delay, "error": error, "calls": calls}
+        provider: Type[LLMProvider] = type(name, (FakeProvider,), attributes)
+        LLMFactory.register_provider(name, provider)
+
+    register.calls = calls  # type: ignore[attr-defined]
+    return register
+
+
+def router(routes: Mapping[str, float], **options: Any) -> RoutingProvider:
+    options.setdefault("rng", FirstChoice())
+    return LLMFactory.create_router(routes, **options)
+
+
+def providers(routing: RoutingProvider) -> Dict[str, FakeProvider]:
+    return {
+        route.name: route.provider
+        for route in routing.routes
+        if isinstance(route.provider, FakeProvider)
+    }
+
+
+@pytest.mark.anyio
+async def test_hedge_fires_after_the_latency_percentile(register: Any) -> None:
+    register("slow", delay=5)
+    register("fast")
+    routing = router({"slow": 1, "fast": 1}, default_hedge_delay=10, min_samples=20)
+    for _ in range(20):
+        routing._stats["slow"].record_success(0.1)
+    assert routing.hedge_delay("slow") == 0.1
+
+    start = time.monotonic()
+    assert await routing.generate_text("prompt") == "fast"
+    fast = providers(routing)["fast"]
+    assert fast.started is not None
+    assert 0.1 <= fast.started - start < 1
+
+
+@pytest.mark.anyio
+async def test_default_delay_until_enough_samples(register: Any) -> None:
+    register("slow", delay=0.05)
+    register("fast")
+    routing = router({"slow": 1, "fast": 1}, default_hedge_delay=1, min_samples=20)
+    routing._stats["slow"].record_success(0.001)
+    assert routing.hedge_delay("slow") == 1
+
+    assert await routing.generate_text("prompt") == "slow"
+    assert register.calls == ["slow"]
+
+
+@pytest.mark.anyio
+async def test_first_success_cancels_the_other_call(register: Any) -> None:
+    register("primary", delay=0.1)
+    register("hedge", delay=5)
+    routing = router({"primary": 1, "hedge": 1}, default_hedge_delay=0.01)
+
+    assert await routing.generate_text("prompt") == "primary"
+    await asyncio.sleep(0)
+    assert register.calls == ["primary", "hedge"]
+    assert providers(routing)["hedge"].cancelled
+    stats = routing.stats()
+    assert stats["primary"].successes == 1
+    assert stats["hedge"].cancelled == 1
+
+
+@pytest.mark.anyio
+async def test_only_max_hedges_are_sent(register: Any) -> None:
+    for name in ("a", "b", "c"):
+        register(name, delay=0.1 if name == "b" else 5)
+    routing = router({"a": 1, "b": 1, "c": 1}, default_hedge_delay=0.01)
+
+    assert await routing.generate_text("prompt") == "b"
+    assert register.calls == ["a", "b"]
+
+
+def test_routes_are_ordered_by_weight(register: Any) -> None:
+    for name in ("heavy", "light", "off"):
+        register(name)
+    routing = router({"heavy": 8, "light": 2, "off": 0}, rng=random.Random(42))
+    firsts = [routing._ordered_routes()[0].name for _ in range(2000)]
+    assert 0.75 < firsts.count("heavy") / len(firsts) < 0.85
+    assert "off" not in firsts
+    assert [r.name for r in routing._ordered_routes()] in (
+        ["heavy", "light"],
+        ["light", "heavy"],
+    )
+
+
+@pytest.mark.anyio
+async def test_failures_fall_back_in_weighted_order(register: Any) -> None:
+    names = ["a", "b", "c", "d"]
+    for name in names:
+        register(name, error=RuntimeError(f"{name} is down"))
+    weights = {name: float(i + 1) for i, name in enumerate(names)}
+    expected = router(weights, rng=random.Random(7))._ordered_routes()
+
+    routing = router(weights, rng=random.Random(7))
+    with pytest.raises(RoutingError) as info:
+        await routing.generate_text("prompt")
+    assert register.calls == [route.name for route in expected]
+    assert str(info.value).count("is down") == 4
+
+
+@pytest.mark.anyio
+async def test_errors_and_timeouts_fall_back_to_the_next_provider(
+    register: Any,
+) -> None:
+    register("broken", error=RuntimeError("boom"))
+    register("stalled", error=asyncio.TimeoutError())
+    register("healthy")
+    routing = router({"broken": 1, "stalled": 1, "healthy": 1})
+
+    assert await routing.generate_text("prompt") == "healthy"
+    assert register.calls == ["broken", "stalled", "healthy"]
+    stats = routing.stats()
+    assert stats["broken"].errors == 1
+    assert stats["stalled"].errors == 1
+    assert stats["healthy"].successes == 1
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from app.services.scheduler import (
+    DeadlineExceededError,
+    Priority,
+    QuotaScheduler,
+    estimate_tokens,
+    is_deadline_exceeded,
+    is_retryable,
+)
+
+
+class UpstreamError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(f"upstream returned {code}")
+        self.code = code
+
+
+def one_at_a_time(per_second: float = 100) -> QuotaScheduler:
+    """Scheduler admitting one call immediately, then per_second calls."""
+    return QuotaScheduler(
+        requests_per_minute=per_second * 60,
+        burst_seconds=0.001,
+        retry_base_delay=0,
+    )
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 9) == 3
+
+
+def test_status_codes_are_found_in_the_cause_chain() -> None:
+    try:
+        try:
+            raise UpstreamError(503)
+        except UpstreamError as e:
+            raise RuntimeError("generation failed") from e
+    except RuntimeError as e:
+        error = e
+    assert is_retryable(error)
+    assert not is_retryable(UpstreamError(400))
+    wrapped = RuntimeError("failed")
+    wrapped.__cause__ = DeadlineExceededError("late")
+    assert is_deadline_exceeded(wrapped)
+
+
+@pytest.mark.anyio
+async def test_waiting_calls_are_served_by_priority() -> None:
+    scheduler = one_at_a_time()
+    await scheduler.acquire(1)
+    order: List[str] = []
+
+    async def wait(name: str, priority: Priority) -> None:
+        await scheduler.acquire(1, priority)
+        order.append(name)
+
+    batch = asyncio.create_task(wait("batch", Priority.BATCH))
+    prewarm = asyncio.create_task(wait("prewarm", Priority.PREWARM))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(wait("interactive", Priority.INTERACTIVE))
+    await asyncio.gather(batch, prewarm, interactive)
+    assert order == ["interactive", "batch", "prewarm"]
+
+
+@pytest.mark.anyio
+async def test_earlier_deadline_is_served_first() -> None:
+    scheduler = one_at_a_time()
+    await scheduler.acquire(1)
+    order: List[str] = []
+    now = time.monotonic()
+
+    async def wait(name: str, deadline: float) -> None:
+        await scheduler.acquire(1, deadline=deadline)
+        order.append(name)
+
+    await asyncio.gather(wait("late", now + 60), wait("soon", now + 30))
+    assert order == ["soon", "late"]
+
+
+@pytest.mark.anyio
+async def test_call_that_cannot_get_quota_in_time_fails_at_once() -> None:
+    scheduler = one_at_a_time(per_second=1)
+    await scheduler.acquire(1)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        await scheduler.acquire(1, deadline=start + 0.5)
+    assert time.monotonic() - start < 0.1
+    assert scheduler.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_transient_errors_are_retried() -> None:
+    scheduler = QuotaScheduler(retry_base_delay=0)
+    codes = [503, 429]
+
+    async def call() -> str:
+        if codes:
+            raise UpstreamError(codes.pop(0))
+        return "Day 1"
+
+    assert await scheduler.run(call, "3 days in Rome") == "Day 1"
+    assert codes == []
+
+
+@pytest.mark.anyio
+async def test_permanent_errors_and_exhausted_retries_raise() -> None:
+    scheduler = QuotaScheduler(max_retries=2, retry_base_delay=0)
+    calls: List[int] = []
+
+    async def call(code: int) -> str:
+        calls.append(code)
+        raise UpstreamError(code)
+
+    with pytest.raises(UpstreamError):
+        await scheduler.run(lambda: call(400), "prompt")
+    assert calls == [400]
+
+    calls.clear()
+    with pytest.raises(UpstreamError):
+        await scheduler.run(lambda: call(503), "prompt")
+    assert calls == [503] * 3
+
+
+@pytest.mark.anyio
+async def test_call_running_past_its_deadline_fails() -> None:
+    scheduler = QuotaScheduler()
+
+    async def call() -> str:
+        await asyncio.sleep(10)
+        return "too late"
+
+    with pytest.raises(DeadlineExceededError):
+        await scheduler.run(call, "prompt", deadline=time.monotonic() + 0.05)
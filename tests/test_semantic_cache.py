@@ -0,0 +1,59 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.utils.semantic_cache import SemanticCache, query_numbers, tokenize  # noqa
+
+
+def test_import_does_not_load_numpy() -> None:
+    code = "import sys, app.utils.semantic_cache; print('numpy' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_tokenize_folds_plurals_and_synonyms() -> None:
+    assert tokenize("Cheap hotels for kids") == ["budget", "hotel", "family"]
+
+
+def test_rephrasing_matches() -> None:
+    cache = SemanticCache(threshold=0.6)
+    cache.add("3 days in Paris with kids", "itinerary")
+    assert cache.lookup("Paris 3 days for family with children") == "itinerary"
+    assert cache.hits == 1
+
+
+def test_different_numbers_or_namespace_do_not_match() -> None:
+    cache = SemanticCache(threshold=0.6)
+    cache.add("3 days in Paris", "itinerary", namespace="v1")
+    assert cache.lookup("4 days in Paris", namespace="v1") is None
+    assert cache.lookup("3 days in Paris", namespace="v2") is None
+    assert query_numbers("3 days, 2 kids") == frozenset({"3", "2"})
+
+
+def test_oldest_entries_are_replaced_when_full() -> None:
+    cache = SemanticCache(max_size=2)
+    for city in ("Paris", "Rome", "Lisbon"):
+        cache.add(f"Museums in {city}", city)
+    assert len(cache) == 2
+    assert cache.lookup("Museums in Paris") is None
+    assert cache.lookup("Museums in Lisbon") == "Lisbon"
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    cache = SemanticCache()
+    cache.add("Museums in Paris", "Paris")
+    path = str(tmp_path / "cache.npz")
+    cache.save(path)
+    restored = SemanticCache()
+    restored.load(path)
+    assert restored.lookup("Museums in Paris") == "Paris"
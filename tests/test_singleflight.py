@@ -0,0 +1,87 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_result() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    calls: List[int] = []
+
+    async def work() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.anyio
+async def test_exceptions_reach_every_waiter() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+    )
+    assert [str(r) for r in results] == ["boom", "boom"]
+    assert len(flight) == 0
+
+
+@pytest.mark.anyio
+async def test_cancelling_one_waiter_keeps_the_call_for_others() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    started = asyncio.Event()
+
+    async def work() -> int:
+        started.set()
+        await asyncio.sleep(0.05)
+        return 42
+
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+    assert flight.waiters("k") == 2
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == 42
+
+
+@pytest.mark.anyio
+async def test_cancelling_the_last_waiter_cancels_the_call() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work() -> int:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return 42
+
+    waiter = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert len(flight) == 0
+
+    # The next caller starts a fresh call
+    async def quick() -> int:
+        return 7
+
+    assert await flight.do("k", quick) == 7
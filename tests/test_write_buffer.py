@@ -0,0 +1,166 @@
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+import pytest
+
+from app.database import DatabaseSessionManager
+from app.models import ItineraryQuery, ItineraryStatus
+from app.write_buffer import WriteBuffer, WriteBufferError
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+async def sessions(tmp_path: Path) -> AsyncIterator[DatabaseSessionManager]:
+    manager = DatabaseSessionManager()
+    manager.init(f"sqlite+aiosqlite:///{tmp_path / 'buffer.db'}")
+    async with manager.connect() as connection:
+        await manager.create_all(connection)
+    yield manager
+    await manager.close()
+
+
+def count_writes(buffer: WriteBuffer) -> List[int]:
+    """Record the number of rows in each batch the buffer writes."""
+    batches: List[int] = []
+    write = buffer._write
+
+    async def counted(inserts: Dict[Any, Any], updates: Dict[Any, Any]) -> Any:
+        batches.append(len(inserts) + len(updates))
+        return await write(inserts, updates)
+
+    buffer._write = counted  # type: ignore[method-assign]
+    return batches
+
+
+async def stored(sessions: DatabaseSessionManager, id: Any) -> ItineraryQuery:
+    async with sessions.session(mode="read") as db:
+        row = await ItineraryQuery.get(db, id)
+    assert row is not None
+    return row
+
+
+@pytest.mark.anyio
+async def test_concurrent_inserts_commit_in_one_batch(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=0.05)
+    batches = count_writes(buffer)
+
+    rows = await asyncio.gather(
+        *(buffer.insert({"query": f"trip {i}"}) for i in range(5))
+    )
+    await buffer.close()
+
+    assert batches == [5]
+    assert sorted(row.query for row in rows) == [f"trip {i}" for i in range(5)]
+    for row in rows:
+        assert (await stored(sessions, row.id)).query == row.query
+
+
+@pytest.mark.anyio
+async def test_full_batch_flushes_before_the_interval(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, max_batch=2, interval=60)
+    rows = await asyncio.wait_for(
+        asyncio.gather(buffer.insert({"query": "a"}), buffer.insert({"query": "b"})),
+        timeout=5,
+    )
+    await buffer.close()
+    assert [row.query for row in rows] == ["a", "b"]
+
+
+@pytest.mark.anyio
+async def test_updates_fold_into_a_pending_insert(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=60)
+    batches = count_writes(buffer)
+
+    row = await buffer.insert({"query": "rome"}, durable=False)
+    assert row.status == ItineraryStatus.QUEUED.value
+    await buffer.set_status(row.id, ItineraryStatus.RUNNING, durable=False)
+    await buffer.set_response(row.id, "Day 1: Forum", durable=False)
+    assert buffer.size == 1
+    await buffer.close()
+
+    assert batches == [1]
+    saved = await stored(sessions, row.id)
+    assert saved.status == ItineraryStatus.DONE
+    assert saved.itinerary_response == "Day 1: Forum"
+
+
+@pytest.mark.anyio
+async def test_updates_of_a_row_fold_in_order(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=60)
+    row = await buffer.insert({"query": "oslo"}, durable=False)
+    await buffer.flush()
+
+    batches = count_writes(buffer)
+    await buffer.set_status(row.id, ItineraryStatus.RUNNING, durable=False)
+    await buffer.set_status(
+        row.id, ItineraryStatus.FAILED, error_message="boom", durable=False
+    )
+    assert buffer.size == 1
+    await buffer.close()
+
+    assert batches == [1]
+    saved = await stored(sessions, row.id)
+    assert saved.status == ItineraryStatus.FAILED
+    assert saved.error_message == "boom"
+
+
+@pytest.mark.anyio
+async def test_durable_update_returns_the_row(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=0.001)
+    row = await buffer.insert({"query": "lima"})
+    updated = await buffer.set_response(row.id, "Day 1: Miraflores")
+    await buffer.close()
+
+    assert updated is not None
+    assert updated.itinerary_response == "Day 1: Miraflores"
+
+
+@pytest.mark.anyio
+async def test_failed_batch_raises_for_durable_writes(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions, enabled=True, interval=0.001)
+
+    async def fail(inserts: Dict[Any, Any], updates: Dict[Any, Any]) -> Any:
+        raise RuntimeError("database down")
+
+    buffer._write = fail  # type: ignore[method-assign]
+    with pytest.raises(WriteBufferError) as info:
+        await buffer.insert({"query": "rome"})
+    assert isinstance(info.value.__cause__, RuntimeError)
+
+    # Fire-and-forget writes are dropped without raising
+    await buffer.insert({"query": "paris"}, durable=False)
+    await buffer.close()
+    assert buffer.size == 0
+
+
+@pytest.mark.anyio
+async def test_disabled_buffer_writes_at_once(
+    sessions: DatabaseSessionManager,
+) -> None:
+    buffer = WriteBuffer(sessions)
+    row = await buffer.insert({"query": "kyoto"})
+    assert buffer.size == 0
+    assert (await stored(sessions, row.id)).query == "kyoto"
+
+    updated = await buffer.set_response(row.id, "Day 1: Fushimi Inari")
+    assert updated is not None
+    assert updated.status == ItineraryStatus.DONE
+
+
+def test_max_batch_must_be_positive() -> None:
+    with pytest.raises(ValueError):
+        WriteBuffer(DatabaseSessionManager(), max_batch=0)